@@ -0,0 +1,66 @@
+"""
+Benchmark saving and loading many small objects of one class.
+
+Saves and loads each object to a file of its own, with the class cache
+cleared before each file as if classes weren't cached, and kept. Classes
+of __main__ are pickled by value, which is what makes pickling them
+slow.
+
+Usage: python benchmarks/bench_class_cache.py [num_objects]
+"""
+import os
+import sys
+import time
+import tempfile
+import dryml
+from dryml import class_cache
+
+
+class Small(dryml.Object):
+    def __init__(self, i=0):
+        self.i = i
+
+    def describe(self):
+        return f"Small object {self.i}"
+
+
+def run(cls, num, directory, cached):
+    objs = [cls(i=i) for i in range(num)]
+    paths = [os.path.join(directory, f"{i}.dry") for i in range(num)]
+
+    start = time.perf_counter()
+    for obj, path in zip(objs, paths):
+        if not cached:
+            class_cache.clear()
+        assert obj.save_self(path, exact_path=True)
+    save_elapsed = time.perf_counter()-start
+
+    start = time.perf_counter()
+    for path in paths:
+        if not cached:
+            class_cache.clear()
+        dryml.load_object(path, exact_path=True)
+    load_elapsed = time.perf_counter()-start
+    return save_elapsed, load_elapsed
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    # The classes of this file imported as a module are pickled by
+    # reference, like library classes.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import bench_class_cache
+
+    for cls in (Small, bench_class_cache.Small):
+        for cached in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                save_elapsed, load_elapsed = run(
+                    cls, num, directory, cached)
+            print(f"{cls.__module__}.{cls.__name__} cached={cached}: "
+                  f"save {num/save_elapsed:.0f} obj/s, "
+                  f"load {num/load_elapsed:.0f} obj/s")
+
+
+if __name__ == "__main__":
+    main()
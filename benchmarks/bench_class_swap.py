@@ -0,0 +1,69 @@
+"""
+Benchmark changing objects to a reloaded version of their class.
+
+Writes a module defining a model class with a large state, reloads it
+as after editing it, and changes objects to the reloaded class by
+saving and loading them, and in place.
+
+Usage: python benchmarks/bench_class_swap.py [num_objects] [state_mb]
+"""
+import importlib
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import dryml
+
+module_text = """import zipfile
+import numpy as np
+import dryml
+from dryml.mapped_file import write_buffer, read_buffer
+
+
+class Model(dryml.Object):
+    def __init__(self, dim=64):
+        self.weights = None
+
+    def save_object_imp(self, file: zipfile.ZipFile) -> bool:
+        write_buffer(file, 'weights.bin', self.weights)
+        return True
+
+    def load_object_imp(self, file: zipfile.ZipFile) -> bool:
+        self.weights = np.frombuffer(
+            read_buffer(file, 'weights.bin')).copy()
+        return True
+"""
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    state_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 32.
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, 'bench_swap_model.py'), 'w') as f:
+            f.write(module_text)
+        sys.path.insert(0, directory)
+        import bench_swap_model
+
+        objs = []
+        for _ in range(num):
+            obj = bench_swap_model.Model()
+            obj.weights = np.random.random(int(state_mb*2**20/8))
+            objs.append(obj)
+
+        for in_place in (False, True):
+            importlib.reload(bench_swap_model)
+            start = time.perf_counter()
+            for i, obj in enumerate(objs):
+                objs[i] = dryml.change_object_cls(
+                    obj, bench_swap_model.Model, update=True,
+                    in_place=in_place)
+            elapsed = time.perf_counter()-start
+            assert all(type(obj) is bench_swap_model.Model for obj in objs)
+            print(f"in_place={in_place}: {elapsed/num*1e3:.2f} ms per "
+                  f"object")
+
+
+if __name__ == "__main__":
+    main()
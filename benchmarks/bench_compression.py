@@ -0,0 +1,134 @@
+"""
+Benchmark .dry archive size against save and load time for several
+compression policies.
+
+Saves two kinds of model with each policy: a repo of small models made
+of a few nested components, and a model with float32 weights. Reports
+bytes on disk and the time to save and load.
+
+Usage: python benchmarks/bench_compression.py [num_small] [weights_mb]
+"""
+import os
+import sys
+import time
+import tempfile
+import zipfile
+import numpy as np
+import dryml
+
+
+class Scaler(dryml.Object):
+    def __init__(self, mean=0., std=1.):
+        pass
+
+
+class Layer(dryml.Object):
+    def __init__(self, width=64, act='relu', init='glorot_uniform'):
+        pass
+
+
+class Network(dryml.Object):
+    @dryml.Meta.collect_args
+    def __init__(self, *layers, scaler=None, lr=1e-3, epochs=10,
+                 description=''):
+        self.weights = None
+
+    def save_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        if self.weights is not None:
+            with file.open('weights.npy', 'w', force_zip64=True) as f:
+                np.save(f, self.weights)
+        return True
+
+    def load_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        if 'weights.npy' in file.namelist():
+            with file.open('weights.npy', 'r') as f:
+                self.weights = np.load(f)
+        return True
+
+
+def make_network(i):
+    return Network(
+        *[Layer(width=2**(4+j), act='relu') for j in range(4)],
+        scaler=Scaler(mean=float(i)), lr=10**(-i % 5),
+        description=f"network {i} of a hyperparameter search")
+
+
+def dir_size(directory):
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for name in os.listdir(directory))
+
+
+def bench_small(policy, num):
+    objs = [make_network(i) for i in range(num)]
+    with tempfile.TemporaryDirectory() as directory:
+        repo = dryml.Repo(directory=directory, compression=policy)
+        for obj in objs:
+            repo.add_object(obj)
+        start = time.perf_counter()
+        repo.save()
+        save_time = time.perf_counter()-start
+        size = dir_size(directory)
+
+        start = time.perf_counter()
+        dryml.Repo(directory=directory).get(objs[0].definition())
+        load_time = time.perf_counter()-start
+    return size, save_time, load_time
+
+
+def bench_weights(policy, weights_mb):
+    obj = make_network(0)
+    rng = np.random.default_rng(0)
+    obj.weights = rng.normal(
+        size=int(weights_mb*2**20/4)).astype(np.float32)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'network.dry')
+        start = time.perf_counter()
+        assert obj.save_compute(compression=policy)
+        assert obj.save_self(path, compression=policy)
+        save_time = time.perf_counter()-start
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        loaded = dryml.load_object(path)
+        assert loaded.load_compute()
+        load_time = time.perf_counter()-start
+    return size, save_time, load_time
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    weights_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 64.
+
+    # Use the classes of this file imported as a module, so they're
+    # pickled by reference like library classes rather than by value
+    # like classes defined in __main__.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import bench_compression
+    global make_network
+    make_network = bench_compression.make_network
+
+    policies = {
+        'stored': dryml.CompressionPolicy.stored(),
+        'default': dryml.CompressionPolicy.default(),
+        'archival': dryml.CompressionPolicy.archival(),
+        'lzma': dryml.CompressionPolicy(
+            meta=zipfile.ZIP_LZMA, definition=zipfile.ZIP_LZMA,
+            data=zipfile.ZIP_LZMA),
+    }
+
+    print(f"{num} small models:")
+    for name, policy in policies.items():
+        size, save_time, load_time = bench_small(policy, num)
+        print(f"  {name:>8}: {size/2**10:8.0f} KB, save {save_time:.2f}s, "
+              f"load {load_time:.2f}s")
+
+    print(f"Model with {weights_mb:.0f} MB of weights:")
+    for name, policy in policies.items():
+        size, save_time, load_time = bench_weights(policy, weights_mb)
+        print(f"  {name:>8}: {size/2**20:8.1f} MB, save {save_time:.2f}s, "
+              f"load {load_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
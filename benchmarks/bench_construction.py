@@ -0,0 +1,52 @@
+"""
+Micro-benchmark for Object construction throughput.
+
+Builds 1, 3 and 6 level deep Object class hierarchies and reports how many
+objects per second can be constructed for each.
+
+Usage: python benchmarks/bench_construction.py [num_objects]
+"""
+import sys
+import time
+import dryml
+
+
+def make_level(i, base):
+    def __init__(self, *args, p=0, **kwargs):
+        self.p = p
+    return type(f"Level{i}", (base,), {'__init__': __init__})
+
+
+def make_hierarchy(depth):
+    cls = dryml.Object
+    for i in range(depth-1):
+        cls = make_level(i, cls)
+
+    # The leaf class consumes a positional argument.
+    class Leaf(cls):
+        def __init__(self, a, *args, b=1, p=0, **kwargs):
+            self.a = a
+            self.b = b
+
+    return Leaf
+
+
+def bench(cls, num):
+    start = time.perf_counter()
+    for i in range(num):
+        cls(i, b=2.0, p=1, dry_id='fixed')
+    return num/(time.perf_counter()-start)
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for depth in (1, 3, 6):
+        cls = make_hierarchy(depth)
+        # Warm up
+        bench(cls, 100)
+        rate = bench(cls, num)
+        print(f"depth {depth}: {rate:10.0f} objects/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Memory benchmark for definition storage in a large repository index.
+
+Creates definitions of many models which share a few component objects,
+round trips each through pickle as a Repo does when reading files, then
+reports the memory held by the definitions as loaded and once interned.
+
+Usage: python benchmarks/bench_def_memory.py [num_models]
+"""
+import sys
+import gc
+import pickle
+import tracemalloc
+import dryml
+
+
+class Optimizer(dryml.Object):
+    def __init__(self, lr=1e-3, betas=(0.9, 0.999)):
+        pass
+
+
+class Loss(dryml.Object):
+    def __init__(self, name='mse'):
+        pass
+
+
+class Transform(dryml.Object):
+    def __init__(self, scale=1., shift=0.):
+        pass
+
+
+class Model(dryml.Object):
+    def __init__(self, optimizer, loss, transform, seed=0):
+        pass
+
+
+def measure(func):
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    optimizers = [Optimizer(lr=lr) for lr in (1e-2, 1e-3, 1e-4)]
+    loss = Loss()
+    transforms = [Transform(scale=s) for s in (0.5, 1., 2.)]
+
+    # Each file stores its own copy of the whole definition tree.
+    pickled = []
+    for i in range(num):
+        model_def = dryml.ObjectDef(
+            Model, optimizers[i % 3].definition(), loss.definition(),
+            transforms[(i//3) % 3].definition(), seed=i,
+            dry_id=f"model-{i}")
+        pickled.append(pickle.dumps(model_def))
+
+    loaded, loaded_size = measure(
+        lambda: [pickle.loads(p) for p in pickled])
+    del loaded
+    interned, interned_size = measure(
+        lambda: [pickle.loads(p).intern() for p in pickled])
+    del interned
+
+    print(f"{num} models")
+    print(f"loaded:   {loaded_size/2**20:8.1f} MB "
+          f"({loaded_size/num:6.0f} B/model)")
+    print(f"interned: {interned_size/2**20:8.1f} MB "
+          f"({interned_size/num:6.0f} B/model)")
+
+
+if __name__ == "__main__":
+    main()
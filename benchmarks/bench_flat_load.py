@@ -0,0 +1,69 @@
+"""
+Benchmark loading deep pipelines from version 1 and version 2 files.
+
+Builds a chain of stages, each holding the previous one and a little
+compute data, saves it in both file versions and reports how long
+loading each takes, along with the file sizes.
+
+Usage: python benchmarks/bench_flat_load.py [depth] [repeats]
+"""
+import os
+import sys
+import time
+import pickle
+import tempfile
+import zipfile
+import numpy as np
+import dryml
+
+
+class Stage(dryml.Object):
+    def __init__(self, prev, index=0):
+        self.prev = prev
+        self.params = np.random.random(64)
+
+    def save_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('params.pkl', 'w') as f:
+            f.write(pickle.dumps(self.params))
+        return True
+
+    def load_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('params.pkl', 'r') as f:
+            self.params = pickle.loads(f.read())
+        return True
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    # Use the classes of this file imported as a module, so they're
+    # pickled by reference like library classes.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_flat_load import Stage
+
+    stage = dryml.Object()
+    for i in range(depth):
+        stage = Stage(stage, index=i)
+        assert stage.save_compute()
+
+    with tempfile.TemporaryDirectory() as dir:
+        for version in (1, 2):
+            path = os.path.join(dir, f"pipeline_v{version}.dry")
+            assert stage.save_self(path, version=version)
+
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                obj = dryml.load_object(path)
+                times.append(time.perf_counter()-start)
+            assert obj.definition() == stage.definition()
+
+            size_kb = os.path.getsize(path)/2**10
+            print(f"version {version}: depth {depth} loaded in "
+                  f"{min(times)*1e3:.1f} ms (best of {repeats}), "
+                  f"file {size_kb:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
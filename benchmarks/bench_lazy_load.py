@@ -0,0 +1,62 @@
+"""
+Benchmark opening deep pipelines only to read their definitions.
+
+Builds a chain of stages, each holding the previous one and a little
+compute data, and reports how long loading it takes eagerly and lazily,
+and how long it then takes to use the whole pipeline.
+
+Usage: python benchmarks/bench_lazy_load.py [depth] [repeats]
+"""
+import os
+import sys
+import time
+import tempfile
+import dryml
+
+
+def use_all(stage):
+    "Load every stage and its compute data"
+    while isinstance(stage, Stage):
+        assert stage.load_compute()
+        stage = stage.prev
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    # Use the classes of the flat load benchmark imported as a module,
+    # so they're pickled by reference like library classes.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    global Stage
+    from bench_flat_load import Stage
+
+    stage = dryml.Object()
+    for i in range(depth):
+        stage = Stage(stage, index=i)
+        assert stage.save_compute()
+
+    with tempfile.TemporaryDirectory() as dir:
+        path = os.path.join(dir, "pipeline.dry")
+        assert stage.save_self(path, version=2)
+
+        for lazy in (False, True):
+            open_times = []
+            use_times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                obj = dryml.load_object(path, lazy=lazy, mmap=True)
+                assert obj.definition() == stage.definition()
+                open_times.append(time.perf_counter()-start)
+
+                start = time.perf_counter()
+                use_all(obj)
+                use_times.append(time.perf_counter()-start)
+
+            print(f"lazy={lazy}: depth {depth} opened in "
+                  f"{min(open_times)*1e3:.1f} ms, then used in "
+                  f"{min(use_times)*1e3:.1f} ms (best of {repeats})")
+
+
+if __name__ == "__main__":
+    main()
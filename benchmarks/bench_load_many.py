@@ -0,0 +1,59 @@
+"""
+Benchmark loading many files at once against the number of workers.
+
+Saves a set of models sharing one embedding, and reports the throughput
+of loading them all with load_many at different worker counts, along
+with loading them one by one with load_object.
+
+Usage: python benchmarks/bench_load_many.py [num_files] [repeats]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import dryml
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    # Use the classes of the dedup benchmark imported as a module, so
+    # they're pickled by reference like library classes.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_repo_dedup import Embedding, Model
+
+    embedding = Embedding()
+    embedding.data = np.random.random(2**12)
+    assert embedding.save_compute()
+    models = [Model(embedding, seed=i) for i in range(num)]
+
+    with tempfile.TemporaryDirectory() as dir:
+        paths = []
+        for model in models:
+            path = os.path.join(dir, f"{model.dry_id}.dry")
+            assert model.save_self(path)
+            paths.append(path)
+
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for path in paths:
+                dryml.load_object(path)
+            times.append(time.perf_counter()-start)
+        print(f"load_object: {num/min(times):.0f} objects/s")
+
+        for max_workers in (None, 2, 4, 8):
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                loaded = dryml.load_many(paths, max_workers=max_workers)
+                times.append(time.perf_counter()-start)
+            assert len(loaded) == num
+            print(f"load_many max_workers={max_workers}: "
+                  f"{num/min(times):.0f} objects/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark loading an object with large compute data.
+
+Saves a model holding one large array, once storing it with np.save and
+once with write_buffer, then loads each memory mapped in a fresh process
+and reports load time and how much the peak resident set size grew.
+
+Usage: python benchmarks/bench_mapped_load.py [size_mb]
+"""
+import os
+import sys
+import time
+import resource
+import subprocess
+import tempfile
+import zipfile
+import numpy as np
+import dryml
+
+
+class CopiedWeights(dryml.Object):
+    "Reads weights into memory, like most framework loaders"
+    def __init__(self):
+        self.data = None
+
+    def save_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('data.npy', 'w', force_zip64=True) as f:
+            np.save(f, self.data)
+        return True
+
+    def load_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('data.npy', 'r') as f:
+            self.data = np.load(f)
+        return True
+
+
+class MappedWeights(dryml.Object):
+    "Uses the mapped weights in place"
+    def __init__(self):
+        self.data = None
+
+    def save_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        from dryml.mapped_file import write_buffer
+        write_buffer(file, 'data.bin', self.data)
+        return True
+
+    def load_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        from dryml.mapped_file import read_buffer
+        self.data = np.frombuffer(read_buffer(file, 'data.bin'))
+        return True
+
+
+def proc_status_mb(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(f'{field}:'):
+                    return int(line.split()[1])/2**10
+    except OSError:
+        pass
+    return None
+
+
+def max_rss_mb():
+    # ru_maxrss carries over from the parent process through exec on
+    # linux, so prefer the peak of this process's own memory map.
+    rss = proc_status_mb('VmHWM')
+    if rss is None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/2**10
+    return rss
+
+
+def anon_rss_mb():
+    "Private memory, which unlike mapped file pages can't be evicted"
+    return proc_status_mb('RssAnon') or 0.
+
+
+def load(path):
+    rss_before = max_rss_mb()
+    anon_before = anon_rss_mb()
+    start = time.perf_counter()
+    obj = dryml.load_object(path, mmap=True)
+    assert obj.load_compute()
+    # Touch every page, as using the weights would
+    total = float(obj.data.sum())
+    elapsed = time.perf_counter()-start
+    print(f"{elapsed:.2f} {max_rss_mb()-rss_before:.0f} "
+          f"{anon_rss_mb()-anon_before:.0f} {total:.0f}")
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--load':
+        load(sys.argv[2])
+        return
+
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 1024.
+    data = np.ones(int(size_mb*2**20/8))
+
+    with tempfile.TemporaryDirectory() as dir:
+        for cls in (CopiedWeights, MappedWeights):
+            obj = cls()
+            obj.data = data
+            assert obj.save_compute()
+            path = os.path.join(dir, f"{cls.__name__}.dry")
+            assert obj.save_self(path, version=2)
+            del obj
+
+            res = subprocess.run(
+                [sys.executable, __file__, '--load', path],
+                check=True, capture_output=True, text=True)
+            elapsed, rss, anon, _ = res.stdout.split()
+            print(f"{cls.__name__}: {size_mb:.0f} MB loaded in "
+                  f"{float(elapsed):.2f}s, peak RSS grew {rss} MB, "
+                  f"private memory grew {anon} MB")
+
+
+if __name__ == "__main__":
+    main()
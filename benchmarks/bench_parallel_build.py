@@ -0,0 +1,60 @@
+"""
+Benchmark cold-load time of a wide object graph from a Repo, building
+sequentially and with parallel resolution of sibling sub-definitions.
+
+Usage: python benchmarks/bench_parallel_build.py [num_objects] [size_mb]
+"""
+import sys
+import time
+import tempfile
+import zipfile
+import numpy as np
+import dryml
+
+
+class Payload(dryml.Object):
+    def __init__(self, size, **kwargs):
+        self.data = np.random.random(size)
+
+    def save_object_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('data.npy', 'w') as f:
+            np.save(f, self.data)
+        return True
+
+    def load_object_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('data.npy', 'r') as f:
+            self.data = np.load(f)
+        return True
+
+
+class Group(dryml.Object):
+    @dryml.Meta.collect_args
+    def __init__(self, *args, **kwargs):
+        self.members = args
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    size_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 16.
+    size = int(size_mb*1024*1024/8)
+
+    with tempfile.TemporaryDirectory() as directory:
+        repo = dryml.Repo(directory)
+        members = [Payload(size) for _ in range(num)]
+        for obj in members:
+            repo.add_object(obj)
+        repo.save()
+        group_def = Group(*members).definition()
+        del members, repo
+
+        for workers in (None, 2, 4, 8):
+            repo = dryml.Repo(directory)
+            start = time.perf_counter()
+            group_def.build(repo=repo, max_workers=workers)
+            elapsed = time.perf_counter()-start
+            print(f"max_workers={workers}: {elapsed:.3f}s")
+            del repo
+
+
+if __name__ == "__main__":
+    main()
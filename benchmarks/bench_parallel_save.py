@@ -0,0 +1,68 @@
+"""
+Benchmark saving wide object graphs sequentially and in parallel.
+
+Builds a pipeline of several models, each with compressible weights,
+and reports how long saving it with deflated data takes with different
+numbers of worker threads. The files saved all hold the same entries.
+
+Usage: python benchmarks/bench_parallel_save.py [num_models] [model_mb]
+"""
+import os
+import sys
+import time
+import tempfile
+import zipfile
+import numpy as np
+import dryml
+
+
+class Model(dryml.Object):
+    def __init__(self, index=0):
+        self.weights = None
+
+    def save_object_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('weights.bin', 'w') as f:
+            f.write(self.weights.tobytes())
+        return True
+
+
+class Pipeline(dryml.Object):
+    @dryml.Meta.collect_args
+    def __init__(self, *models):
+        self.models = models
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    model_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 4.
+
+    # Use the classes of this file imported as a module, so they're
+    # pickled by reference like library classes.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_parallel_save import Model, Pipeline
+
+    models = []
+    rng = np.random.default_rng(0)
+    for i in range(num):
+        model = Model(index=i)
+        # Quantized weights compress, like real checkpoints do
+        model.weights = rng.integers(
+            0, 16, int(model_mb*2**20), dtype=np.uint8)
+        models.append(model)
+    pipeline = Pipeline(*models)
+
+    policy = dryml.CompressionPolicy(data=zipfile.ZIP_DEFLATED)
+    with tempfile.TemporaryDirectory() as dir:
+        for max_workers in (None, 2, 4, 8):
+            path = os.path.join(dir, f"pipeline_{max_workers}.dry")
+            start = time.perf_counter()
+            assert dryml.save_object(
+                pipeline, path, exact_path=True, compression=policy,
+                max_workers=max_workers)
+            elapsed = time.perf_counter()-start
+            print(f"max_workers={max_workers}: saved {num} models of "
+                  f"{model_mb:.0f} MB in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
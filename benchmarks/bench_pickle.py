@@ -0,0 +1,86 @@
+"""
+Benchmark sending an object with a large array between processes.
+
+Sends the object through a multiprocessing pool, as pickled placeholder
+data holding a saved .dry file like older versions of dryml did, and as
+the object pickled natively. Also reports the time to pickle and
+unpickle the object in process with protocol 5, with buffers passed out
+of band.
+
+Usage: python benchmarks/bench_pickle.py [size_mb] [repeats]
+"""
+import io
+import os
+import pickle
+import sys
+import time
+import zipfile
+import multiprocessing as mp
+import numpy as np
+import dryml
+from dryml.mapped_file import read_buffer, write_buffer
+
+
+class Weights(dryml.Object):
+    def __init__(self, size=1024):
+        self.data = np.zeros(size)
+
+    def save_object_imp(self, file: zipfile.ZipFile) -> bool:
+        write_buffer(file, 'data.bin', self.data)
+        return True
+
+    def load_object_imp(self, file: zipfile.ZipFile) -> bool:
+        self.data = np.frombuffer(read_buffer(file, 'data.bin'))
+        return True
+
+
+def total_from_archive(data):
+    obj = dryml.load_object(io.BytesIO(data))
+    return float(obj.data.sum())
+
+
+def total_from_object(obj):
+    return float(obj.data.sum())
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 64.
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    # Use the class of this file imported as a module, so child
+    # processes can find it.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_pickle import Weights
+
+    obj = Weights(size=int(size_mb*2**20/8))
+    obj.data += 1.
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        buffers = []
+        data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+        pickle.loads(data, buffers=buffers)
+    elapsed = time.perf_counter()-start
+    print(f"protocol 5 in process: {elapsed/repeats*1e3:.1f} ms")
+
+    with mp.get_context('spawn').Pool(1) as pool:
+        # Start the worker before timing
+        pool.apply(int)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            buf = io.BytesIO()
+            assert obj.save_self(buf)
+            pool.apply(total_from_archive, (buf.getvalue(),))
+        elapsed = time.perf_counter()-start
+        print(f"pool with .dry archive: {elapsed/repeats*1e3:.1f} ms")
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            pool.apply(total_from_object, (obj,))
+        elapsed = time.perf_counter()-start
+        print(f"pool with pickled object: {elapsed/repeats*1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
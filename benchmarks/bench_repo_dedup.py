@@ -0,0 +1,80 @@
+"""
+Benchmark saving a repo of models which share one large component.
+
+Saves the same models with and without the repo's blob store, and
+reports the time taken and the repo's size on disk.
+
+Usage: python benchmarks/bench_repo_dedup.py [num_models] [shared_mb]
+"""
+import os
+import sys
+import time
+import tempfile
+import zipfile
+import numpy as np
+import dryml
+
+
+class Embedding(dryml.Object):
+    def __init__(self, dim=64):
+        self.data = None
+
+    def save_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        from dryml.mapped_file import write_buffer
+        write_buffer(file, 'data.bin', self.data)
+        return True
+
+
+class Model(dryml.Object):
+    def __init__(self, embedding, seed=0):
+        self.params = np.random.random(128)
+
+
+def dir_size_mb(directory):
+    total = 0
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            total += os.path.getsize(os.path.join(root, filename))
+    return total/2**20
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    shared_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 8.
+
+    # Use the classes of this file imported as a module, so they're
+    # pickled by reference like library classes.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_repo_dedup import Embedding, Model
+
+    embedding = Embedding()
+    embedding.data = np.random.random(int(shared_mb*2**20/8))
+    assert embedding.save_compute()
+    models = [Model(embedding, seed=i) for i in range(num)]
+
+    for dedup in (False, True):
+        with tempfile.TemporaryDirectory() as dir:
+            repo = dryml.Repo(directory=dir, dedup=dedup)
+            for model in models:
+                repo.add_object(model)
+
+            start = time.perf_counter()
+            repo.save()
+            elapsed = time.perf_counter()-start
+
+            # Adding one more model only writes what's new
+            new_model = Model(embedding, seed=num)
+            repo.add_object(new_model)
+            size_before = dir_size_mb(dir)
+            start = time.perf_counter()
+            repo.save(new_model)
+            add_elapsed = time.perf_counter()-start
+            added_mb = dir_size_mb(dir)-size_before
+
+            print(f"dedup={dedup}: saved {num} models in {elapsed:.2f}s, "
+                  f"repo is {size_before:.1f} MB; one more model took "
+                  f"{add_elapsed*1e3:.0f} ms and {added_mb:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark scanning and filtering a repo of saved pipelines.
+
+Saves the same pipelines with manifests (version 2 files) and without
+them (version 1 files), and reports how long opening the repo and
+selecting pipelines by class and arguments takes for each.
+
+Usage: python benchmarks/bench_repo_scan.py [num_pipelines] [depth]
+"""
+import os
+import sys
+import time
+import tempfile
+import dryml
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    # Use the classes of the flat load benchmark imported as a module,
+    # so they're pickled by reference like library classes.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_flat_load import Stage
+
+    pipelines = []
+    for i in range(num):
+        stage = dryml.Object()
+        for j in range(depth):
+            stage = Stage(stage, index=i*depth+j)
+        pipelines.append(stage)
+
+    selector = dryml.Selector(cls=Stage, kwargs={'index': depth-1})
+    for version in (1, 2):
+        with tempfile.TemporaryDirectory() as dir:
+            for pipeline in pipelines:
+                assert pipeline.save_self(
+                    os.path.join(dir, f"{pipeline.dry_id}.dry"),
+                    version=version)
+
+            start = time.perf_counter()
+            repo = dryml.Repo(directory=dir)
+            scan_elapsed = time.perf_counter()-start
+
+            start = time.perf_counter()
+            selected = repo.get(
+                selector=selector, open_container=False, load_objects=False)
+            select_elapsed = time.perf_counter()-start
+            assert selected.dry_id == pipelines[0].dry_id
+
+            print(f"version {version}: scanned {num} pipelines in "
+                  f"{scan_elapsed*1e3:.0f} ms, selected in "
+                  f"{select_elapsed*1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark checkpointing a model with a large frozen component.
+
+Saves the model once per epoch, changing only its small head, with a
+new save cache each time and with one kept between saves. Reports the
+time per checkpoint. Compressing data makes saving the frozen
+component cost more than copying it.
+
+Usage: python benchmarks/bench_save_cache.py [epochs] [frozen_mb]
+    [compress]
+"""
+import io
+import os
+import sys
+import time
+import zipfile
+import numpy as np
+import dryml
+from dryml.compression import CompressionPolicy
+from dryml.save_cache import SaveCache
+
+
+class Frozen(dryml.Object):
+    def __init__(self, dim=64):
+        self.data = None
+
+    def save_object_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('data.npy', 'w') as f:
+            np.save(f, self.data)
+        return True
+
+
+class Head(dryml.Object):
+    def __init__(self, frozen, size=1024):
+        self.params = np.zeros(size)
+
+    def save_object_imp(self, file: zipfile.ZipFile) -> bool:
+        from dryml.mapped_file import write_buffer
+        write_buffer(file, 'params.bin', self.params)
+        return True
+
+
+def main():
+    epochs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    frozen_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 64.
+    compression = None
+    if len(sys.argv) > 3 and sys.argv[3] == 'compress':
+        compression = CompressionPolicy.archival(level=1)
+
+    # Use the classes of this file imported as a module, so they're
+    # pickled by reference like library classes.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_save_cache import Frozen, Head
+
+    frozen = Frozen()
+    frozen.data = np.random.random(int(frozen_mb*2**20/8))
+    model = Head(frozen)
+
+    for kept in (False, True):
+        save_cache = SaveCache(max_bytes=2*int(frozen_mb*2**20))
+        start = time.perf_counter()
+        for epoch in range(epochs):
+            model.params += 1.
+            model.mark_dirty()
+            if not kept:
+                save_cache = SaveCache()
+            assert model.save_self(
+                io.BytesIO(), version=2, save_cache=save_cache,
+                compression=compression)
+        elapsed = time.perf_counter()-start
+        print(f"cache kept={kept}: {elapsed/epochs*1e3:.1f} ms per "
+              f"checkpoint")
+
+
+if __name__ == "__main__":
+    main()
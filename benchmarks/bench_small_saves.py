@@ -0,0 +1,59 @@
+"""
+Benchmark saving a repo full of small objects.
+
+Each object holds a small transform with a few kilobytes of compute
+data, so saving it creates compute buffers and nested object files.
+Reports the time to save the whole repo.
+
+Usage: python benchmarks/bench_small_saves.py [num_objects]
+"""
+import os
+import sys
+import time
+import pickle
+import tempfile
+import zipfile
+import numpy as np
+import dryml
+
+
+class Transform(dryml.Object):
+    def __init__(self, scale=1.):
+        self.params = np.random.random(256)
+
+    def save_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('params.pkl', 'w') as f:
+            f.write(pickle.dumps(self.params))
+        return True
+
+
+class Model(dryml.Object):
+    def __init__(self, transform, depth=1):
+        pass
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    # Use the classes of this file imported as a module, so they're
+    # pickled by reference like library classes rather than by value
+    # like classes defined in __main__.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_small_saves import Transform, Model
+
+    with tempfile.TemporaryDirectory() as dir:
+        repo = dryml.Repo(directory=dir)
+        for i in range(num):
+            transform = Transform(scale=float(i))
+            assert transform.save_compute()
+            repo.add_object(Model(transform, depth=i))
+
+        start = time.perf_counter()
+        repo.save()
+        elapsed = time.perf_counter()-start
+        print(f"Saved {num} objects in {elapsed:.2f}s "
+              f"({elapsed/num*1e3:.2f} ms per object)")
+
+
+if __name__ == "__main__":
+    main()
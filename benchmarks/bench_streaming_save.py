@@ -0,0 +1,68 @@
+"""
+Benchmark saving objects with large compute data to a file.
+
+For each size, saves a model holding one array in a fresh process and
+reports save time and how much the peak resident set size grew beyond
+the array itself.
+
+Usage: python benchmarks/bench_streaming_save.py [size_mb ...]
+"""
+import os
+import sys
+import time
+import subprocess
+import tempfile
+import zipfile
+import numpy as np
+import dryml
+
+
+class Weights(dryml.Object):
+    def __init__(self):
+        self.data = None
+
+    def save_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('data.npy', 'w', force_zip64=True) as f:
+            np.save(f, self.data)
+        return True
+
+
+def max_rss_mb():
+    # Peak of this process's own memory map. Unlike ru_maxrss, this
+    # doesn't carry over from the parent process.
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])/2**10
+
+
+def save(size_mb, path):
+    obj = Weights()
+    obj.data = np.ones(int(size_mb*2**20/8))
+    rss_before = max_rss_mb()
+    start = time.perf_counter()
+    assert obj.save_compute()
+    assert obj.save_self(path)
+    elapsed = time.perf_counter()-start
+    print(f"{elapsed:.2f} {max_rss_mb()-rss_before:.0f}")
+
+
+def main():
+    if len(sys.argv) > 3 and sys.argv[1] == '--save':
+        save(float(sys.argv[2]), sys.argv[3])
+        return
+
+    sizes = [float(size) for size in sys.argv[1:]] or [256., 1024.]
+    with tempfile.TemporaryDirectory() as dir:
+        path = os.path.join(dir, 'weights.dry')
+        for size_mb in sizes:
+            res = subprocess.run(
+                [sys.executable, __file__, '--save', str(size_mb), path],
+                check=True, capture_output=True, text=True)
+            elapsed, rss = res.stdout.split()
+            print(f"{size_mb:.0f} MB saved in {float(elapsed):.2f}s, "
+                  f"peak RSS grew {rss} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark lazy hyperparameter sweep expansion.
+
+Expands a 1M point grid over a template with nested definitions,
+reporting throughput and growth of the peak resident set size, then
+repeats a smaller grid against a Repo already holding some of its
+categories.
+
+Usage: python benchmarks/bench_sweep.py [num_lr] [num_width] [num_depth]
+"""
+import sys
+import time
+import resource
+import dryml
+
+
+class Optimizer(dryml.Object):
+    def __init__(self, lr=1e-3, momentum=0.9):
+        pass
+
+
+class Layer(dryml.Object):
+    def __init__(self, width=16, act='relu'):
+        pass
+
+
+class Model(dryml.Object):
+    def __init__(self, layer, optimizer=None, depth=1):
+        pass
+
+
+def main():
+    num_lr = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    num_width = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    num_depth = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+
+    template = dryml.ObjectDef(
+        Model, dryml.ObjectDef(Layer),
+        optimizer=dryml.ObjectDef(Optimizer), depth=1)
+    sweep = dryml.Sweep(template, {
+        'optimizer.lr': [10**(-i/10) for i in range(num_lr)],
+        '0.width': list(range(num_width)),
+        'depth': list(range(num_depth))})
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    num = 0
+    for obj_def in sweep.grid():
+        obj_def.get_full_category_id()
+        num += 1
+    elapsed = time.perf_counter()-start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{num} points in {elapsed:.1f}s ({num/elapsed:.0f} points/s), "
+          f"peak RSS grew {(rss_after-rss_before)/2**10:.1f} MB")
+
+    # Skip categories already in a repo
+    small = dryml.Sweep(template, {
+        'optimizer.lr': [1e-2, 1e-3],
+        '0.width': list(range(50)),
+        'depth': list(range(10))})
+    repo = dryml.Repo()
+    for i, obj_def in enumerate(small.grid()):
+        if i % 2 == 0:
+            repo.add_object(obj_def.build())
+    start = time.perf_counter()
+    remaining = list(small.grid(repo=repo))
+    elapsed = time.perf_counter()-start
+    print(f"{len(small)} points, {len(remaining)} not in repo "
+          f"({elapsed*1e3:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
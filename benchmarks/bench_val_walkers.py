@@ -0,0 +1,75 @@
+"""
+Micro-benchmark for the value walkers run on every Object construction,
+definition and build.
+
+Times validate_val_obj, validate_val_def, is_concrete_val, obj_to_def,
+def_to_obj and def_to_cat_def on a wide list of floats and on a deep
+nest of lists and dicts, then end to end construction with such values.
+
+Usage: python benchmarks/bench_val_walkers.py [width] [depth]
+"""
+import sys
+import time
+import dryml
+from dryml.config import validate_val_obj, validate_val_def, \
+    is_concrete_val, def_to_obj, def_to_cat_def
+from dryml.object import obj_to_def
+
+
+class Leaf(dryml.Object):
+    def __init__(self, x=0.):
+        pass
+
+
+class Model(dryml.Object):
+    def __init__(self, params, layers=None):
+        pass
+
+
+def make_nest(depth, leaf):
+    val = leaf
+    for i in range(depth):
+        if i % 2:
+            val = {'a': val, 'b': [1., 2, 'c'], 'c': i}
+        else:
+            val = [val, 0.5, (1, 2.), None]
+    return val
+
+
+def timeit(func, reps):
+    func()
+    start = time.perf_counter()
+    for _ in range(reps):
+        func()
+    return (time.perf_counter()-start)/reps*1e6
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    wide = [float(i) for i in range(width)]
+    deep = make_nest(depth, Leaf(x=1.))
+    deep_def = obj_to_def(deep)
+
+    cases = [
+        ('validate_val_obj wide', lambda: validate_val_obj(wide)),
+        ('validate_val_obj deep', lambda: validate_val_obj(deep)),
+        ('validate_val_def wide', lambda: validate_val_def(wide)),
+        ('validate_val_def deep', lambda: validate_val_def(deep_def)),
+        ('is_concrete_val wide', lambda: is_concrete_val(wide)),
+        ('is_concrete_val deep', lambda: is_concrete_val(deep_def)),
+        ('obj_to_def wide', lambda: obj_to_def(wide)),
+        ('obj_to_def deep', lambda: obj_to_def(deep)),
+        ('def_to_obj wide', lambda: def_to_obj(wide)),
+        ('def_to_obj deep', lambda: def_to_obj(deep_def)),
+        ('def_to_cat_def wide', lambda: def_to_cat_def(wide)),
+        ('def_to_cat_def deep', lambda: def_to_cat_def(deep_def)),
+        ('construct + definition', lambda: Model(
+            wide, layers=deep, dry_id='fixed').definition()),
+    ]
+    for name, func in cases:
+        print(f"{name:24s} {timeit(func, 20):10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
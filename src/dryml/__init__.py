@@ -1,13 +1,16 @@
 from dryml.config import ObjectDef, Meta, \
     IncompleteDefinitionError, ComputeModeAlreadyActiveError, \
     ComputeModeLoadError, ComputeModeNotActiveError, \
-    ComputeModeSaveError, MissingIdError
+    ComputeModeSaveError, MissingIdError, build_many
+from dryml.build_session import BuildSession, BuildStats
+from dryml.compression import CompressionPolicy
 from dryml.object import Object, ObjectFile, ObjectFactory, \
-    load_object, save_object, change_object_cls, \
-    Wrapper, Callable, get_contained_objects, \
+    load_object, load_many, save_object, change_object_cls, \
+    migrate_object_cls, Wrapper, Callable, get_contained_objects, \
     build_obj_tree
 from dryml.selector import Selector
 from dryml.repo import Repo
+from dryml.sweep import Sweep
 from dryml.collections import List, Tuple, Dict
 from dryml.workshop import Workshop
 from dryml.context import compute_context, compute
@@ -19,19 +22,26 @@ __all__ = [
     Object,
     ObjectFile,
     ObjectDef,
+    BuildSession,
+    BuildStats,
+    CompressionPolicy,
     Meta,
     ObjectFactory,
     Selector,
     Repo,
+    Sweep,
     List,
     Tuple,
     Dict,
     Wrapper,
     Callable,
     Workshop,
+    build_many,
     load_object,
+    load_many,
     save_object,
     change_object_cls,
+    migrate_object_cls,
     context,
     IncompleteDefinitionError,
     ComputeModeAlreadyActiveError,
@@ -0,0 +1,250 @@
+import sys
+import zipfile
+from typing import Optional, Mapping, Union
+from dryml.file_intermediary import FileIntermediary, copy_chunked, \
+    copy_chunk_size
+from dryml.mapped_file import MappedFile, BufferArchive, \
+    aligned_zip_info, entry_alignment, entry_data_offset, resolve_entry, \
+    LOCAL_HEADER_SIZE
+
+
+def object_prefix(obj_id: str) -> str:
+    "Prefix of an object's entries in a flattened .dry archive"
+    return f"objects/{obj_id}/"
+
+
+def compute_prefix(obj_id: str) -> str:
+    "Prefix of an object's compute data in a flattened .dry archive"
+    return f"compute/{obj_id}/"
+
+
+def class_prefix(digest: str) -> str:
+    "Prefix of a pickled class shared by objects of a flattened archive"
+    return f"classes/{digest}/"
+
+
+class ArchiveView(object):
+    """
+    The entries of a zip file under a path prefix, with the prefix
+    removed from their names.
+
+    Supports the parts of the ZipFile interface used to save and load
+    objects, so flattened .dry archives can give each object what looks
+    like its own zip file. ZipInfo objects passed to open and writestr
+    must already carry the full name, as ones from compression policies
+    or aligned_zip_info called on the view do.
+
+    index optionally maps prefixes to the names under them, to avoid
+    scanning the archive for every view of a file being read.
+    """
+    def __init__(self, zf: zipfile.ZipFile, prefix: str,
+                 index: Optional[Mapping[str, list]] = None):
+        self.zf = zf
+        self.prefix = prefix
+        self.index = index
+
+    def sibling(self, prefix: str) -> 'ArchiveView':
+        "View another prefix of the same archive"
+        return ArchiveView(self.zf, prefix, index=self.index)
+
+    def resolve(self, name: str):
+        "The underlying zip file and full name of an entry"
+        return self.zf, self.prefix+name
+
+    @property
+    def fp(self):
+        return self.zf.fp
+
+    @property
+    def mode(self):
+        return self.zf.mode
+
+    @property
+    def compression(self):
+        return self.zf.compression
+
+    @property
+    def compresslevel(self):
+        return self.zf.compresslevel
+
+    def namelist(self):
+        if self.index is not None:
+            names = self.index.get(self.prefix, ())
+        else:
+            names = [
+                name for name in self.zf.namelist()
+                if name.startswith(self.prefix)]
+        num = len(self.prefix)
+        return [name[num:] for name in names]
+
+    def infolist(self):
+        return [self.zf.getinfo(self.prefix+name)
+                for name in self.namelist()]
+
+    def getinfo(self, name: str) -> zipfile.ZipInfo:
+        return self.zf.getinfo(self.prefix+name)
+
+    def open(self, name, mode='r', force_zip64=False):
+        if not isinstance(name, zipfile.ZipInfo):
+            name = self.prefix+name
+        return self.zf.open(name, mode=mode, force_zip64=force_zip64)
+
+    def read(self, name: str) -> bytes:
+        return self.zf.read(self.prefix+name)
+
+    def writestr(self, name, data, compress_type=None, compresslevel=None):
+        if not isinstance(name, zipfile.ZipInfo):
+            name = self.prefix+name
+        self.zf.writestr(name, data, compress_type=compress_type,
+                         compresslevel=compresslevel)
+
+    def close(self):
+        # The underlying zip file belongs to someone else
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f"ArchiveView({self.zf}, {self.prefix})"
+
+
+def build_prefix_index(zf: zipfile.ZipFile, depth: int = 2) \
+        -> Mapping[str, list]:
+    "Map the prefixes made of the first depth path parts to their names"
+    index = {}
+    for name in zf.namelist():
+        parts = name.split('/', depth)
+        if len(parts) <= depth:
+            continue
+        prefix = '/'.join(parts[:depth])+'/'
+        index.setdefault(prefix, []).append(name)
+    return index
+
+
+def open_archive(data):
+    """
+    Open compute data for reading, which is either a view of a flattened
+    archive, the buffers of an unpickled object or a zip file.
+    """
+    if isinstance(data, (ArchiveView, BufferArchive)):
+        return data
+    data.seek(0)
+    return zipfile.ZipFile(data, mode='r')
+
+
+def copy_archive(src, dst):
+    """
+    Copy every entry of src to dst, keeping its compression. Stored
+    entries stay aligned.
+    """
+    for info in src.infolist():
+        name = info.filename
+        if isinstance(src, ArchiveView):
+            name = name[len(src.prefix):]
+        if info.compress_type == zipfile.ZIP_STORED:
+            zinfo = aligned_zip_info(dst, name, file_size=info.file_size)
+        else:
+            full_name = name
+            if isinstance(dst, ArchiveView):
+                full_name = dst.prefix+name
+            zinfo = zipfile.ZipInfo(full_name, date_time=info.date_time)
+            zinfo.compress_type = info.compress_type
+            zinfo.file_size = info.file_size
+        with src.open(name, 'r') as f_in, dst.open(zinfo, 'w') as f_out:
+            copy_chunked(f_in, f_out)
+
+
+def archive_to_zip(view: Union[ArchiveView, BufferArchive]) \
+        -> FileIntermediary:
+    "Copy the entries of a view into a zip file of their own"
+    int_file = FileIntermediary.spooled()
+    with zipfile.ZipFile(int_file, mode='w') as zf:
+        copy_archive(view, zf)
+    return int_file
+
+
+def _read_at(zf: zipfile.ZipFile, offset: int, size: int):
+    if isinstance(zf.fp, MappedFile):
+        return zf.fp.getbuffer(offset, size)
+    with zf._lock:
+        zf.fp.seek(offset)
+        return zf.fp.read(size)
+
+
+# Copying entries raw writes through zipfile internals, as
+# ZipFile.open(zinfo, 'w') does. Other versions may change them, so
+# entries are decompressed and compressed again there.
+_raw_copy_supported = (3, 7) <= sys.version_info[:2] <= (3, 13)
+
+_raw_copy_attrs = (
+    '_lock', '_writing', '_seekable', '_writecheck', '_didModify',
+    'start_dir', 'filelist', 'NameToInfo')
+
+
+def copy_raw_entry(src, name: str, dst):
+    """
+    Copy an entry from src to the next entry of dst as it's stored,
+    without decompressing and compressing it again. Aligned entries stay
+    aligned.
+
+    On python versions whose zipfile internals this isn't checked
+    against, the entry is streamed through ZipFile.open instead.
+    """
+    src_zf, src_name = resolve_entry(src, name)
+    dst_zf, _ = resolve_entry(dst, name)
+    info = src_zf.getinfo(src_name)
+    if info.flag_bits & 0x1:
+        raise ValueError(f"Can't copy encrypted entry {src_name}")
+
+    align = entry_alignment(info)
+    if info.compress_type == zipfile.ZIP_STORED and align is not None:
+        zinfo = aligned_zip_info(
+            dst, name, file_size=info.file_size, align=align)
+        zinfo.date_time = info.date_time
+    else:
+        _, dst_name = resolve_entry(dst, name)
+        zinfo = zipfile.ZipInfo(dst_name, date_time=info.date_time)
+        zinfo.compress_type = info.compress_type
+    zinfo.external_attr = info.external_attr
+
+    if not _raw_copy_supported or \
+            not all(hasattr(dst_zf, attr) for attr in _raw_copy_attrs):
+        zinfo.file_size = info.file_size
+        with src.open(name, 'r') as f_in, dst.open(zinfo, 'w') as f_out:
+            copy_chunked(f_in, f_out)
+        return
+
+    # Find the entry's data after its local header
+    data_start = entry_data_offset(
+        info, _read_at(src_zf, info.header_offset, LOCAL_HEADER_SIZE))
+
+    # Compression options stay, sizes are known so no data descriptor
+    zinfo.flag_bits = info.flag_bits & 0x06
+    zinfo.CRC = info.CRC
+    zinfo.compress_size = info.compress_size
+    zinfo.file_size = info.file_size
+    zip64 = info.file_size * 1.05 > zipfile.ZIP64_LIMIT or \
+        info.compress_size > zipfile.ZIP64_LIMIT
+
+    # Write the entry as ZipFile.open(zinfo, 'w') would
+    with dst_zf._lock:
+        if dst_zf._writing:
+            raise ValueError(
+                "Can't write to the ZIP file while there is another "
+                "write handle open on it.")
+        if dst_zf._seekable:
+            dst_zf.fp.seek(dst_zf.start_dir)
+        zinfo.header_offset = dst_zf.fp.tell()
+        dst_zf._writecheck(zinfo)
+        dst_zf._didModify = True
+        dst_zf.fp.write(zinfo.FileHeader(zip64))
+        for start in range(0, info.compress_size, copy_chunk_size):
+            size = min(copy_chunk_size, info.compress_size-start)
+            dst_zf.fp.write(_read_at(src_zf, data_start+start, size))
+        dst_zf.start_dir = dst_zf.fp.tell()
+        dst_zf.filelist.append(zinfo)
+        dst_zf.NameToInfo[zinfo.filename] = zinfo
@@ -0,0 +1,144 @@
+import os
+import uuid
+import struct
+import hashlib
+import zipfile
+from typing import Iterator, Iterable, List, Set
+from dryml.file_intermediary import copy_chunk_size
+from dryml.utils import unpickler
+
+
+def archive_digest(file) -> str:
+    """
+    Digest of the entries of a zip archive. It depends only on entry
+    names and uncompressed content, so archives holding the same data
+    have the same digest however they were compressed or when they
+    were written.
+    """
+    file.seek(0)
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(file, mode='r') as zf:
+        for info in sorted(zf.infolist(), key=lambda i: i.filename):
+            name = info.filename.encode('utf-8')
+            digest.update(struct.pack('<QQ', len(name), info.file_size))
+            digest.update(name)
+            with zf.open(info, 'r') as f:
+                while True:
+                    chunk = f.read(copy_chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def referenced_blobs(path: str) -> Set[str]:
+    "Digests of the blobs a .dry file refers to"
+    with zipfile.ZipFile(path, mode='r') as zf:
+        try:
+            meta_data = unpickler(zf.read('meta_data.pkl'))
+        except KeyError:
+            return set()
+    return set(meta_data.get('blobs', {}).values())
+
+
+class BlobStore(object):
+    """
+    Content addressed store of saved objects, shared by the files of a
+    repo.
+
+    Each blob is a .dry file holding one subordinate object, named by
+    the digest of its content. Files saved with a blob store refer to
+    their subordinate objects by digest instead of holding copies, so
+    objects shared by many others are stored once.
+    """
+    # Name of the store's directory in a repo directory
+    dirname = '.dry_blobs'
+
+    # Path from a blob's directory to the root of its store
+    blob_dir = os.pardir
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def for_repo(directory: str) -> 'BlobStore':
+        return BlobStore(os.path.join(directory, BlobStore.dirname))
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.dry")
+
+    def __contains__(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def digests(self) -> Iterator[str]:
+        "Iterate over the digests of all stored blobs"
+        if not os.path.isdir(self.directory):
+            return
+        for prefix in sorted(os.listdir(self.directory)):
+            prefix_dir = os.path.join(self.directory, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for filename in sorted(os.listdir(prefix_dir)):
+                digest, ext = os.path.splitext(filename)
+                if ext == '.dry':
+                    yield digest
+
+    def put(self, file) -> str:
+        """
+        Store the .dry file held by a file object unless a blob with the
+        same content exists, and return its digest.
+        """
+        digest = archive_digest(file)
+        path = self.path(digest)
+        if os.path.exists(path):
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Concurrent writers of the same blob write the same content
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            file.seek(0)
+            file.write_to_file(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return digest
+
+    def reachable(self, roots: Iterable[str]) -> Set[str]:
+        """
+        Digests of the blobs the .dry files at roots refer to, directly
+        or through other blobs
+        """
+        reachable = set()
+        pending = list(roots)
+        while len(pending) > 0:
+            for digest in referenced_blobs(pending.pop()):
+                if digest not in reachable and digest in self:
+                    reachable.add(digest)
+                    pending.append(self.path(digest))
+        return reachable
+
+    def collect(self, roots: Iterable[str]) -> List[str]:
+        """
+        Remove the blobs which none of the .dry files at roots refer to,
+        and return their digests. Files saved to the store elsewhere
+        must be among roots, or their blobs are removed.
+        """
+        reachable = self.reachable(roots)
+        removed = []
+        for digest in list(self.digests()):
+            if digest in reachable:
+                continue
+            path = self.path(digest)
+            os.remove(path)
+            removed.append(digest)
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                # Other blobs share the directory
+                pass
+        return removed
+
+    def __repr__(self):
+        return f"BlobStore({self.directory})"
@@ -0,0 +1,263 @@
+import threading
+import contextvars
+import functools
+import concurrent.futures
+from typing import Optional
+
+
+class BuildStratTracker(object):
+    def __init__(self):
+        self.tracker = {}
+
+    def __getitem__(self, dry_id):
+        return self.tracker.setdefault(dry_id, set())
+
+    def __repr__(self):
+        return f"{self.tracker}"
+
+
+class BuildStats(object):
+    """
+    Counts how the objects requested from a build session were obtained.
+
+    constructed: Built by calling the class
+    cached: Taken from the session's build caches
+    loaded_repo: Loaded from the session's repo
+    loaded_zip: Loaded from a containing .dry file
+    """
+    fields = ('constructed', 'cached', 'loaded_repo', 'loaded_zip')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            for field in self.fields:
+                setattr(self, field, 0)
+
+    def record(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field)+1)
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.fields}
+
+    def __getstate__(self):
+        return self.as_dict()
+
+    def __setstate__(self, state):
+        self._lock = threading.Lock()
+        self.__dict__.update(state)
+
+    def __repr__(self):
+        vals = ", ".join(f"{k}={v}" for k, v in self.as_dict().items())
+        return f"BuildStats({vals})"
+
+
+class BuildTask(object):
+    """
+    A pending build which either a pool worker or a waiting thread runs,
+    whichever claims it first.
+    """
+    def __init__(self, func):
+        self.func = func
+        self.thread = None
+        self.result = None
+        self.error = None
+        self._claim_lock = threading.Lock()
+        self._done = threading.Event()
+
+    def run(self):
+        with self._claim_lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.get_ident()
+        try:
+            self.result = self.func()
+        except BaseException as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+    def running_here(self):
+        return self.thread == threading.get_ident()
+
+    def wait(self):
+        # Run the task ourselves if no worker has started it yet. This
+        # way a bounded pool can't deadlock on nested builds.
+        self.run()
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class BuildSession(object):
+    """
+    State shared by nested ObjectDef.build calls.
+
+    The active session is carried by a context variable, so independent
+    threads build with independent caches. A session can be reused across
+    many builds by activating it with a with statement or passing it to
+    build directly.
+
+    max_workers > 1 enables parallel resolution of sibling
+    sub-definitions on a thread pool. The pool is released when the
+    outermost with statement activating the session ends, or by close.
+    """
+    def __init__(self, repo=None, verbose: bool = False,
+                 max_workers: Optional[int] = None):
+        if type(verbose) is not bool:
+            raise TypeError("verbose must be a bool!")
+        self.repo = repo
+        self.verbose = verbose
+        # dry_id -> Object
+        self.build_cache = {}
+        # Definition tracking id -> Object
+        self.def_cache = {}
+        self.build_strat = BuildStratTracker()
+        self.stats = BuildStats()
+        self._tokens = threading.local()
+        # Number of with statements the session is active in, over all
+        # threads
+        self._with_depth = 0
+        # Parallel build state
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.RLock()
+        # dry_id or tracking id -> BuildTask
+        self._in_flight = {}
+        # Tracking ids of prefetched definitions not yet collected
+        self._prefetched = set()
+
+    @property
+    def parallel(self):
+        return self.max_workers is not None and self.max_workers > 1
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='dryml_build')
+            return self._executor
+
+    def close(self):
+        "Shut down the worker pool if one was started"
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            # Workers may still need the lock to finish
+            executor.shutdown(wait=True)
+
+    def get_cached(self, obj_def):
+        "Get an already built object for a definition if there is one"
+        obj = self.def_cache.get(obj_def.tracking_id)
+        if obj is None and obj_def.is_concrete():
+            obj = self.build_cache.get(obj_def.dry_id)
+        return obj
+
+    def collect(self, obj_def):
+        """
+        Record that an object is being reused. The first use of a
+        prefetched definition is the use it was built for.
+        """
+        with self._lock:
+            if obj_def.tracking_id in self._prefetched:
+                self._prefetched.remove(obj_def.tracking_id)
+                return
+        self.stats.record('cached')
+
+    def get_task(self, obj_def, func):
+        """
+        Get the in flight task building an equivalent definition, or
+        register a new one. Returns (task, is_new)
+        """
+        if obj_def.is_concrete():
+            key = obj_def.dry_id
+        else:
+            key = obj_def.tracking_id
+        with self._lock:
+            task = self._in_flight.get(key)
+            if task is not None:
+                return task, False
+
+            def run_task():
+                try:
+                    return func()
+                finally:
+                    # Later builds use the caches
+                    with self._lock:
+                        del self._in_flight[key]
+
+            task = BuildTask(run_task)
+            self._in_flight[key] = task
+            return task, True
+
+    def prefetch(self, obj_defs, load_zip=None):
+        "Start building a list of definitions on the worker pool"
+        executor = self.executor
+        for obj_def in obj_defs:
+            if self.get_cached(obj_def) is not None:
+                continue
+            task, is_new = self.get_task(
+                obj_def,
+                functools.partial(obj_def._build_imp, self, load_zip))
+            if is_new:
+                self._prefetched.add(obj_def.tracking_id)
+                # Workers need this session active
+                ctx = contextvars.copy_context()
+                executor.submit(ctx.run, task.run)
+
+    @staticmethod
+    def current():
+        "Get the build session active in the current context"
+        return _build_session.get()
+
+    def activate(self):
+        "Make this session active, returns a token for deactivate"
+        return _build_session.set(self)
+
+    def deactivate(self, token):
+        _build_session.reset(token)
+
+    def clear(self):
+        "Drop all cached objects"
+        self.build_cache = {}
+        self.def_cache = {}
+        self.build_strat = BuildStratTracker()
+        self.stats.reset()
+
+    def __enter__(self):
+        stack = getattr(self._tokens, 'stack', None)
+        if stack is None:
+            stack = []
+            self._tokens.stack = stack
+        stack.append(self.activate())
+        with self._lock:
+            self._with_depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.deactivate(self._tokens.stack.pop())
+        with self._lock:
+            self._with_depth -= 1
+            outermost = self._with_depth == 0
+        if outermost:
+            self.close()
+
+    def __repr__(self):
+        return f"BuildSession(repo={self.repo}, " \
+            f"cached={len(self.build_cache)})"
+
+
+# Kept out of dryml.config, since dill pickles that module's globals
+# along with Object classes defined in __main__.
+_build_session = contextvars.ContextVar('dryml_build_session', default=None)
+
+
+def current_build_session():
+    return _build_session.get()
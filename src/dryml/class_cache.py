@@ -0,0 +1,143 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional, Type
+import dill
+from dryml.utils import get_current_cls
+
+
+class ClassPayload(NamedTuple):
+    "A class pickled by dill, and the digest it's stored under"
+    data: bytes
+    digest: str
+
+
+# Most classes kept by either cache. Cached classes are held, so the
+# least recently used are dropped past this many.
+max_classes = 256
+
+# Pickled classes by class, with the class's state when pickled.
+# Reloading a module or redefining a class makes a new class, and
+# changing a class in place changes its state, so its pickle is made
+# again.
+_payloads = OrderedDict()
+
+# Classes loaded by payload digest and whether they were updated, with
+# the class's state and the module and module attribute they were
+# resolved against.
+_classes = OrderedDict()
+
+_lock = threading.Lock()
+
+
+def _class_state(cls: Type) -> tuple:
+    """
+    The attributes of a class and its bases, which dill pickles classes
+    defined in __main__ by value from. Values are compared by identity,
+    the state keeps them alive while it's cached.
+    """
+    return tuple(
+        (base, tuple(vars(base).items())) for base in cls.__mro__
+        if base is not object)
+
+
+def _same_class_state(state_1: tuple, state_2: tuple) -> bool:
+    "Whether two class states hold the same classes and values"
+    return len(state_1) == len(state_2) and all(
+        base_1 is base_2 and len(attrs_1) == len(attrs_2) and all(
+            name_1 == name_2 and value_1 is value_2
+            for (name_1, value_1), (name_2, value_2) in zip(
+                attrs_1, attrs_2))
+        for (base_1, attrs_1), (base_2, attrs_2) in zip(state_1, state_2))
+
+
+def _cache_get(cache: OrderedDict, key):
+    "Get a cache entry and mark it most recently used. Call with _lock."
+    entry = cache.get(key)
+    if entry is not None:
+        cache.move_to_end(key)
+    return entry
+
+
+def _cache_put(cache: OrderedDict, key, entry):
+    "Add a cache entry, dropping the least recently used. Call with _lock."
+    cache[key] = entry
+    cache.move_to_end(key)
+    while len(cache) > max_classes:
+        cache.popitem(last=False)
+
+
+def payload_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def class_payload(cls: Type) -> Optional[ClassPayload]:
+    """
+    Pickle a class with dill, once per class. Returns None for classes
+    dill can't pickle, which are loaded by name instead.
+    """
+    state = _class_state(cls)
+    with _lock:
+        entry = _cache_get(_payloads, cls)
+    if entry is not None and _same_class_state(entry[0], state):
+        return entry[1]
+    try:
+        data = dill.dumps(cls)
+        payload = ClassPayload(data, payload_digest(data))
+    except TypeError as e:
+        # Classes whose _abc_impl is wrongly constructed
+        # https://github.com/uqfoundation/dill/issues/332
+        if '_abc_data' in str(e):
+            payload = None
+        else:
+            raise e
+    with _lock:
+        _cache_put(_payloads, cls, (state, payload))
+    return payload
+
+
+def _module_state(cls: Type):
+    module = sys.modules.get(cls.__module__)
+    return module, getattr(module, cls.__name__, None)
+
+
+def load_class(digest: str, read_data: Callable[[], bytes],
+               update: bool = True, reload: bool = False) -> Type:
+    """
+    Load a pickled class, once per payload while the class and its
+    module are unchanged. read_data is only called if the class isn't
+    loaded yet.
+
+    update: Resolve the class to the current one of its module.
+    reload: Reload the class's module.
+    """
+    key = (digest, update)
+    if not reload:
+        with _lock:
+            entry = _cache_get(_classes, key)
+        if entry is not None:
+            cls, state, module, attr = entry
+            cur_module, cur_attr = _module_state(cls)
+            if cur_module is module and cur_attr is attr and \
+                    _same_class_state(_class_state(cls), state):
+                return cls
+
+    cls = dill.loads(read_data())
+    if update:
+        try:
+            cls = get_current_cls(cls, reload=reload)
+        except Exception as e:
+            raise RuntimeError(
+                f"Failed to update module class {e}")
+    with _lock:
+        _cache_put(
+            _classes, key, (cls, _class_state(cls), *_module_state(cls)))
+    return cls
+
+
+def clear():
+    "Forget pickled and loaded classes"
+    with _lock:
+        _payloads.clear()
+        _classes.clear()
@@ -0,0 +1,139 @@
+import time
+import zipfile
+from typing import Optional, Union, Tuple
+from dryml.mapped_file import aligned_zip_info, resolve_entry
+
+
+# Kinds of entries in a .dry archive
+ENTRY_META = 'meta'
+ENTRY_DEFINITION = 'definition'
+ENTRY_OBJECT = 'object'
+ENTRY_COMPUTE = 'compute'
+ENTRY_DATA = 'data'
+
+entry_kinds = (
+    ENTRY_META,
+    ENTRY_DEFINITION,
+    ENTRY_OBJECT,
+    ENTRY_COMPUTE,
+    ENTRY_DATA,
+)
+
+CompressionSpec = Union[int, Tuple[int, Optional[int]]]
+
+
+class CompressionPolicy(object):
+    """
+    Zip compression to use for each kind of entry in a .dry archive.
+
+    Kinds are 'meta' (metadata and class names), 'definition' (pickled
+    classes and arguments), 'object' (nested .dry files of subordinate
+    objects), 'compute' (the nested compute data archive) and 'data'
+    (entries written by save_object_imp and save_compute_imp). Version 2
+    files nest no archives, so only use 'object' and 'compute' when
+    saving version 1 files. Each kind
+    takes a zipfile compression constant, or a tuple of one and a
+    compression level. Entries written whole which are smaller than
+    min_size bytes are stored, as compressing them gains nothing.
+
+    Nested archives are best stored, so their entries are compressed
+    only once and stored entries inside them can be memory mapped.
+    Buffers written with write_buffer are always stored.
+    """
+    def __init__(self, default: CompressionSpec = zipfile.ZIP_STORED,
+                 min_size: int = 256, **kinds: CompressionSpec):
+        for kind in kinds:
+            if kind not in entry_kinds:
+                raise ValueError(f"Unknown archive entry kind {kind}")
+        self.min_size = min_size
+        self.specs = {}
+        for kind in entry_kinds:
+            spec = kinds.get(kind, default)
+            if type(spec) is not tuple:
+                spec = (spec, None)
+            self.specs[kind] = spec
+
+    @staticmethod
+    def stored() -> 'CompressionPolicy':
+        "Store every entry uncompressed, as older versions of dryml did"
+        return CompressionPolicy()
+
+    @staticmethod
+    def default() -> 'CompressionPolicy':
+        "Deflate definitions and metadata, store everything else"
+        return CompressionPolicy(
+            meta=zipfile.ZIP_DEFLATED,
+            definition=zipfile.ZIP_DEFLATED)
+
+    @staticmethod
+    def archival(level: int = 9) -> 'CompressionPolicy':
+        "Compress definitions and data as much as possible"
+        return CompressionPolicy(
+            meta=(zipfile.ZIP_DEFLATED, level),
+            definition=(zipfile.ZIP_DEFLATED, level),
+            data=(zipfile.ZIP_DEFLATED, level))
+
+    @staticmethod
+    def resolve(policy: Optional['CompressionPolicy']) \
+            -> 'CompressionPolicy':
+        if policy is None:
+            return default_policy
+        if not isinstance(policy, CompressionPolicy):
+            raise TypeError(
+                f"Expected a CompressionPolicy, got {type(policy)}")
+        return policy
+
+    def get(self, kind: str) -> Tuple[int, Optional[int]]:
+        "Get the compression type and level for a kind of entry"
+        return self.specs[kind]
+
+    def zip_kwargs(self, kind: str) -> dict:
+        "Keyword arguments giving a ZipFile the compression of a kind"
+        compression, level = self.specs[kind]
+        return {'compression': compression, 'compresslevel': level}
+
+    def write(self, zf: zipfile.ZipFile, name: str, data: bytes,
+              kind: str):
+        "Write a whole entry of some kind"
+        compression, level = self.specs[kind]
+        if len(data) < self.min_size:
+            compression = zipfile.ZIP_STORED
+        zf.writestr(name, data, compress_type=compression,
+                    compresslevel=level)
+
+    def zip_info(self, zf: zipfile.ZipFile, name: str, kind: str,
+                 file_size: int = 0) -> zipfile.ZipInfo:
+        """
+        Create a ZipInfo for streaming an entry of some kind into zf.
+        Stored entries are aligned.
+        """
+        compression, level = self.specs[kind]
+        if compression == zipfile.ZIP_STORED:
+            return aligned_zip_info(zf, name, file_size=file_size)
+        _, name = resolve_entry(zf, name)
+        zinfo = zipfile.ZipInfo(
+            name, date_time=time.localtime(time.time())[:6])
+        zinfo.compress_type = compression
+        # Python 3.13 renamed the level zipfile compresses streamed
+        # entries with.
+        if hasattr(zinfo, 'compress_level'):
+            zinfo.compress_level = level
+        else:
+            zinfo._compresslevel = level
+        zinfo.file_size = file_size
+        return zinfo
+
+    def __eq__(self, rhs):
+        if not isinstance(rhs, CompressionPolicy):
+            return False
+        return self.specs == rhs.specs and self.min_size == rhs.min_size
+
+    def __hash__(self):
+        return hash((tuple(sorted(self.specs.items())), self.min_size))
+
+    def __repr__(self):
+        return f"CompressionPolicy({self.specs}, min_size={self.min_size})"
+
+
+# Policy used when none is given
+default_policy = CompressionPolicy.default()
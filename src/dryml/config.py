@@ -4,17 +4,29 @@ import abc
 import inspect
 import functools
 import zipfile
-from typing import Union, Type, Mapping
+from typing import Union, Type, Mapping, NamedTuple, Optional
 from dryml.utils import is_nonstring_iterable, is_dictlike, \
-    get_class_from_str, get_class_str, get_hashed_id, init_arg_list_handler, \
-    init_arg_dict_handler, is_supported_scalar_type, is_supported_listlike, \
-    is_supported_dictlike, map_dictlike, map_listlike, equal_recursive
+    get_class_from_str, get_class_str, get_fully_qualified_name, \
+    equal_recursive, get_val_kind, nonscalar_elements, \
+    map_listlike_nonscalar, map_dictlike_nonscalar, \
+    VAL_SCALAR, VAL_LIST, VAL_DICT
 from dryml.context.context_tracker import WrongContextError, \
     context, NoContextError
 from dryml.context.process import compute_context
 from dryml.save_cache import SaveCache
 from dryml.file_intermediary import FileIntermediary
-import uuid
+from dryml.mapped_file import MappedFile, BufferArchive, open_entry, \
+    stored_entry_view
+from dryml.compression import CompressionPolicy, ENTRY_COMPUTE, ENTRY_DATA
+from dryml.archive import ArchiveView, compute_prefix, open_archive, \
+    copy_archive, archive_to_zip
+from dryml.build_session import BuildSession
+import itertools
+import threading
+import hashlib
+import struct
+import weakref
+import numpy as np
 
 
 class MissingIdError(Exception):
@@ -49,34 +61,74 @@ class ExpectedArgumentError(Exception):
     pass
 
 
-class BuildStratTracker(object):
-    def __init__(self):
-        self.tracker = {}
+# Types which can never contain an Object
+_atomic_types = frozenset((
+    type(None), str, bytes, int, float, bool, complex, type))
 
-    def __getitem__(self, dry_id):
-        if dry_id not in self.tracker:
-            self.tracker[dry_id] = set()
-        return self.tracker[dry_id]
+# Keyword arguments reserved for the base Object
+_dont_collect_kwargs = frozenset(('dry_id', 'dry_metadata'))
 
-    def __repr__(self):
-        return f"{self.tracker}"
 
+class InitPlan(NamedTuple):
+    """
+    Per-class construction plan compiled once by Meta
+    """
+    collect_args: bool
+    collect_kwargs: bool
+    num_args: int
+    kwarg_defaults: tuple
+    kwarg_names: frozenset
+    no_var_pars: bool
+    no_final_kwargs: bool
+    takes_args: bool
 
-# Create a couple global variables
-build_repo = None
-build_cache = None
-build_verbose = None
-def_cache = None
-build_strat = None
+
+def _add_dry_objs(el, obj_list):
+    "Add Objects contained within el to obj_list"
+    el_type = type(el)
+    if el_type in _atomic_types:
+        return
+    if el_type is list or el_type is tuple:
+        for elm in el:
+            _add_dry_objs(elm, obj_list)
+        return
+    if el_type is dict:
+        for key in el:
+            _add_dry_objs(key, obj_list)
+        for elm in el.values():
+            _add_dry_objs(elm, obj_list)
+        return
+    # All Object classes are created by Meta
+    if isinstance(el_type, Meta):
+        obj_list.append(el)
+    if is_nonstring_iterable(el):
+        for elm in el:
+            _add_dry_objs(elm, obj_list)
+    if is_dictlike(el):
+        for key in el:
+            _add_dry_objs(el[key], obj_list)
 
 
 def is_concrete_val(input_object):
-    from dryml import Object
-    # Is this object a dry definition?
-    if isinstance(input_object, Object):
+    kind = get_val_kind(input_object)
+    if kind == VAL_SCALAR:
+        return True
+    if isinstance(type(input_object), Meta):
         # A Object itself is a concrete value
         return True
-    elif isinstance(input_object, ObjectDef) or \
+    if kind == VAL_LIST:
+        for obj in nonscalar_elements(input_object):
+            if not is_concrete_val(obj):
+                return False
+        return True
+    if kind == VAL_DICT and 'dry_def' not in input_object:
+        for val in nonscalar_elements(input_object.values()):
+            if not is_concrete_val(val):
+                return False
+        return True
+
+    # Is this object a dry definition?
+    if isinstance(input_object, ObjectDef) or \
             is_dictlike(input_object) and 'dry_def' in input_object:
         # Check that there's a Dry ID here.
         if 'dry_id' not in input_object['dry_kwargs']:
@@ -131,9 +183,14 @@ class Meta(abc.ABCMeta):
         if '__dry_meta_base__' in attrs:
             base = True
 
+        # Compile the construction plan for this class
+        plan = Meta.compile_init_plan(init_func)
+        new_cls.__dry_init_plan__ = plan
+
         # Set new methods which need the class object
         # to be set properly
-        new_cls.__init__ = Meta.make_dry_init(new_cls, init_func, base=base)
+        new_cls.__init__ = Meta.make_dry_init(
+            new_cls, init_func, plan, base=base)
         new_cls.load_object = Meta.make_load_object(new_cls)
         new_cls.save_object = Meta.make_save_object(new_cls)
         new_cls.load_compute = Meta.make_load_compute(new_cls)
@@ -217,11 +274,12 @@ class Meta(abc.ABCMeta):
     def default_init(self, *args, **kwargs):
         pass
 
-    # Create scope with __class__ defined so super can find a cell
-    # with the right name.
-    # Python issue: https://bugs.python.org/issue29944
     @staticmethod
-    def make_dry_init(__class__, init_func, base=False):
+    def compile_init_plan(init_func):
+        """
+        Build the construction plan for an init function once, so
+        dry_init doesn't have to inspect the function on every call.
+        """
         # Track arguments
         init_func = Meta.track_args(init_func)
         sig = inspect.signature(init_func)
@@ -238,11 +296,49 @@ class Meta(abc.ABCMeta):
         if last_par_kind != inspect.Parameter.VAR_KEYWORD:
             no_final_kwargs = True
 
+        kwarg_defaults = tuple(init_func.__dry_kwargs__)
+
+        # Only 'self' in the signature means nothing can hold an Object
+        takes_args = len(sig.parameters) > 1
+
+        return InitPlan(
+            collect_args=bool(
+                getattr(init_func, '__dry_collect_args__', False)),
+            collect_kwargs=bool(
+                getattr(init_func, '__dry_collect_kwargs__', False)),
+            num_args=len(init_func.__dry_args__),
+            kwarg_defaults=kwarg_defaults,
+            kwarg_names=frozenset(k for k, _ in kwarg_defaults),
+            no_var_pars=no_var_pars,
+            no_final_kwargs=no_final_kwargs,
+            takes_args=takes_args)
+
+    # Create scope with __class__ defined so super can find a cell
+    # with the right name.
+    # Python issue: https://bugs.python.org/issue29944
+    @staticmethod
+    def make_dry_init(__class__, init_func, plan, base=False):
+        # Unpack the plan into locals for the hot path
+        collect_args = plan.collect_args
+        collect_kwargs = plan.collect_kwargs
+        plan_num_args = plan.num_args
+        kwarg_defaults = plan.kwarg_defaults
+        kwarg_names = plan.kwarg_names
+        no_var_pars = plan.no_var_pars
+        no_final_kwargs = plan.no_final_kwargs
+        takes_args = plan.takes_args
+        if base:
+            sub_kwarg_names = kwarg_names
+        else:
+            sub_kwarg_names = kwarg_names - _dont_collect_kwargs
+
         @functools.wraps(init_func)
         def dry_init(self, *args, dry_args=None, dry_kwargs=None, **kwargs):
             # Initialize dry arguments
-            dry_args = init_arg_list_handler(dry_args)
-            dry_kwargs = init_arg_dict_handler(dry_kwargs)
+            if dry_args is None:
+                dry_args = []
+            if dry_kwargs is None:
+                dry_kwargs = {}
 
             # Initialize compute data holder
             if not hasattr(self, '__dry_compute_data__'):
@@ -252,22 +348,26 @@ class Meta(abc.ABCMeta):
             if not hasattr(self, '__dry_compute_mode__'):
                 self.__dry_compute_mode__ = False
 
+            # Initialize the record of the file this object was last
+            # saved to or loaded from
+            if not hasattr(self, '__dry_sync__'):
+                self.__dry_sync__ = None
+
+            # Initialize the version of the object's state, counting
+            # changes to it
+            if not hasattr(self, '__dry_state_version__'):
+                self.__dry_state_version__ = 0
+
             # Initialize compute context indicator
             if not hasattr(self, '__dry_compute_context__'):
                 self.__dry_compute_context__ = 'default'
 
-            # manage whether to collect all arguments
-            collect_args = False
-            if hasattr(init_func, '__dry_collect_args__'):
-                if init_func.__dry_collect_args__:
-                    collect_args = True
-
             # Determine how many arguments to collect
             if collect_args:
                 # Collect all the arguments
                 num_args = len(args)
             else:
-                num_args = len(init_func.__dry_args__)
+                num_args = plan_num_args
 
             if num_args > len(args):
                 raise ExpectedArgumentError(
@@ -275,36 +375,32 @@ class Meta(abc.ABCMeta):
                     f"positional arguments, got {len(args)}. Did you forget "
                     f"to specify a required positional argument?")
 
-            for i in range(num_args):
-                dry_args.append(args[i])
-
-            collect_kwargs = False
-            if hasattr(init_func, '__dry_collect_kwargs__'):
-                if init_func.__dry_collect_kwargs__:
-                    collect_kwargs = True
+            dry_args.extend(args[:num_args])
 
             # Collect keyword arguments and save into dry_kwargs
-            used_kwargs = []
-            for k, v in init_func.__dry_kwargs__:
+            for k, v in kwarg_defaults:
                 # Need to use .get since we are passing a default (v).
                 dry_kwargs[k] = kwargs.get(k, v)
-                used_kwargs.append(k)
-
-            # Collect remaining kwargs if needed.
-            dont_collect_kwargs = ['dry_id', 'dry_metadata']
-            if collect_kwargs:
-                for k in kwargs:
-                    if k not in dont_collect_kwargs:
-                        if k not in used_kwargs:
-                            dry_kwargs[k] = kwargs[k]
-                            used_kwargs.append(k)
 
             # Grab unaltered arguments to pass to super
             super_args = args[num_args:]
-            used_kwargs += ['dry_args', 'dry_kwargs']
-            super_kwargs = {
-                k: v for k, v in kwargs.items() if k not in used_kwargs
-            }
+            if not kwargs:
+                super_kwargs = kwargs
+            elif collect_kwargs:
+                # Collect remaining kwargs. Only the special kwargs
+                # are left for the parents.
+                super_kwargs = {}
+                for k, v in kwargs.items():
+                    if k in kwarg_names:
+                        continue
+                    elif k in _dont_collect_kwargs:
+                        super_kwargs[k] = v
+                    else:
+                        dry_kwargs[k] = v
+            else:
+                super_kwargs = {
+                    k: v for k, v in kwargs.items() if k not in kwarg_names
+                }
 
             if base:
                 # At the base, we need to validate the dry args
@@ -336,24 +432,19 @@ class Meta(abc.ABCMeta):
 
             # Execute user init
             # Here we make sure to remove special arguments
-            used_kwargs = ['dry_args', 'dry_kwargs']
-            if no_final_kwargs:
-                known_kwargs = list(map(
-                    lambda t: t[0],
-                    init_func.__dry_kwargs__))
+            if not kwargs:
+                sub_kwargs = kwargs
+            elif no_final_kwargs:
                 sub_kwargs = {
-                    k: v for k, v in kwargs.items() if k in known_kwargs}
+                    k: v for k, v in kwargs.items() if k in sub_kwarg_names}
+            elif base:
+                sub_kwargs = kwargs
             else:
+                # Remove dry_id from being used in non-base constructors.
+                # Kludge solution.
                 sub_kwargs = {
-                    k: v for k, v in kwargs.items() if k not in used_kwargs}
-
-            # Remove dry_id from being used in non-base constructors.
-            # Kludge solution.
-            if not base:
-                if 'dry_id' in sub_kwargs:
-                    del sub_kwargs['dry_id']
-                if 'dry_metadata' in sub_kwargs:
-                    del sub_kwargs['dry_metadata']
+                    k: v for k, v in kwargs.items()
+                    if k not in _dont_collect_kwargs}
 
             if no_var_pars:
                 args = args[:num_args]
@@ -362,20 +453,12 @@ class Meta(abc.ABCMeta):
             if not hasattr(self, '__dry_obj_container_list__'):
                 self.__dry_obj_container_list__ = []
 
-            def _add_dry_objs(el):
-                from dryml import Object
-                if isinstance(el, Object):
-                    self.__dry_obj_container_list__.append(el)
-                if is_nonstring_iterable(el):
-                    for elm in el:
-                        _add_dry_objs(elm)
-                if is_dictlike(el):
-                    for key in el:
-                        elm = el[key]
-                        _add_dry_objs(elm)
-
-            _add_dry_objs(args)
-            _add_dry_objs(sub_kwargs)
+            if takes_args:
+                obj_list = self.__dry_obj_container_list__
+                for el in args:
+                    _add_dry_objs(el, obj_list)
+                for el in sub_kwargs.values():
+                    _add_dry_objs(el, obj_list)
 
             # Call user defined init
             init_func(self, *args, **sub_kwargs)
@@ -394,15 +477,39 @@ class Meta(abc.ABCMeta):
                     print("issue with super class load")
                     return False
             else:
+                # Content loaded from elsewhere isn't synced with any file
+                self.__dry_sync__ = None
+                self.__dry_state_version__ += 1
+
                 # Load compute data at the base.
                 compute_data_path = 'compute_data.zip'
                 if self.__dry_compute_data__ is not None:
                     del self.__dry_compute_data__
-                if compute_data_path in file.namelist():
-                    with file.open(compute_data_path, 'r') as f:
-                        new_compute_data = FileIntermediary()
-                        new_compute_data.write(f.read())
-                        self.__dry_compute_data__ = new_compute_data
+                if isinstance(file, ArchiveView):
+                    # Flattened archives hold compute entries directly
+                    compute = file.sibling(compute_prefix(self.dry_id))
+                    if len(compute.namelist()) == 0:
+                        self.__dry_compute_data__ = None
+                    elif isinstance(file.fp, MappedFile) and all(
+                            info.compress_type == zipfile.ZIP_STORED
+                            for info in compute.infolist()):
+                        # Use the mapped entries in place. Their views
+                        # keep the mapping alive, but not the archive.
+                        self.__dry_compute_data__ = BufferArchive({
+                            name: stored_entry_view(compute, name)
+                            for name in compute.namelist()})
+                    else:
+                        self.__dry_compute_data__ = archive_to_zip(compute)
+                elif compute_data_path in file.namelist():
+                    f = open_entry(file, compute_data_path)
+                    if isinstance(f, MappedFile):
+                        # Use the mapped file's data in place
+                        self.__dry_compute_data__ = f
+                    else:
+                        with f:
+                            new_compute_data = FileIntermediary()
+                            new_compute_data.write(f.read())
+                            self.__dry_compute_data__ = new_compute_data
                 else:
                     self.__dry_compute_data__ = None
 
@@ -422,19 +529,38 @@ class Meta(abc.ABCMeta):
         """
         Method for making a save_object function
         """
-        def save_object(self, file: zipfile.ZipFile, save_cache=None) -> bool:
+        def save_object(self, file: zipfile.ZipFile, save_cache=None,
+                        compression=None, refresh_compute=True) -> bool:
+            compression = CompressionPolicy.resolve(compression)
             if hasattr(__class__, '__dry_meta_base__'):
                 # We're at the base, so load the compute data.
                 # Save any compute data from compute components.
-                # If compute mode is active
-                if self.__dry_compute_mode__:
-                    self.save_compute(save_cache=save_cache)
+                # If compute mode is active, unless the compute data
+                # last saved is asked for
+                if self.__dry_compute_mode__ and refresh_compute:
+                    self.save_compute(
+                        save_cache=save_cache, compression=compression)
 
                 # Save compute data if it's there
-                if self.__dry_compute_data__ is not None:
+                data_buff = self.__dry_compute_data__
+                if data_buff is not None and isinstance(file, ArchiveView):
+                    # Flattened archives hold compute entries directly.
+                    # Older files can hold empty compute data.
+                    if isinstance(data_buff, (ArchiveView, BufferArchive)) \
+                            or data_buff.size() > 0:
+                        with open_archive(data_buff) as src:
+                            copy_archive(src, file.sibling(
+                                compute_prefix(self.dry_id)))
+                elif data_buff is not None:
                     compute_data_path = 'compute_data.zip'
-                    data_buff = self.__dry_compute_data__
-                    with file.open(compute_data_path, 'w') as f:
+                    if isinstance(data_buff, (ArchiveView, BufferArchive)):
+                        data_buff = archive_to_zip(data_buff)
+                    # Stored entries are aligned, so loaders can map
+                    # compute data in place
+                    zinfo = compression.zip_info(
+                        file, compute_data_path, ENTRY_COMPUTE,
+                        file_size=data_buff.size())
+                    with file.open(zinfo, 'w') as f:
                         data_buff.write_to_file(f)
 
             # Call this class's save object.
@@ -448,7 +574,9 @@ class Meta(abc.ABCMeta):
 
             if not hasattr(__class__, '__dry_meta_base__'):
                 # If we're not the base, call the super class's save.
-                super().save_object(file)
+                super().save_object(
+                    file, compression=compression,
+                    refresh_compute=refresh_compute)
 
             # Save contained dry objects passed as arguments to construct
             # for obj in self.__dry_obj_container_list__:
@@ -539,6 +667,9 @@ class Meta(abc.ABCMeta):
                 super().compute_cleanup()
 
             self.__dry_compute_mode__ = False
+            if hasattr(__class__, '__dry_meta_base__'):
+                # Compute state may have changed while it was active
+                self.mark_dirty()
 
         return compute_cleanup
 
@@ -575,10 +706,7 @@ class Meta(abc.ABCMeta):
             # Load this object's compute
             if hasattr(__class__, 'load_compute_imp'):
                 if f is not None:
-                    # Need to seek the io stream to the beginning
-                    f.seek(0)
-                    with zipfile.ZipFile(
-                            f, mode='r') as zf:
+                    with open_archive(f) as zf:
                         imp_res = __class__.load_compute_imp(
                             self, zf)
                         if type(imp_res) is not bool:
@@ -595,30 +723,39 @@ class Meta(abc.ABCMeta):
         """
         Method for making a save_compute function
         """
-        def save_compute(self, f=None, save_cache=None) -> bool:
+        def save_compute(self, f=None, save_cache=None,
+                         compression=None) -> bool:
             if save_cache is None:
                 save_cache = SaveCache()
+            elif f is None and not save_cache.in_operation():
+                # Compute data saved before may be out of date
+                with save_cache.operation():
+                    return self.save_compute(
+                        save_cache=save_cache, compression=compression)
+            compression = CompressionPolicy.resolve(compression)
             top_call = False
             if f is None:
                 top_call = True
                 # We're at the top of the call stack.
                 # Create io bytes stream
-                f = FileIntermediary()
+                f = FileIntermediary.spooled()
 
                 # Save contained dry objects passed as arguments to construct
                 for obj in self.__dry_obj_container_list__:
-                    if not obj.save_compute(save_cache=save_cache):
+                    if not obj.save_compute(
+                            save_cache=save_cache, compression=compression):
                         return False
 
             # Now we check if we're in the save cache.
-            if id(self) in save_cache.compute_cache:
+            if save_cache.has_compute(self):
                 # We don't have to go any further.
                 return True
 
             # Call class save implementation
             if hasattr(__class__, 'save_compute_imp'):
                 with zipfile.ZipFile(
-                        f, mode='w') as zf:
+                        f, mode='w',
+                        **compression.zip_kwargs(ENTRY_DATA)) as zf:
                     compute_imp_res = __class__.save_compute_imp(
                         self, zf)
                     if type(compute_imp_res) is not bool:
@@ -629,9 +766,12 @@ class Meta(abc.ABCMeta):
             # Call super class save
             if not hasattr(__class__, '__dry_meta_base__'):
                 # If we're not the base, call the super class's load.
-                super().save_compute(f=f, save_cache=save_cache)
+                super().save_compute(
+                    f=f, save_cache=save_cache, compression=compression)
 
             if top_call:
+                self.mark_dirty()
+
                 # Only set the save file if there's data.
                 if not f.is_empty():
                     self.__dry_compute_data__ = f
@@ -640,7 +780,7 @@ class Meta(abc.ABCMeta):
                     del f
 
                 # Add self to the save cache, so we don't repeat.
-                save_cache.compute_cache.add(id(self))
+                save_cache.add_compute(self)
 
             return True
         return save_compute
@@ -657,43 +797,43 @@ def validate_key(key):
 # Assumption, for Objects, definitions are not valid values.
 # All definitions should be resolved into objects.
 def validate_val_obj(val):
-    if is_supported_scalar_type(val):
+    kind = get_val_kind(val)
+    if kind == VAL_SCALAR:
         return
-    from dryml import Object
-    if isinstance(val, Object):
+    if isinstance(type(val), Meta):
         # Assumption: Objects have already validated their values
         return
     if isinstance(val, ObjectDef):
         raise TypeError(
             "Object Definitions not valid for use within Object")
-    if is_supported_listlike(val):
-        for el in val:
+    if kind == VAL_LIST:
+        for el in nonscalar_elements(val):
             validate_val_obj(el)
         return
-    if is_supported_dictlike(val):
-        for k in val:
-            validate_val_obj(val[k])
+    if kind == VAL_DICT:
+        for el in nonscalar_elements(val.values()):
+            validate_val_obj(el)
         return
     raise ValueError(
         f"value ({val}) of type {type(val)} not supported")
 
 
 def validate_val_def(val):
-    if is_supported_scalar_type(val):
+    kind = get_val_kind(val)
+    if kind == VAL_SCALAR:
         return
-    from dryml import Object
-    if isinstance(val, Object):
+    if isinstance(type(val), Meta):
         # Assumption: Objects have already validated their values
         return
     if isinstance(val, ObjectDef):
         return
-    if is_supported_listlike(val):
-        for el in val:
+    if kind == VAL_LIST:
+        for el in nonscalar_elements(val):
             validate_val_def(el)
         return
-    if is_supported_dictlike(val):
-        for k in val:
-            validate_val_def(val[k])
+    if kind == VAL_DICT:
+        for el in nonscalar_elements(val.values()):
+            validate_val_def(el)
         return
     raise ValueError(
         f"value ({val}) of type {type(val)} not supported")
@@ -733,20 +873,35 @@ class RenderCache(object):
         self.nonunique_cache = {}
 
 
+def collect_sub_defs(val, sub_defs=None):
+    "Collect the definitions directly contained in a value"
+    if sub_defs is None:
+        sub_defs = []
+    if isinstance(val, ObjectDef):
+        sub_defs.append(val)
+    elif type(val) is list or type(val) is tuple:
+        for el in val:
+            collect_sub_defs(el, sub_defs)
+    elif isinstance(val, dict):
+        for el in val.values():
+            collect_sub_defs(el, sub_defs)
+    return sub_defs
+
+
 def def_to_obj(val, repo=None, load_zip=None):
     def applier(val):
         return def_to_obj(val, repo=repo, load_zip=load_zip)
-    from dryml import Object
-    if is_supported_scalar_type(val):
+    kind = get_val_kind(val)
+    if kind == VAL_SCALAR:
         return val
     elif isinstance(val, ObjectDef):
         return val.build(repo=repo, load_zip=load_zip)
-    elif isinstance(val, Object):
+    elif isinstance(type(val), Meta):
         return val
-    elif is_supported_listlike(val):
-        return map_listlike(applier, val)
-    elif is_supported_dictlike(val):
-        return map_dictlike(applier, val)
+    elif kind == VAL_LIST:
+        return map_listlike_nonscalar(applier, val)
+    elif kind == VAL_DICT:
+        return map_dictlike_nonscalar(applier, val)
     else:
         raise TypeError(
             f"Unsupported value {val} of type {type(val)} encountered!")
@@ -755,23 +910,263 @@ def def_to_obj(val, repo=None, load_zip=None):
 def def_to_cat_def(val, cache=None):
     def applier(val):
         return def_to_cat_def(val, cache=cache)
-    from dryml import Object
-    if is_supported_scalar_type(val):
+    kind = get_val_kind(val)
+    if kind == VAL_SCALAR:
         return val
     elif isinstance(val, ObjectDef):
         return val.get_cat_def(recursive=True, cache=cache)
-    elif isinstance(val, Object):
+    elif isinstance(type(val), Meta):
         return val.definition().get_cat_def(recursive=True, cache=cache)
-    elif is_supported_listlike(val):
-        return map_listlike(applier, val)
-    elif is_supported_dictlike(val):
-        return map_dictlike(applier, val)
+    elif kind == VAL_LIST:
+        return map_listlike_nonscalar(applier, val)
+    elif kind == VAL_DICT:
+        return map_dictlike_nonscalar(applier, val)
     else:
         raise TypeError(
             f"Unsupported value {val} of type {type(val)} encountered!")
 
 
+def _encode_sized(tag: bytes, payload: bytes, out: bytearray):
+    out += tag
+    out += b'%d:' % len(payload)
+    out += payload
+
+
+def _encode_canonical(val, out: bytearray, parent=None,
+                      full_cat: bool = False, volatile=None) -> bool:
+    """
+    Append a canonical, order-stable binary encoding of val to out.
+    Contained definitions contribute their cached digests, and register
+    parent (a weakref) to be invalidated when they change. With full_cat,
+    contained definitions and objects contribute the digest of their
+    recursive category definition instead.
+
+    volatile: A one element list, set to [True] when val holds values
+        which can change in place without a definition noticing, like
+        lists, dicts and objects. Digests of such values can't be cached.
+    Returns whether the value is concrete.
+    """
+    val_type = type(val)
+    if val is None:
+        out += b'N'
+    elif val_type is bool:
+        out += b'T' if val else b'F'
+    elif val_type is int:
+        out += b'i%d;' % val
+    elif val_type is float:
+        out += b'f'
+        out += struct.pack('<d', val)
+    elif val_type is str:
+        _encode_sized(b's', val.encode('utf-8'), out)
+    elif val_type is bytes:
+        _encode_sized(b'b', val, out)
+    elif isinstance(val, ObjectDef):
+        # Interned definitions never change, and may be shared
+        # by very many parents.
+        if parent is not None and not val._interned:
+            val._add_digest_parent(parent)
+        if full_cat:
+            out += b'D'
+            out += val._get_full_cat_digest()
+            if volatile is not None and val._cat_cache[2]:
+                volatile[0] = True
+            return False
+        digest, concrete = val._get_digest()
+        out += b'D'
+        out += digest
+        if volatile is not None and val._digest_cache[3]:
+            volatile[0] = True
+        return concrete
+    elif isinstance(val_type, Meta):
+        if volatile is not None:
+            volatile[0] = True
+        if full_cat:
+            # Objects are replaced by their category definition
+            out += b'D'
+            out += val.definition()._get_full_cat_digest()
+            return True
+        digest, _ = val.definition()._get_digest()
+        out += b'O'
+        out += digest
+    elif val_type is list or val_type is tuple:
+        if val_type is list and volatile is not None:
+            volatile[0] = True
+        out += b'l' if val_type is list else b't'
+        out += b'%d:' % len(val)
+        concrete = True
+        for el in val:
+            # Inline the most common scalars
+            el_type = type(el)
+            if el_type is float:
+                out += b'f'
+                out += struct.pack('<d', el)
+            elif el_type is int:
+                out += b'i%d;' % el
+            elif not _encode_canonical(
+                    el, out, parent=parent, full_cat=full_cat,
+                    volatile=volatile):
+                concrete = False
+        return concrete
+    elif isinstance(val, dict) or is_dictlike(val):
+        if volatile is not None:
+            volatile[0] = True
+        items, concrete = _encode_items(
+            val, parent, full_cat=full_cat, volatile=volatile)
+        _join_items(items, out)
+        return concrete
+    elif isinstance(val, type):
+        _encode_sized(
+            b'c', get_fully_qualified_name(val).encode('utf-8'), out)
+    elif isinstance(val, np.generic):
+        _encode_sized(
+            b'n', val.dtype.str.encode('utf-8') + b':' + val.tobytes(), out)
+    else:
+        if volatile is not None:
+            volatile[0] = True
+        _encode_sized(b'r', repr(val).encode('utf-8'), out)
+    return True
+
+
+def _encode_items(val, parent=None, full_cat: bool = False, volatile=None):
+    """
+    Encode the items of a dict-like value, ordered by key encoding so key
+    order doesn't matter. Returns
+    ([(key_enc, val_enc, key, concrete, volatile)], concrete). Items are
+    volatile as _encode_canonical describes, and volatile is set when any
+    of them is.
+    """
+    items = []
+    all_concrete = True
+    for k, v in val.items():
+        key_enc = bytearray()
+        _encode_canonical(k, key_enc)
+        val_enc = bytearray()
+        item_volatile = [False]
+        concrete = _encode_canonical(
+            v, val_enc, parent=parent, full_cat=full_cat,
+            volatile=item_volatile)
+        if not concrete:
+            all_concrete = False
+        if item_volatile[0] and volatile is not None:
+            volatile[0] = True
+        items.append(
+            (bytes(key_enc), val_enc, k, concrete, item_volatile[0]))
+    items.sort(key=lambda t: t[0])
+    return items, all_concrete
+
+
+def _join_items(items, out: bytearray):
+    out += b'd%d:' % len(items)
+    for item in items:
+        out += item[0]
+        out += item[1]
+
+
+class DefKwargs(dict):
+    """
+    Keyword arguments of a definition. Modifying them invalidates the
+    definition's cached digests. Digests of lists, dicts and objects
+    inside them aren't cached, as they can change in place. Pickles as a
+    plain dict.
+    """
+    __slots__ = ('_owner',)
+
+    def __init__(self, *args, owner=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._owner = None if owner is None else weakref.ref(owner)
+
+    def _modify(self):
+        owner = None if self._owner is None else self._owner()
+        if owner is not None:
+            owner._check_mutable()
+        return owner
+
+    def _modified(self, owner):
+        if owner is not None:
+            owner._invalidate_digest()
+
+    def __setitem__(self, key, value):
+        owner = self._modify()
+        super().__setitem__(key, value)
+        self._modified(owner)
+
+    def __delitem__(self, key):
+        owner = self._modify()
+        super().__delitem__(key)
+        self._modified(owner)
+
+    def pop(self, *args):
+        owner = self._modify()
+        res = super().pop(*args)
+        self._modified(owner)
+        return res
+
+    def popitem(self):
+        owner = self._modify()
+        res = super().popitem()
+        self._modified(owner)
+        return res
+
+    def setdefault(self, key, default=None):
+        owner = self._modify()
+        res = super().setdefault(key, default)
+        self._modified(owner)
+        return res
+
+    def update(self, *args, **kwargs):
+        owner = self._modify()
+        super().update(*args, **kwargs)
+        self._modified(owner)
+
+    def clear(self):
+        owner = self._modify()
+        super().clear()
+        self._modified(owner)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+def _freeze_defs(val):
+    "Make a freshly built definition tree immutable"
+    if isinstance(val, ObjectDef):
+        if not val._interned:
+            val._interned = True
+            _freeze_defs(val.args)
+            _freeze_defs(val.kwargs)
+    elif type(val) is list or type(val) is tuple:
+        for el in val:
+            _freeze_defs(el)
+    elif isinstance(val, dict):
+        for el in val.values():
+            _freeze_defs(el)
+
+
+def _intern_val(val, memo):
+    if isinstance(val, ObjectDef):
+        return val.intern(_memo=memo)
+    elif type(val) is list or type(val) is tuple:
+        return type(val)(_intern_val(el, memo) for el in val)
+    elif isinstance(val, dict):
+        return {k: _intern_val(v, memo) for k, v in val.items()}
+    else:
+        return val
+
+
 class ObjectDef(collections.UserDict):
+    # Kept on the class rather than in module globals, since dill pickles
+    # this module's globals along with classes defined in __main__.
+    _tracking_ids = itertools.count()
+    # Individual digest -> interned definition
+    _intern_table = weakref.WeakValueDictionary()
+    _intern_lock = threading.Lock()
+    # Check digest equality against a full recursive comparison.
+    verify_equality = False
+
     @staticmethod
     def from_dict(def_dict: Mapping, render_cache=None):
         raise RuntimeError("Functionality Questionable")
@@ -834,7 +1229,9 @@ class ObjectDef(collections.UserDict):
 
     def __init__(self, cls: Union[Type, str],
                  *args, dry_mut: bool = False, **kwargs):
-        self._tracking_id = uuid.uuid4()
+        self._tracking_id = next(ObjectDef._tracking_ids)
+        self._interned = False
+        self._reset_digest()
 
         super().__init__()
         if cls is None:
@@ -846,10 +1243,23 @@ class ObjectDef(collections.UserDict):
         validate_val_def(args)
         self.data['dry_args'] = args
         validate_val_def(kwargs)
-        self.data['dry_kwargs'] = kwargs
+        self.data['dry_kwargs'] = DefKwargs(kwargs, owner=self)
 
     def __eq__(self, other):
-        return equal_recursive(self, other)
+        if not isinstance(other, ObjectDef):
+            return equal_recursive(self, other)
+
+        # Structurally equal definitions have equal digests. Digests of
+        # values which can change in place aren't cached, so they're
+        # current.
+        equal = self._get_digest()[0] == other._get_digest()[0]
+        if ObjectDef.verify_equality:
+            if equal != equal_recursive(self, other):
+                raise RuntimeError(
+                    f"Digest comparison of {self} and {other} doesn't "
+                    "match a recursive comparison! Was a definition "
+                    "modified in place?")
+        return equal
 
     @property
     def cls(self):
@@ -881,7 +1291,70 @@ class ObjectDef(collections.UserDict):
     def tracking_id(self):
         return self._tracking_id
 
+    @classmethod
+    def _from_parts(cls, def_cls, dry_mut, args, kwargs):
+        "Create a definition from already validated parts"
+        new_def = cls.__new__(cls)
+        new_def._tracking_id = next(ObjectDef._tracking_ids)
+        new_def._interned = False
+        new_def._reset_digest()
+        new_def.data = {
+            'cls': def_cls,
+            'dry_mut': dry_mut,
+            'dry_args': args,
+            'dry_kwargs': DefKwargs(kwargs, owner=new_def),
+        }
+        return new_def
+
+    def intern(self, _memo=None) -> 'ObjectDef':
+        """
+        Get a shared immutable instance of this definition
+
+        Structurally identical concrete definitions intern to the same
+        instance, so a large collection of definitions stores each unique
+        component once. A non-concrete definition is copied with its
+        concrete sub-definitions interned.
+        """
+        if self._interned:
+            return self
+        if _memo is None:
+            _memo = {}
+        if id(self) in _memo:
+            return _memo[id(self)]
+
+        digest, concrete = self._get_digest()
+        if concrete:
+            with ObjectDef._intern_lock:
+                shared = ObjectDef._intern_table.get(digest)
+            if shared is not None:
+                _memo[id(self)] = shared
+                return shared
+
+        new_def = ObjectDef._from_parts(
+            self.cls, self.dry_mut,
+            _intern_val(self.args, _memo),
+            _intern_val(self.kwargs, _memo))
+        if concrete:
+            # Values were copied, and interned definitions aren't
+            # modified, so their digests hold.
+            new_def._interned = True
+            new_def._digest_cache = self._digest_cache[:3] + (False, False)
+            with ObjectDef._intern_lock:
+                new_def = ObjectDef._intern_table.setdefault(
+                    digest, new_def)
+        _memo[id(self)] = new_def
+        return new_def
+
+    @property
+    def interned(self):
+        return self._interned
+
+    def _check_mutable(self):
+        if self._interned:
+            raise TypeError("Interned definitions can't be modified!")
+
     def __setitem__(self, key, value):
+        self._check_mutable()
         if key not in ['cls', 'dry_mut', 'dry_args', 'dry_kwargs']:
             raise ValueError(
                 f"Setting Key {key} not supported by ObjectDef")
@@ -895,9 +1368,156 @@ class ObjectDef(collections.UserDict):
                 raise TypeError(
                     f"Value of type {type(value)} not supported "
                     "for class assignment!")
+        elif key == 'dry_kwargs':
+            self.data[key] = DefKwargs(value, owner=self)
         else:
             self.data[key] = value
 
+        self._invalidate_digest()
+
+    def __delitem__(self, key):
+        self._check_mutable()
+        super().__delitem__(key)
+        self._invalidate_digest()
+
+    def __copy__(self):
+        inst = self.__class__.__new__(self.__class__)
+        inst.__dict__.update(self.__dict__)
+        inst.__dict__['data'] = self.__dict__['data'].copy()
+        # The copy may be mutated independently
+        inst._interned = False
+        inst._reset_digest()
+        if 'dry_kwargs' in inst.data:
+            inst.data['dry_kwargs'] = DefKwargs(
+                inst.data['dry_kwargs'], owner=inst)
+        return inst
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Digest caches refer to in-memory definitions only
+        del state['_digest_cache']
+        del state['_digest_parents']
+        del state['_parents_purge_at']
+        del state['_cat_cache']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Tracking ids are only unique within a process
+        self._tracking_id = next(ObjectDef._tracking_ids)
+        self._interned = False
+        self._reset_digest()
+        if 'dry_kwargs' in self.data:
+            self.data['dry_kwargs'] = DefKwargs(
+                self.data['dry_kwargs'], owner=self)
+
+    def _reset_digest(self):
+        # Cached (individual digest, category digest, concrete,
+        # individual digest volatile, category digest volatile). Volatile
+        # digests depend on values which can change in place, so they're
+        # computed again each time.
+        self._digest_cache = None
+        # Cached [full category digest, (full category digest, shared
+        # category definition), full category digest volatile]
+        self._cat_cache = [None, None, False]
+        # Definitions whose cached digests were computed from ours
+        self._digest_parents = {}
+        self._parents_purge_at = 64
+
+    def _add_digest_parent(self, parent_ref):
+        parents = self._digest_parents
+        parents[id(parent_ref)] = parent_ref
+        if len(parents) >= self._parents_purge_at:
+            # Shared sub-definitions can outlive very many parents.
+            # Drop the dead ones so memory stays bounded.
+            for key, ref in list(parents.items()):
+                if ref() is None:
+                    del parents[key]
+            self._parents_purge_at = max(64, 2*len(parents))
+
+    def _invalidate_digest(self):
+        self._digest_cache = None
+        self._cat_cache = [None, None, False]
+        parents = self._digest_parents
+        self._digest_parents = {}
+        for parent_ref in parents.values():
+            parent = parent_ref()
+            if parent is not None:
+                parent._invalidate_digest()
+
+    def _compute_digest(self):
+        # Contained definitions register us, so mutating one of them
+        # invalidates our digest as well.
+        self_ref = weakref.ref(self)
+        args = self.data.get('dry_args', ())
+        kwargs = self.data.get('dry_kwargs', {})
+
+        # Encode the parts common to both digests
+        head = bytearray()
+        _encode_canonical(self.data.get('cls'), head)
+        _encode_canonical(self.data.get('dry_mut'), head)
+        volatile = [False]
+        concrete = _encode_canonical(
+            args, head, parent=self_ref, volatile=volatile)
+
+        items, _ = _encode_items(kwargs, parent=self_ref)
+        cat_items = [
+            item for item in items
+            if item[2] not in _dont_collect_kwargs]
+        for item in cat_items:
+            if not item[3]:
+                concrete = False
+        if 'dry_id' not in kwargs:
+            concrete = False
+
+        cat_enc = bytearray(head)
+        _join_items(cat_items, cat_enc)
+        ind_enc = head
+        _join_items(items, ind_enc)
+
+        # Interned definitions aren't modified
+        ind_volatile = not self._interned and \
+            (volatile[0] or any(item[4] for item in items))
+        cat_volatile = not self._interned and \
+            (volatile[0] or any(item[4] for item in cat_items))
+        self._digest_cache = (
+            hashlib.blake2b(ind_enc, digest_size=16).digest(),
+            hashlib.blake2b(cat_enc, digest_size=16).digest(),
+            concrete, ind_volatile, cat_volatile)
+
+    def _get_digest(self):
+        "Return (individual digest, whether the definition is concrete)"
+        cache = self._digest_cache
+        if cache is None or cache[3]:
+            self._compute_digest()
+            cache = self._digest_cache
+        return cache[0], cache[2]
+
+    def _get_full_cat_digest(self):
+        "Return the digest of get_cat_def(recursive=True)"
+        digest = self._cat_cache[0]
+        if digest is None or self._cat_cache[2]:
+            self_ref = weakref.ref(self)
+            enc = bytearray()
+            _encode_canonical(self.data.get('cls'), enc)
+            _encode_canonical(self.data.get('dry_mut'), enc)
+            volatile = [False]
+            _encode_canonical(
+                self.data.get('dry_args', ()), enc,
+                parent=self_ref, full_cat=True, volatile=volatile)
+            items, _ = _encode_items(
+                self.data.get('dry_kwargs', {}),
+                parent=self_ref, full_cat=True)
+            cat_items = [
+                item for item in items
+                if item[2] not in _dont_collect_kwargs]
+            _join_items(cat_items, enc)
+            digest = hashlib.blake2b(enc, digest_size=16).digest()
+            self._cat_cache[0] = digest
+            self._cat_cache[2] = not self._interned and \
+                (volatile[0] or any(item[4] for item in cat_items))
+        return digest
+
     def to_dict(self, cls_str: bool = False, render_cache=None):
         raise RuntimeError("Functionality Questionable")
         from dryml import Object
@@ -957,84 +1577,81 @@ class ObjectDef(collections.UserDict):
         # Return result
         return new_dict
 
-    def build(self, repo=None, load_zip=None, verbose=None):
-        "Construct an object"
-        reset_repo = False
-        reset_cache = False
-        reset_strat = False
-        reset_verbose = False
-        construct_object = True
-
-        global build_repo
-        global build_cache
-        global def_cache
-        global build_strat
-        global build_verbose
+    def build(self, repo=None, load_zip=None, verbose=None,
+              session: Optional[BuildSession] = None,
+              max_workers: Optional[int] = None):
+        """
+        Construct an object
 
-        # Handle setting of build_verbose
-        if build_verbose is None:
-            if verbose is None:
-                build_verbose = False
-            else:
-                if type(verbose) is not bool:
-                    raise TypeError("verbose must be a bool!")
-                build_verbose = verbose
-            reset_verbose = True
-        else:
-            if verbose is not None:
-                if type(verbose) is not bool:
-                    raise TypeError("verbose must be a bool!")
-                if verbose != build_verbose:
+        max_workers: When starting a new build session, resolve sibling
+            sub-definitions in parallel with this many threads.
+        """
+        if verbose is not None and type(verbose) is not bool:
+            raise TypeError("verbose must be a bool!")
+
+        # Find the build session to use
+        if session is None:
+            session = BuildSession.current()
+            if session is not None:
+                if verbose is not None and verbose != session.verbose:
                     raise ValueError(
                         "Can't change verbose once set by a superior call.")
+                if repo is not None and session.repo is not None and \
+                        repo is not session.repo:
+                    # Building from a different repo. Use separate caches.
+                    session = None
+        close_session = False
+        if session is None:
+            session = BuildSession(
+                repo=repo,
+                verbose=False if verbose is None else verbose,
+                max_workers=max_workers)
+            close_session = True
+
+        # Adopt the repo for this build if the session has none.
+        reset_repo = False
+        if repo is not None and session.repo is None:
+            session.repo = repo
+            reset_repo = True
 
-        # Handle creation of build repo
-        if repo is not None:
-            if build_repo is not None:
-                if repo is not build_repo:
-                    raise RuntimeError(
-                        "different repos not currently supported")
-            else:
-                # Set the call_repo
-                build_repo = repo
-                reset_repo = True
-
-        # Handle creation of build cache
-        if build_cache is None:
-            build_cache = {}
-            def_cache = {}
-            reset_cache = True
-
-        # Handle creation of build strat cache
-        if build_strat is None:
-            build_strat = BuildStratTracker()
-            reset_strat = True
-
-        # Define a cleanup function to call in the event of error
-        # and at the end of the function.
-        def cleanup():
-            global build_repo
-            global build_cache
-            global def_cache
-            global build_strat
-            global build_verbose
-
-            # Reset the repo for this function
+        token = session.activate()
+        try:
+            return self._build(session, load_zip)
+        finally:
+            session.deactivate(token)
             if reset_repo:
-                build_repo = None
-
-            # Reset the build cache
-            if reset_cache:
-                build_cache = None
-                def_cache = None
-
-            # Reset the build strat cache
-            if reset_strat:
-                build_strat = None
-
-            # Reset the verbose indicator
-            if reset_verbose:
-                build_verbose = None
+                session.repo = None
+            if close_session:
+                session.close()
+
+    def _build(self, session: BuildSession, load_zip):
+        if not session.parallel:
+            return self._build_imp(session, load_zip)
+
+        # Make sure only one thread builds any given object.
+        obj = session.get_cached(self)
+        if obj is not None:
+            session.collect(self)
+            return obj
+        task, is_new = session.get_task(
+            self, functools.partial(self._build_imp, session, load_zip))
+        if not is_new:
+            if task.running_here():
+                # We're building this object's content already, for
+                # instance while loading it from a repo.
+                return self._build_imp(session, load_zip)
+            obj = task.wait()
+            session.collect(self)
+            return obj
+        return task.wait()
+
+    def _build_imp(self, session: BuildSession, load_zip):
+        build_repo = session.repo
+        build_cache = session.build_cache
+        def_cache = session.def_cache
+        build_strat = session.build_strat
+        build_verbose = session.verbose
+        stats = session.stats
 
         # Create some book-keeping variables
         obj = None
@@ -1046,9 +1663,10 @@ class ObjectDef(collections.UserDict):
             obj = def_cache[self.tracking_id]
             if build_verbose:
                 print(
-                    "Object with id {obj.dry_id} built for definition "
+                    f"Object with id {obj.dry_id} built for definition "
                     f"with tracking id {self.tracking_id} was found "
                     "in the definition cache.")
+            stats.record('cached')
             construction_required = False
             construct_object = False
 
@@ -1060,13 +1678,13 @@ class ObjectDef(collections.UserDict):
             construction_required = False
 
         # Check the cache
-        if obj is None and not construction_required and \
-                build_cache is not None:
+        if obj is None and not construction_required:
             try:
                 obj = build_cache[obj_id]
                 if build_verbose:
                     print(f"Found object with id {obj_id} in "
                           "the build cache.")
+                stats.record('cached')
                 construct_object = False
             except KeyError:
                 pass
@@ -1082,6 +1700,7 @@ class ObjectDef(collections.UserDict):
                 def_cache[self.tracking_id] = obj
                 construct_object = False
                 build_strat[obj_id].remove('repo')
+                stats.record('loaded_repo')
                 if build_verbose:
                     print(f"Found object with id {obj_id} in the "
                           "repository.")
@@ -1089,57 +1708,88 @@ class ObjectDef(collections.UserDict):
                 # Didn't find the object in the repo
                 pass
 
-        try:
-            # Check the zipfile
-            if obj is None and (not construction_required) \
-                    and construct_object and (load_zip is not None) \
-                    and ('zip' not in build_strat[obj_id]):
-                target_filename = f"dry_objects/{obj_id}.dry"
-                from dryml import load_object
-                if target_filename in load_zip.namelist():
-                    build_strat[obj_id].add('zip')
-                    with load_zip.open(target_filename) as f:
-                        obj = load_object(f)
-                        build_cache[obj_id] = obj
-                        def_cache[self.tracking_id] = obj
-                        construct_object = False
-                    build_strat[obj_id].remove('zip')
-                    if build_verbose:
-                        print(f"Found object with id {obj_id} in the "
-                              "zip file.")
-
-            # Finally, actually construct the object
-            if obj is None and construct_object:
-                new_args = def_to_obj(self.args, repo=repo, load_zip=load_zip)
-                new_kwargs = def_to_obj(
-                    self.kwargs,
-                    repo=repo,
-                    load_zip=load_zip)
-
-                obj = self.cls(*new_args, **new_kwargs)
-
-                # Save object in the build cache.
-                obj_id = obj.dry_id
+        # Check the zipfile
+        if obj is None and (not construction_required) \
+                and construct_object and (load_zip is not None) \
+                and ('zip' not in build_strat[obj_id]):
+            target_filename = f"dry_objects/{obj_id}.dry"
+            from dryml import load_object
+            if not isinstance(load_zip, zipfile.ZipFile):
+                # Flattened archives load their objects themselves
+                build_strat[obj_id].add('zip')
+                obj = load_zip.load_contained_object(obj_id)
+                build_strat[obj_id].remove('zip')
+            elif target_filename in load_zip.namelist():
+                build_strat[obj_id].add('zip')
+                with open_entry(load_zip, target_filename) as f:
+                    obj = load_object(f)
+                build_strat[obj_id].remove('zip')
+            if obj is not None:
                 build_cache[obj_id] = obj
                 def_cache[self.tracking_id] = obj
+                construct_object = False
+                stats.record('loaded_zip')
                 if build_verbose:
-                    print(f"Explicitly constructed new object. id: {obj_id}")
-
-            elif obj is None and not construct_object:
-                raise RuntimeError(
-                    "Unexpected condition encountered when "
-                    "building from definition")
-
-        except Exception as e:
-            cleanup()
-            raise e
+                    print(f"Found object with id {obj_id} in the "
+                          "zip file.")
+
+        # Finally, actually construct the object
+        if obj is None and construct_object:
+            if session.parallel:
+                # Start resolving sub-definitions concurrently,
+                # def_to_obj then collects the results.
+                sub_defs = collect_sub_defs((self.args, self.kwargs))
+                if len(sub_defs) > 1:
+                    session.prefetch(sub_defs, load_zip=load_zip)
+
+            new_args = def_to_obj(
+                self.args, repo=build_repo, load_zip=load_zip)
+            new_kwargs = def_to_obj(
+                self.kwargs,
+                repo=build_repo,
+                load_zip=load_zip)
+
+            obj = self.cls(*new_args, **new_kwargs)
+
+            # Save object in the build cache.
+            obj_id = obj.dry_id
+            if not build_strat.tracker.get(obj_id):
+                # Objects being loaded are counted as loaded.
+                stats.record('constructed')
+            build_cache[obj_id] = obj
+            def_cache[self.tracking_id] = obj
+            if build_verbose:
+                print(f"Explicitly constructed new object. id: {obj_id}")
 
-        cleanup()
+        elif obj is None and not construct_object:
+            raise RuntimeError(
+                "Unexpected condition encountered when "
+                "building from definition")
 
         # Return the result
         return obj
 
-    def get_cat_def(self, recursive=True, cache=None):
+    def get_cat_def(self, recursive=True, cache=None, shared: bool = False):
+        """
+        Get the definition of this object's category, without dry_id and
+        dry_metadata.
+
+        shared: Return a memoized immutable category definition instead
+            of building a new one. Only applies when recursive.
+        """
+        if recursive and shared:
+            # Registers with sub-definitions, so changing one of them
+            # drops the memoized definition. Values changed in place
+            # change the digest.
+            digest = self._get_full_cat_digest()
+            memo = self._cat_cache[1]
+            if memo is None or memo[0] != digest:
+                cat_def = self.get_cat_def(recursive=True)
+                _freeze_defs(cat_def)
+                memo = (digest, cat_def)
+                self._cat_cache[1] = memo
+            return memo[1]
+
         if recursive:
             # Create cache if needed
             if cache is None:
@@ -1195,16 +1845,87 @@ class ObjectDef(collections.UserDict):
         return is_concrete_val(self)
 
     def __hash__(self):
-        if not self.is_concrete():
+        digest, concrete = self._get_digest()
+        if not concrete:
             raise IncompleteDefinitionError(
-                "Definition {self} has no dry_id!")
-        return hash(self.get_individual_id())
+                f"Definition {self} has no dry_id!")
+        return hash(digest)
 
     def get_individual_id(self):
-        if not self.is_concrete():
+        digest, concrete = self._get_digest()
+        if not concrete:
             raise IncompleteDefinitionError(
-                "Definition {self} has no dry_id!")
-        return get_hashed_id(self.get_hash_str())
+                f"Definition {self} has no dry_id!")
+        return digest.hex()
 
     def get_category_id(self):
-        return get_hashed_id(self.get_hash_str(no_id=True, no_metadata=True))
+        cache = self._digest_cache
+        if cache is None or cache[4]:
+            self._compute_digest()
+            cache = self._digest_cache
+        return cache[1].hex()
+
+    def get_full_category_id(self):
+        """
+        Get the category id of get_cat_def(recursive=True), so objects
+        differing only in the ids of their sub-objects share a category.
+        """
+        return self._get_full_cat_digest().hex()
+
+
+def build_many(defs, repo=None, load_zip=None, verbose: bool = False,
+               session: Optional[BuildSession] = None,
+               max_workers: Optional[int] = None,
+               share_defs: bool = False,
+               return_stats: bool = False):
+    """
+    Construct a list of objects with a single build session
+
+    Concrete sub-definitions shared between the definitions are resolved
+    only once, whether they are constructed or loaded from the repo.
+    Definitions without a dry_id construct a new object for every entry,
+    as separate build calls would. Objects are returned in the order of
+    defs.
+
+    share_defs: Also build equal definitions without a dry_id once, and
+        share the object between the entries using them.
+    return_stats: Also return the session's BuildStats
+    """
+    close_session = False
+    if session is None:
+        session = BuildSession(
+            repo=repo, verbose=verbose, max_workers=max_workers)
+        close_session = True
+    elif repo is not None and session.repo is not None and \
+            repo is not session.repo:
+        raise ValueError("Session was started with a different repo!")
+
+    reset_repo = False
+    if repo is not None and session.repo is None:
+        session.repo = repo
+        reset_repo = True
+
+    defs = list(defs)
+    objs = []
+    token = session.activate()
+    try:
+        if session.parallel:
+            # Only shared definitions can be built ahead of their entry
+            session.prefetch(
+                [obj_def for obj_def in defs
+                 if share_defs or obj_def.is_concrete()],
+                load_zip=load_zip)
+        for obj_def in defs:
+            if not share_defs:
+                session.def_cache = {}
+            objs.append(obj_def.build(load_zip=load_zip, session=session))
+    finally:
+        session.deactivate(token)
+        if reset_repo:
+            session.repo = None
+        if close_session:
+            session.close()
+
+    if return_stats:
+        return objs, session.stats
+    return objs
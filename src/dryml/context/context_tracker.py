@@ -482,8 +482,9 @@ class ContextContainer(object):
             save_cache = SaveCache()
 
         # Save objects in the tree depth-first.
-        obj_tree.apply_df(
-            lambda o: o.save_compute(save_cache=save_cache))
+        with save_cache.operation():
+            obj_tree.apply_df(
+                lambda o: o.save_compute(save_cache=save_cache))
         # Cleanup compute in the tree depth-first.
         obj_tree.apply_df(lambda o: o.compute_cleanup())
 
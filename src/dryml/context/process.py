@@ -133,25 +133,27 @@ class process_executor(object):
 
             save_cache = SaveCache()
 
-            # Put object updates in queue
-            if len(self.update_obj_defs) > 0:
-                for obj_def in self.update_obj_defs:
-                    found = False
-                    for obj in dry_objects:
-                        if obj_def == obj.definition():
-                            res_buf = io.BytesIO()
-                            obj.save_self(res_buf, save_cache=save_cache)
-                            res_buf.seek(0)
-                            ctx_ret_q.put(res_buf.read())
-                            found = True
-                            break
-                    # Close int_files in save_cache
-                    if not found:
-                        raise RuntimeError(
-                            "Couldn't find an object to associate"
-                            " a definition to!")
-
-            ctx_mgr.deactivate_objects(save_cache=save_cache)
+            # One operation, so compute data is only saved once
+            with save_cache.operation():
+                # Put object updates in queue
+                if len(self.update_obj_defs) > 0:
+                    for obj_def in self.update_obj_defs:
+                        found = False
+                        for obj in dry_objects:
+                            if obj_def == obj.definition():
+                                res_buf = io.BytesIO()
+                                obj.save_self(res_buf, save_cache=save_cache)
+                                res_buf.seek(0)
+                                ctx_ret_q.put(res_buf.read())
+                                found = True
+                                break
+                        # Close int_files in save_cache
+                        if not found:
+                            raise RuntimeError(
+                                "Couldn't find an object to associate"
+                                " a definition to!")
+
+                ctx_mgr.deactivate_objects(save_cache=save_cache)
 
             # Wait until return queue is empty (parent thread has emptied it)
             while not ctx_ret_q.empty():
@@ -4,14 +4,63 @@ import tempfile
 import zipfile
 
 
+# Size of the pieces files are copied in
+copy_chunk_size = 2**20
+
+# Size up to which spooled intermediaries stay in memory
+default_spool_size = 16*2**20
+
+
+def copy_chunked(src, dst):
+    "Copy the rest of src to dst, holding only one chunk in memory"
+    buf = bytearray(copy_chunk_size)
+    view = memoryview(buf)
+    while True:
+        num = src.readinto(buf)
+        if not num:
+            break
+        dst.write(view[:num])
+
+
 class FileIntermediary(BufferedIOBase):
-    def __init__(self, mem_mode=False):
+    """
+    A temporary file for building archives in.
+
+    With mem_mode, the content is kept in memory. With spool_size, it's
+    kept in memory until it grows past spool_size bytes, then moved to
+    a temporary file on disk.
+    """
+    def __init__(self, mem_mode=False, spool_size=None):
         self.mem_mode = mem_mode
-        if mem_mode:
+        self.spool_size = None if mem_mode else spool_size
+        if mem_mode or spool_size is not None:
             self.tmp_file = io.BytesIO()
         else:
             self.tmp_file = tempfile.NamedTemporaryFile(mode='w+b')
 
+    @staticmethod
+    def spooled(spool_size=None):
+        "Create an intermediary spooled up to default_spool_size"
+        if spool_size is None:
+            spool_size = default_spool_size
+        return FileIntermediary(spool_size=spool_size)
+
+    @property
+    def in_memory(self):
+        return type(self.tmp_file) is io.BytesIO
+
+    def rollover(self):
+        "Move the content to a temporary file on disk"
+        if not self.in_memory:
+            return
+        mem_file = self.tmp_file
+        pos = mem_file.tell()
+        self.tmp_file = tempfile.NamedTemporaryFile(mode='w+b')
+        with mem_file.getbuffer() as buf:
+            self.tmp_file.write(buf)
+        self.tmp_file.seek(pos)
+        mem_file.close()
+
     # Implement IOBase, and Buffered IOBase members
     def close(self):
         self.tmp_file.close()
@@ -21,6 +70,8 @@ class FileIntermediary(BufferedIOBase):
         return self.tmp_file.closed
 
     def fileno(self):
+        if not self.mem_mode:
+            self.rollover()
         return self.tmp_file.fileno()
 
     def flush(self):
@@ -54,7 +105,8 @@ class FileIntermediary(BufferedIOBase):
         return self.tmp_file.writable()
 
     def writelines(self, lines):
-        return self.tmp_file.writelines(lines)
+        for line in lines:
+            self.write(line)
 
     def read(self, size=-1):
         return self.tmp_file.read(size)
@@ -69,6 +121,10 @@ class FileIntermediary(BufferedIOBase):
         return self.tmp_file.readinto1(b)
 
     def write(self, b):
+        if self.spool_size is not None and self.in_memory and \
+                self.tmp_file.tell() + memoryview(b).nbytes > \
+                self.spool_size:
+            self.rollover()
         return self.tmp_file.write(b)
 
     def size(self):
@@ -81,8 +137,9 @@ class FileIntermediary(BufferedIOBase):
 
     def is_empty(self):
         size = self.size()
-        empty = False
+        empty = True
         if size != 0:
+            empty = False
             old_pos = self.tell()
             self.seek(0)
             with zipfile.ZipFile(
@@ -111,12 +168,12 @@ class FileIntermediary(BufferedIOBase):
         self.flush()
         self.seek(0)
 
-        # Read current file content into file
+        # Copy current file content into file
         if type(file) is str:
-            file = open(file, 'wb')
-
-        self.seek(0)
-        file.write(self.read())
+            with open(file, 'wb') as f:
+                copy_chunked(self.tmp_file, f)
+        else:
+            copy_chunked(self.tmp_file, file)
 
         # Restore position
         self.seek(cur_pos)
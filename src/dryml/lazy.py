@@ -0,0 +1,165 @@
+import abc
+import threading
+import weakref
+from typing import Callable
+from dryml.config import Meta, ObjectDef
+
+
+# Attributes of lazy objects available before they're loaded
+_lazy_attrs = frozenset((
+    '__class__', '__dict__', 'definition', 'dry_id', 'dry_metadata'))
+
+# Lazy subclass of each Object class. Subclasses refer to their class,
+# so they're held weakly too, and neither keeps the other alive.
+_lazy_classes = weakref.WeakKeyDictionary()
+
+
+class _LazyState(object):
+    "How a lazy object is loaded, and which thread is loading it"
+    __slots__ = ('definition', 'loader', 'lock', 'thread')
+
+    def __init__(self, definition: ObjectDef, loader: Callable):
+        self.definition = definition
+        self.loader = loader
+        # Each object loads on its own, so others load concurrently
+        self.lock = threading.RLock()
+        self.thread = None
+
+    def loading_here(self) -> bool:
+        return self.thread == threading.get_ident()
+
+
+def _lazy_state(obj):
+    # Removed once the object has loaded
+    return object.__getattribute__(obj, '__dict__').get('__dry_lazy__')
+
+
+def _lazy_getattribute(self, name):
+    if name in _lazy_attrs:
+        return object.__getattribute__(self, name)
+    state = _lazy_state(self)
+    if state is not None and state.loading_here():
+        # The loader sets the object up
+        return super(type(self), self).__getattribute__(name)
+    return getattr(materialize(self), name)
+
+
+def _lazy_setattr(self, name, value):
+    state = _lazy_state(self)
+    if state is not None and state.loading_here():
+        super(type(self), self).__setattr__(name, value)
+    else:
+        setattr(materialize(self), name, value)
+
+
+def _lazy_delattr(self, name):
+    state = _lazy_state(self)
+    if state is not None and state.loading_here():
+        super(type(self), self).__delattr__(name)
+    else:
+        delattr(materialize(self), name)
+
+
+def _lazy_property(name: str, from_def: Callable):
+    "A property of lazy objects taken from their definition"
+    def getter(self):
+        state = _lazy_state(self)
+        if state is None:
+            # Loaded in the meantime
+            return getattr(self, name)
+        if state.loading_here():
+            return getattr(super(type(self), self), name)
+        return from_def(state.definition)
+    return property(getter)
+
+
+def _lazy_definition(self):
+    state = _lazy_state(self)
+    if state is None:
+        return self.definition()
+    if state.loading_here():
+        return super(type(self), self).definition()
+    return state.definition
+
+
+def lazy_class(cls: type) -> type:
+    """
+    Get the lazy subclass of an Object class. Its instances stand in for
+    objects of the class until they're first used.
+    """
+    lazy_ref = _lazy_classes.get(cls)
+    lazy_cls = lazy_ref() if lazy_ref is not None else None
+    if lazy_cls is None:
+        attrs = {
+            '__module__': cls.__module__,
+            '__qualname__': cls.__qualname__,
+            '__dry_lazy_cls__': cls,
+            '__getattribute__': _lazy_getattribute,
+            '__setattr__': _lazy_setattr,
+            '__delattr__': _lazy_delattr,
+            'definition': _lazy_definition,
+            'dry_id': _lazy_property(
+                'dry_id', lambda d: d.dry_id),
+            'dry_metadata': _lazy_property(
+                'dry_metadata', lambda d: d.kwargs['dry_metadata']),
+        }
+        # Skip Meta's wrapping, the subclass uses the class's methods
+        lazy_cls = abc.ABCMeta.__new__(Meta, cls.__name__, (cls,), attrs)
+        _lazy_classes[cls] = weakref.ref(lazy_cls)
+    return lazy_cls
+
+
+def object_class(obj) -> type:
+    "The class of an object. Lazy objects have the class they stand in for."
+    obj_cls = type(obj)
+    return obj_cls.__dict__.get('__dry_lazy_cls__', obj_cls)
+
+
+def lazy_object(obj_def: ObjectDef, loader: Callable):
+    """
+    Create a stand in for the object of a concrete definition. When one
+    of its attributes is first used, loader(obj) builds and loads the
+    object into the stand in itself, so references to the stand in are
+    references to the object. Its definition, id and metadata are
+    available without loading it.
+    """
+    obj = object.__new__(lazy_class(obj_def.cls))
+    obj_dict = object.__getattribute__(obj, '__dict__')
+    obj_dict['__dry_lazy__'] = _LazyState(obj_def, loader)
+    return obj
+
+
+def is_lazy(obj) -> bool:
+    "Whether obj is a lazy object which hasn't been loaded yet"
+    return '__dry_lazy_cls__' in type(obj).__dict__
+
+
+def materialize(obj):
+    """
+    Load a lazy object in place. Other objects are returned as they are.
+    Other threads using the object wait for it to load.
+    """
+    if not is_lazy(obj):
+        return obj
+    state = _lazy_state(obj)
+    if state is None:
+        return obj
+    with state.lock:
+        if _lazy_state(obj) is None or state.thread is not None:
+            # Loaded while we waited, or being loaded by this thread
+            return obj
+        obj_dict = object.__getattribute__(obj, '__dict__')
+        state.thread = threading.get_ident()
+        try:
+            state.loader(obj)
+        except BaseException:
+            obj_dict.clear()
+            obj_dict['__dry_lazy__'] = state
+            raise
+        finally:
+            state.thread = None
+        # Switch the class before dropping the state, other threads
+        # look the state up to tell whether the object has loaded.
+        object.__setattr__(obj, '__class__', object_class(obj))
+        del obj_dict['__dry_lazy__']
+    return obj
@@ -0,0 +1,204 @@
+import json
+from typing import Optional
+from dryml.config import ObjectDef, Meta
+from dryml.utils import get_class_str, get_fully_qualified_name, \
+    get_val_kind, VAL_SCALAR, VAL_LIST, VAL_DICT
+
+
+# Name of the manifest entry of version 2 files
+manifest_name = 'manifest.json'
+
+manifest_version = 1
+
+
+class IncompleteManifestError(Exception):
+    "The manifest doesn't hold enough to answer a question"
+    pass
+
+
+class ManifestValue(object):
+    """
+    A value the manifest couldn't encode, kept as its repr. It doesn't
+    compare equal to anything.
+    """
+    def __init__(self, value_repr: str):
+        self.value_repr = value_repr
+
+    def __eq__(self, other):
+        return False
+
+    def __ne__(self, other):
+        return True
+
+    def __hash__(self):
+        return id(self)
+
+    def __repr__(self):
+        return f"ManifestValue({self.value_repr})"
+
+
+class DefManifest(object):
+    """
+    A definition read from a manifest. Classes are kept as strings, along
+    with the names of their bases, so it's read without importing them.
+    """
+    def __init__(self, cls_str: str, mro, args, kwargs,
+                 dry_mut: bool = False):
+        self.cls_str = cls_str
+        self.mro = mro
+        self.args = args
+        self.kwargs = kwargs
+        self.dry_mut = dry_mut
+
+    @property
+    def dry_id(self):
+        return self.kwargs.get('dry_id')
+
+    @property
+    def dry_metadata(self):
+        return self.kwargs.get('dry_metadata')
+
+    def is_subclass(self, cls_name: str) -> bool:
+        "Whether the class is or derives from the class with a full name"
+        return cls_name in self.mro
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.cls_str}, {self.args}, " \
+            f"{self.kwargs})"
+
+
+class Manifest(DefManifest):
+    """
+    Summary of the object a file holds: its definition and the category
+    ids the repo indexes it by.
+    """
+    def __init__(self, cls_str: str, mro, args, kwargs,
+                 dry_mut: bool = False,
+                 category_id: Optional[str] = None,
+                 full_category_id: Optional[str] = None,
+                 complete: bool = True):
+        super().__init__(cls_str, mro, args, kwargs, dry_mut=dry_mut)
+        self.category_id = category_id
+        self.full_category_id = full_category_id
+        # Whether all values could be encoded
+        self.complete = complete
+
+    @staticmethod
+    def from_def(obj_def: ObjectDef) -> 'Manifest':
+        encoder = _Encoder()
+        data = encoder.encode_def(obj_def)
+        data['version'] = manifest_version
+        data['category_id'] = obj_def.get_category_id()
+        data['full_category_id'] = obj_def.get_full_category_id()
+        data['complete'] = encoder.complete
+        return Manifest._from_data(data)
+
+    @staticmethod
+    def from_json(text: str) -> 'Manifest':
+        data = json.loads(text)
+        if data.get('version') != manifest_version:
+            raise ValueError(
+                f"Manifest version {data.get('version')} not supported!")
+        return Manifest._from_data(data)
+
+    @staticmethod
+    def _from_data(data) -> 'Manifest':
+        decoder = _Decoder()
+        manifest = Manifest(
+            data['cls'], data['mro'],
+            decoder.decode(data['args']), decoder.decode(data['kwargs']),
+            dry_mut=data['dry_mut'],
+            category_id=data['category_id'],
+            full_category_id=data['full_category_id'],
+            complete=data['complete'])
+        manifest._data = data
+        return manifest
+
+    def to_json(self) -> str:
+        return json.dumps(self._data, separators=(',', ':'))
+
+
+def _mro_names(cls):
+    return [get_fully_qualified_name(base) for base in cls.__mro__
+            if base is not object]
+
+
+class _Encoder(object):
+    """
+    Encode values of definitions as JSON compatible data. Definitions
+    with ids are encoded once, and referred to by id after that.
+    """
+    def __init__(self):
+        self.complete = True
+        self.encoded_ids = set()
+
+    def encode_def(self, obj_def: ObjectDef):
+        return {
+            'cls': get_class_str(obj_def.cls),
+            'mro': _mro_names(obj_def.cls),
+            'dry_mut': obj_def.dry_mut,
+            'args': self.encode(tuple(obj_def.args)),
+            'kwargs': self.encode(dict(obj_def.kwargs)),
+        }
+
+    def encode_sub_def(self, obj_def: ObjectDef):
+        dry_id = obj_def.kwargs.get('dry_id')
+        if dry_id is not None:
+            if dry_id in self.encoded_ids:
+                return {'ref': dry_id}
+            self.encoded_ids.add(dry_id)
+        return {'def': self.encode_def(obj_def)}
+
+    def encode(self, val):
+        kind = get_val_kind(val)
+        if isinstance(val, ObjectDef):
+            return self.encode_sub_def(val)
+        elif isinstance(type(val), Meta):
+            return self.encode_sub_def(val.definition())
+        elif type(val) is tuple:
+            return {'tuple': [self.encode(el) for el in val]}
+        elif type(val) is bytes:
+            return {'bytes': val.hex()}
+        elif kind == VAL_SCALAR and \
+                (val is None or type(val) in (bool, int, float, str)):
+            return val
+        elif kind == VAL_LIST:
+            return [self.encode(el) for el in val]
+        elif kind == VAL_DICT:
+            return {'dict': [
+                [self.encode(k), self.encode(v)] for k, v in val.items()]}
+        else:
+            self.complete = False
+            return {'repr': repr(val)}
+
+
+class _Decoder(object):
+    "Decode values encoded by _Encoder"
+    def __init__(self):
+        self.defs = {}
+
+    def decode(self, data):
+        if type(data) is list:
+            return [self.decode(el) for el in data]
+        if type(data) is not dict:
+            return data
+        if 'def' in data:
+            def_data = data['def']
+            obj_def = DefManifest(
+                def_data['cls'], def_data['mro'],
+                self.decode(def_data['args']),
+                self.decode(def_data['kwargs']),
+                dry_mut=def_data['dry_mut'])
+            if obj_def.dry_id is not None:
+                self.defs[obj_def.dry_id] = obj_def
+            return obj_def
+        if 'ref' in data:
+            return self.defs[data['ref']]
+        if 'tuple' in data:
+            return tuple(self.decode(el) for el in data['tuple'])
+        if 'bytes' in data:
+            return bytes.fromhex(data['bytes'])
+        if 'dict' in data:
+            return {
+                self.decode(k): self.decode(v) for k, v in data['dict']}
+        return ManifestValue(data['repr'])
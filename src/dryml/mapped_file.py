@@ -0,0 +1,376 @@
+import errno
+import io
+from io import BufferedIOBase
+import mmap
+import os
+import struct
+import sys
+import time
+import zipfile
+from typing import Optional, Mapping
+from dryml.file_intermediary import copy_chunk_size
+
+
+# Byte alignment of stored zip entries, relative to the start of
+# their archive.
+ALIGNMENT = 64
+
+# Extra field id used by zipalign for alignment padding
+_ALIGN_EXTRA_ID = 0xD935
+
+# Layout of the local header preceding each entry's data, as the zip
+# format specifies it (APPNOTE.TXT section 4.3.7)
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+_LH_SIGNATURE = 0
+_LH_FILENAME_LENGTH = 10
+_LH_EXTRA_FIELD_LENGTH = 11
+
+# Size from which zipfile writes entries with zip64 extensions
+_ZIP64_LIMIT = (1 << 31) - 1
+
+# Size of a local header
+LOCAL_HEADER_SIZE = _LOCAL_HEADER.size
+
+# Mappings keep a file descriptor open while they live, unless python
+# can map files without one
+_mmap_kwargs = {'trackfd': False} if sys.version_info >= (3, 13) else {}
+
+
+class MappedFile(BufferedIOBase):
+    """
+    A read only file over a buffer, usually a memory mapped file.
+
+    Reads copy like any other file, but getbuffer returns views of
+    the underlying buffer without copying.
+
+    A file mapped by open stays mapped while it's open or views of it
+    are in use, such as arrays loaded from it. Before python 3.13, each
+    mapping also holds a file descriptor. Closing the file unmaps it
+    right away if there are no views left, and otherwise once they're
+    gone.
+    """
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast('B')
+        self._pos = 0
+        # The mapping, when this file mapped it itself
+        self._mmap = None
+
+    def __reduce__(self):
+        # Views can't be pickled, copies of files hold their content
+        return (MappedFile, (self._view.tobytes(),))
+
+    @staticmethod
+    def open(filepath: str) -> Optional['MappedFile']:
+        "Memory map a file. Returns None when it can't be mapped."
+        with open(filepath, 'rb') as f:
+            try:
+                buffer = mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ, **_mmap_kwargs)
+            except (ValueError, OSError):
+                # Empty files and some special files can't be mapped
+                return None
+        mapped = MappedFile(buffer)
+        mapped._mmap = buffer
+        return mapped
+
+    # Implement IOBase, and Buffered IOBase members
+    def close(self):
+        view, self._view = self._view, None
+        if view is not None:
+            try:
+                view.release()
+            except BufferError:
+                # Something uses this view itself, it releases it
+                pass
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Views handed out keep the mapping alive on their own
+                pass
+
+    @property
+    def closed(self):
+        return self._view is None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"Unsupported whence: {whence}")
+        if pos < 0:
+            # As files do, which zipfile expects of archives with no
+            # entries
+            raise OSError(errno.EINVAL, f"Negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def tell(self):
+        return self._pos
+
+    def read(self, size=-1):
+        if self._view is None:
+            raise ValueError("I/O operation on closed file.")
+        end = len(self._view)
+        if size is not None and size >= 0:
+            end = min(end, self._pos + size)
+        data = self._view[self._pos:end].tobytes()
+        self._pos = max(self._pos, end)
+        return data
+
+    def read1(self, size=-1):
+        return self.read(size)
+
+    def readinto(self, b):
+        view = self.getbuffer(self._pos, len(b))
+        num = len(view)
+        memoryview(b).cast('B')[:num] = view
+        self._pos += num
+        return num
+
+    # My methods
+    def size(self):
+        return len(self._view)
+
+    def is_empty(self):
+        old_pos = self.tell()
+        self.seek(0)
+        with zipfile.ZipFile(self, mode='r') as zf:
+            empty = len(zf.namelist()) == 0
+        self.seek(old_pos)
+        return empty
+
+    def getbuffer(self, offset: int = 0, size: int = -1) -> memoryview:
+        "Get a read only view of part of the file without copying"
+        if self._view is None:
+            raise ValueError("I/O operation on closed file.")
+        if size < 0:
+            return self._view[offset:]
+        return self._view[offset:offset+size]
+
+    def write_to_file(self, file):
+        if type(file) is str:
+            with open(file, 'wb') as f:
+                self.write_to_file(f)
+            return
+        # Write in chunks, as copy_chunked does
+        view = self._view
+        for start in range(0, len(view), copy_chunk_size):
+            file.write(view[start:start+copy_chunk_size])
+
+
+class BufferArchive(object):
+    """
+    A read only archive whose entries are buffers, such as the entries
+    of an unpickled Object.
+
+    Supports the parts of the ZipFile interface used to load objects.
+    Entries open as MappedFiles over their buffers, so they're read in
+    place without a zip file.
+    """
+    def __init__(self, entries: Mapping[str, object]):
+        self.entries = {
+            name: memoryview(buffer).cast('B')
+            for name, buffer in entries.items()}
+
+    def __reduce__(self):
+        # Views can't be pickled, copies of archives hold their entries
+        return (BufferArchive, (
+            {name: view.tobytes() for name, view in self.entries.items()},))
+
+    @property
+    def mode(self):
+        return 'r'
+
+    def entry_view(self, name: str) -> memoryview:
+        "Get a view of an entry's buffer"
+        view = self.entries.get(name)
+        if view is None:
+            raise KeyError(
+                f"There is no item named {name!r} in the archive")
+        return view
+
+    def namelist(self):
+        return list(self.entries)
+
+    def infolist(self):
+        return [self.getinfo(name) for name in self.entries]
+
+    def getinfo(self, name: str) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(name)
+        info.compress_type = zipfile.ZIP_STORED
+        info.file_size = info.compress_size = len(self.entry_view(name))
+        return info
+
+    def open(self, name, mode='r', force_zip64=False):
+        if mode != 'r':
+            raise ValueError("Buffer archives are read only")
+        if isinstance(name, zipfile.ZipInfo):
+            name = name.filename
+        return MappedFile(self.entry_view(name))
+
+    def read(self, name: str) -> bytes:
+        return self.entry_view(name).tobytes()
+
+    def extract(self, member, path=None) -> str:
+        if isinstance(member, zipfile.ZipInfo):
+            member = member.filename
+        if path is None:
+            path = os.getcwd()
+        target = os.path.join(path, *member.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(self.entry_view(member))
+        return target
+
+    def close(self):
+        # Entries stay usable, objects load their compute data from them
+        # more than once
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f"BufferArchive({self.namelist()})"
+
+
+def resolve_entry(zf, name: str):
+    """
+    Get the zip file an entry is really in and its full name there, for
+    archives like ArchiveView which present part of another one.
+    """
+    resolve = getattr(zf, 'resolve', None)
+    if resolve is None:
+        return zf, name
+    return resolve(name)
+
+
+def has_entry(zf: zipfile.ZipFile, name: str) -> bool:
+    "Whether a zip file has an entry, without listing its entries"
+    zf, name = resolve_entry(zf, name)
+    try:
+        zf.getinfo(name)
+    except KeyError:
+        return False
+    return True
+
+
+def entry_data_offset(info: zipfile.ZipInfo, header) -> int:
+    """
+    Get the offset of an entry's data in its archive, from the first
+    LOCAL_HEADER_SIZE bytes of its local header.
+    """
+    fields = _LOCAL_HEADER.unpack(header)
+    if fields[_LH_SIGNATURE] != _LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(
+            f"Bad local header for entry {info.filename}")
+    return info.header_offset + LOCAL_HEADER_SIZE + \
+        fields[_LH_FILENAME_LENGTH] + fields[_LH_EXTRA_FIELD_LENGTH]
+
+
+def stored_entry_view(zf: zipfile.ZipFile, name: str) \
+        -> Optional[memoryview]:
+    """
+    Get a view of an uncompressed zip entry without copying it.
+
+    Returns None unless the zip file reads from a MappedFile.
+    """
+    if isinstance(zf, BufferArchive):
+        return zf.entry_view(name)
+    zf, name = resolve_entry(zf, name)
+    fp = zf.fp
+    if not isinstance(fp, MappedFile):
+        return None
+    info = zf.getinfo(name)
+    if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+        return None
+    data_start = entry_data_offset(
+        info, fp.getbuffer(info.header_offset, LOCAL_HEADER_SIZE))
+    return fp.getbuffer(data_start, info.file_size)
+
+
+def open_entry(zf: zipfile.ZipFile, name: str):
+    """
+    Open a zip entry for reading, as a MappedFile over the parent
+    file's buffer when possible.
+    """
+    view = stored_entry_view(zf, name)
+    if view is not None:
+        return MappedFile(view)
+    return zf.open(name, 'r')
+
+
+def aligned_zip_info(zf: zipfile.ZipFile, name: str, file_size: int = 0,
+                     align: int = ALIGNMENT) -> zipfile.ZipInfo:
+    """
+    Create a ZipInfo for an uncompressed entry whose data starts at a
+    multiple of align. It must be the next entry written to zf.
+    """
+    zf, name = resolve_entry(zf, name)
+    zinfo = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+    zinfo.compress_type = zipfile.ZIP_STORED
+    zinfo.file_size = file_size
+    # Data follows the local header, which is written at the end of
+    # the archive's entries. Between entries, zipfile leaves its file
+    # there.
+    offset = zf.fp.tell()
+    zip64 = file_size * 1.05 > _ZIP64_LIMIT
+    header_size = LOCAL_HEADER_SIZE + len(zinfo.filename.encode()) + \
+        6 + (20 if zip64 else 0)
+    pad = -(offset+header_size) % align
+    zinfo.extra = struct.pack('<HHH', _ALIGN_EXTRA_ID, 2+pad, align) + \
+        b'\0'*pad
+    return zinfo
+
+
+def entry_alignment(info: zipfile.ZipInfo) -> Optional[int]:
+    "The alignment an entry was written with by aligned_zip_info, if any"
+    extra = info.extra
+    while len(extra) >= 4:
+        field_id, size = struct.unpack('<HH', extra[:4])
+        if field_id == _ALIGN_EXTRA_ID and size >= 2:
+            return struct.unpack('<H', extra[4:6])[0]
+        extra = extra[4+size:]
+    return None
+
+
+def write_buffer(zf: zipfile.ZipFile, name: str, data,
+                 align: int = ALIGNMENT):
+    """
+    Write a contiguous buffer such as a numpy array's data to a zip file
+    uncompressed and aligned, so read_buffer can map it back.
+    """
+    view = memoryview(data)
+    if not view.c_contiguous:
+        raise ValueError("Only C contiguous buffers can be written")
+    view = view.cast('B')
+    zinfo = aligned_zip_info(zf, name, file_size=len(view), align=align)
+    with zf.open(zinfo, 'w') as f:
+        f.write(view)
+
+
+def read_buffer(zf: zipfile.ZipFile, name: str) -> memoryview:
+    """
+    Get a read only view of a zip entry's data. When the file is memory
+    mapped this doesn't copy, so numpy.frombuffer or torch.frombuffer
+    can use it directly.
+    """
+    view = stored_entry_view(zf, name)
+    if view is None:
+        view = memoryview(zf.read(name))
+    return view
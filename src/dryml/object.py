@@ -3,30 +3,86 @@
 from __future__ import annotations
 
 import os
-import dill
 import pickle
 import io
 import zipfile
 import uuid
+import functools
+import concurrent.futures
 import re
 import numpy as np
 import time
 
 from typing import Callable as CallableType
-from typing import IO, Union, Optional, Type
-from dryml.config import ObjectDef, Meta, MissingIdError, MissingMetadataError
+from typing import IO, Union, Optional, Type, NamedTuple
+from dryml.config import ObjectDef, Meta, MissingIdError, \
+    MissingMetadataError, build_many, def_to_obj
+from dryml.build_session import BuildSession
 from dryml.utils import get_current_cls, pickler, static_var, \
-    is_supported_scalar_type, is_supported_listlike, is_supported_dictlike, \
-    map_dictlike, map_listlike, get_class_from_str, get_class_str, \
-    diff_recursive, unpickler
+    get_val_kind, map_listlike_nonscalar, map_dictlike_nonscalar, \
+    VAL_SCALAR, VAL_LIST, VAL_DICT, get_class_from_str, get_class_str, \
+    diff_recursive, unpickler, get_fully_qualified_name
 from dryml.context.context_tracker import combine_requests, context, \
     NoContextError
 from dryml.file_intermediary import FileIntermediary
+from dryml.mapped_file import MappedFile, BufferArchive, open_entry, \
+    read_buffer, has_entry
+from dryml.archive import ArchiveView, object_prefix, compute_prefix, \
+    class_prefix, build_prefix_index, copy_raw_entry
+from dryml.blob_store import BlobStore
+from dryml.compression import CompressionPolicy, ENTRY_META, \
+    ENTRY_DEFINITION, ENTRY_OBJECT, ENTRY_DATA
 from dryml.save_cache import SaveCache
+from dryml.class_cache import class_payload, load_class, payload_digest
+from dryml.lazy import lazy_object, materialize, object_class
+from dryml.manifest import Manifest, manifest_name
 
 
 FileType = Union[str, IO[bytes]]
 
+# Entries of an object's definition in a version 2 file
+definition_entries = (
+    'cls_str.txt', 'cls_def.dill', 'cls_ref.txt', 'dry_args.pkl',
+    'dry_kwargs.pkl', 'dry_mut.pkl')
+
+# Entries of the class of an object's definition
+class_entries = ('cls_str.txt', 'cls_def.dill', 'cls_ref.txt')
+
+
+class FileSync(NamedTuple):
+    """
+    The file an object was last saved to or loaded from, its definition
+    there, and whether its content is unchanged since.
+    """
+    file_key: tuple
+    definition: ObjectDef
+    content_clean: bool
+
+
+def content_state(obj) -> tuple:
+    """
+    The attributes of an object's content and their values, so saves can
+    tell when they're assigned. Values are compared by identity, the
+    state keeps them alive until it's recorded again.
+    """
+    return tuple(
+        (name, value) for name, value in obj.__dict__.items()
+        if not name.startswith('__dry_') and name != '_definition')
+
+
+def same_content_state(state_1: tuple, state_2: tuple) -> bool:
+    "Whether two content states hold the same values"
+    return len(state_1) == len(state_2) and all(
+        name_1 == name_2 and value_1 is value_2
+        for (name_1, value_1), (name_2, value_2) in zip(state_1, state_2))
+
+
+def _file_key(filepath: str) -> tuple:
+    "Identify a version of a file. Saves replace files, so this changes."
+    stat = os.stat(filepath)
+    return (os.path.realpath(filepath), stat.st_dev, stat.st_ino,
+            stat.st_size, stat.st_mtime_ns)
+
 
 def file_resolve(file: str, exact_path: bool = False) -> str:
     if os.path.splitext(file)[1] == '' and not exact_path:
@@ -40,13 +96,26 @@ class ObjectFile(object):
     # Supports 'save cached' file writing.
     def __init__(self, file: FileType, exact_path: bool = False,
                  mode: str = 'r', must_exist: bool = True,
-                 save_cache=None, save_caching=True):
+                 save_cache=None, save_caching=True,
+                 compression: Optional[CompressionPolicy] = None,
+                 mmap: bool = False):
 
         if type(file) is zipfile.ZipFile:
             raise TypeError(
                 "Passing zipfiles directly is currently not supported.")
 
         self.mode = mode
+        self._meta_data = None
+        # Version of the file being read, and objects written with their
+        # definitions and whether their content is synced with the file
+        self.file_key = None
+        self._written = []
+        # Names of version 2 entries by object, built when first needed
+        self._prefix_index = None
+        # Lazy objects of a version 2 file by id, when loading lazily
+        self._lazy_objects = None
+        # Compression of the entries we write
+        self.compression = CompressionPolicy.resolve(compression)
 
         # If file is a string, resolve it to a filepath, and save this filepath
         if type(file) is str:
@@ -59,12 +128,22 @@ class ObjectFile(object):
         if self.mode == 'w':
             self._z_file = None
             if hasattr(self, 'filepath'):
-                self.binary_file = open(self.filepath, 'wb')
+                # Write next to the target and replace it on close.
+                # Objects loaded from the old file may still map it.
+                self.tmp_filepath = \
+                    f"{self.filepath}.{uuid.uuid4().hex}.tmp"
+                self.binary_file = open(self.tmp_filepath, 'wb')
             else:
                 self.binary_file = file
         elif self.mode == 'r':
             if hasattr(self, 'filepath'):
-                self.binary_file = open(self.filepath, 'rb')
+                self.file_key = _file_key(self.filepath)
+                self.binary_file = None
+                if mmap:
+                    # Map the file so compute data can be used in place
+                    self.binary_file = MappedFile.open(self.filepath)
+                if self.binary_file is None:
+                    self.binary_file = open(self.filepath, 'rb')
                 self._z_file = zipfile.ZipFile(self.binary_file, mode=mode)
             else:
                 if type(file) is zipfile.ZipFile:
@@ -86,10 +165,20 @@ class ObjectFile(object):
             if self._z_file is not None:
                 return self._z_file
 
-            self.int_file = FileIntermediary()
+            if hasattr(self, 'filepath'):
+                # We opened a seekable file ourselves, so write the
+                # archive straight into it.
+                self._z_file = zipfile.ZipFile(
+                    self.binary_file, mode=self.mode,
+                    **self.compression.zip_kwargs(ENTRY_DATA))
+                return self._z_file
+
+            self.int_file = FileIntermediary.spooled()
             self.close_int_file = True
 
-            self._z_file = zipfile.ZipFile(self.int_file, mode=self.mode)
+            self._z_file = zipfile.ZipFile(
+                self.int_file, mode=self.mode,
+                **self.compression.zip_kwargs(ENTRY_DATA))
             return self._z_file
         elif self.mode == 'r':
             return self._z_file
@@ -98,7 +187,13 @@ class ObjectFile(object):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
+        # A file left partly written doesn't replace the old one
+        self.close(discard=exc_type is not None)
+
+    @property
+    def mapped(self) -> bool:
+        "Whether the file being read is memory mapped"
+        return isinstance(getattr(self, 'binary_file', None), MappedFile)
 
     def int_file_detach(self):
         if not hasattr(self, 'int_file'):
@@ -107,7 +202,18 @@ class ObjectFile(object):
         self.close_int_file = False
         return self.int_file
 
-    def close(self):
+    def close(self, discard: bool = False):
+        """
+        Close the file. Files written to a path replace the file there.
+
+        discard: Remove a file being written to a path instead, leaving
+            the file there as it was.
+        """
+        if self._lazy_objects is not None:
+            # Lazy objects still load from the mapped archive, it's
+            # unmapped once they're gone.
+            return
+
         # Close the zipfile.
         if self._z_file is not None:
             # Avoid accessing z_file property if it doesn't already exist.
@@ -117,7 +223,7 @@ class ObjectFile(object):
 
         # If we have a binary open, sync any intermediary and close it.
         if hasattr(self, 'binary_file'):
-            if self.mode == 'w':
+            if self.mode == 'w' and not discard:
                 if hasattr(self, 'int_file'):
                     # If there's an intermediary file open, write it to the
                     # binary file.
@@ -125,6 +231,14 @@ class ObjectFile(object):
             if hasattr(self, 'filepath'):
                 # We opened the binary file. we should close it.
                 self.binary_file.close()
+                if self.mode == 'w' and discard:
+                    os.remove(self.tmp_filepath)
+                elif self.mode == 'w':
+                    os.replace(self.tmp_filepath, self.filepath)
+                    file_key = _file_key(self.filepath)
+                    for obj, obj_def, content_clean in self._written:
+                        obj.__dry_sync__ = FileSync(
+                            file_key, obj_def, content_clean)
 
         # Close the intermediary if needed.
         if hasattr(self, 'int_file'):
@@ -134,17 +248,20 @@ class ObjectFile(object):
     # def update_file(self, obj: Object):
     #     self.cache_object_data_obj(obj)
 
-    def save_meta_data(self):
+    def save_meta_data(self, version: int = 1, **extra):
         # Meta_data
         meta_data = {
-            'version': 1
+            'version': version,
+            **extra
         }
 
         meta_dump = pickler(meta_data)
-        with self.z_file.open('meta_data.pkl', mode='w') as f:
-            f.write(meta_dump)
+        self.compression.write(
+            self.z_file, 'meta_data.pkl', meta_dump, ENTRY_META)
 
     def load_meta_data(self):
+        if self._meta_data is not None:
+            return self._meta_data
         try:
             with self.z_file.open('meta_data.pkl', 'r') as meta_file:
                 meta_data = unpickler(meta_file.read())
@@ -153,9 +270,37 @@ class ObjectFile(object):
                   f"following files: {self.z_file.namelist()}")
             print(f"Zipfile: {self.z_file}")
             raise e
+        if self.mode == 'r':
+            self._meta_data = meta_data
         return meta_data
 
-    def save_class_def_v1(self, obj_def: ObjectDef, update: bool = False):
+    @property
+    def version(self) -> int:
+        return self.load_meta_data()['version']
+
+    def save_manifest(self, obj_def: ObjectDef):
+        self.compression.write(
+            self.z_file, manifest_name,
+            Manifest.from_def(obj_def).to_json().encode('utf-8'),
+            ENTRY_META)
+
+    def manifest(self) -> Optional[Manifest]:
+        """
+        Read the manifest of the object in this file, without unpickling
+        its definition or importing its class. Returns None for files
+        without one.
+        """
+        try:
+            info = self.z_file.getinfo(manifest_name)
+        except KeyError:
+            return None
+        return Manifest.from_json(
+            self.z_file.read(info).decode('utf-8'))
+
+    def save_class_def_v1(self, obj_def: ObjectDef, update: bool = False,
+                          archive=None):
+        if archive is None:
+            archive = self.z_file
         # We need to pickle the class definition.
         # By default, error out if class has changed. Check this.
         mod_cls = get_current_cls(obj_def.cls)
@@ -166,26 +311,36 @@ class ObjectFile(object):
         # Also handles pickling when the class's _abc_impl is wrongly constructed
         # https://github.com/uqfoundation/dill/issues/332
         cls_str = get_class_str(mod_cls)
-        with self.z_file.open('cls_str.txt', mode='w') as f:
-            f.write(cls_str.encode('utf-8'))
-        try:
-            cls_def = dill.dumps(mod_cls)
-            with self.z_file.open('cls_def.dill', mode='w') as f:
-                f.write(cls_def)
-        except TypeError as e:
-            if '_abc_data' in str(e):
-                # We will fallback to using the class name on load
-                pass
-            else:
-                raise e
+        self.compression.write(
+            archive, 'cls_str.txt', cls_str.encode('utf-8'), ENTRY_META)
+        payload = class_payload(mod_cls)
+        if payload is None:
+            # We will fallback to using the class name on load
+            return
+        if isinstance(archive, ArchiveView):
+            # Objects of flattened archives share one copy of each class
+            cls_archive = archive.sibling(class_prefix(payload.digest))
+            if not has_entry(cls_archive, 'cls_def.dill'):
+                self.compression.write(
+                    cls_archive, 'cls_def.dill', payload.data,
+                    ENTRY_DEFINITION)
+            self.compression.write(
+                archive, 'cls_ref.txt', payload.digest.encode('utf-8'),
+                ENTRY_META)
+        else:
+            self.compression.write(
+                archive, 'cls_def.dill', payload.data, ENTRY_DEFINITION)
 
-    def load_class_def_v1(self, update: bool = True, reload: bool = False):
+    def load_class_def_v1(self, update: bool = True, reload: bool = False,
+                          archive=None):
         "Helper function for loading a version 1 class definition"
+        if archive is None:
+            archive = self.z_file
         # Get the string based class name first. This is now guaranteed to be there.
-        with self.z_file.open('cls_str.txt') as cls_str_file:
+        with archive.open('cls_str.txt') as cls_str_file:
             cls_str = cls_str_file.read().decode('utf-8')
 
-        namelist = self.z_file.namelist()
+        namelist = archive.namelist()
 
         # We first need to handle the case we have a class defined in `__main__`.
         if '__main__' in cls_str:
@@ -195,56 +350,69 @@ class ObjectFile(object):
 
         # we can now fall back to dill for class definitions in __main__.
 
-        # Get class definition
-        if 'cls_def.dill' in namelist:
-            with self.z_file.open('cls_def.dill') as cls_def_file:
-                if update:
-                    # Get original model definition
-                    cls_def_init = dill.loads(cls_def_file.read())
-                    try:
-                        cls_def = get_current_cls(cls_def_init, reload=reload)
-                    except Exception as e:
-                        raise RuntimeError(
-                            f"Failed to update module class {e}")
-                else:
-                    cls_def = dill.loads(cls_def_file.read())
-            return cls_def
+        # Get class definition, loading each pickled class once
+        if 'cls_ref.txt' in namelist:
+            with archive.open('cls_ref.txt') as cls_ref_file:
+                digest = cls_ref_file.read().decode('utf-8')
+            cls_archive = archive.sibling(class_prefix(digest))
+
+            def read_cls_def():
+                with cls_archive.open('cls_def.dill') as cls_def_file:
+                    return cls_def_file.read()
+            return load_class(
+                digest, read_cls_def, update=update, reload=reload)
+        elif 'cls_def.dill' in namelist:
+            with archive.open('cls_def.dill') as cls_def_file:
+                cls_def = cls_def_file.read()
+            return load_class(
+                payload_digest(cls_def), lambda: cls_def,
+                update=update, reload=reload)
         else:
             return get_class_from_str(cls_str, reload=reload)
 
-    def save_definition_v1(self, obj_def: ObjectDef, update: bool = False):
+    def save_definition_v1(self, obj_def: ObjectDef, update: bool = False,
+                           archive=None):
         "Save object def"
+        if archive is None:
+            archive = self.z_file
         # Save obj def
-        self.save_class_def_v1(obj_def, update=update)
+        self.save_class_def_v1(obj_def, update=update, archive=archive)
 
         # Save args from object def
-        with self.z_file.open('dry_args.pkl', mode='w') as args_file:
-            args_file.write(pickler(obj_def.args))
+        self.compression.write(
+            archive, 'dry_args.pkl', pickler(obj_def.args),
+            ENTRY_DEFINITION)
 
         # Save kwargs from object def
-        with self.z_file.open('dry_kwargs.pkl', mode='w') as kwargs_file:
-            kwargs_file.write(pickler(obj_def.kwargs))
+        self.compression.write(
+            archive, 'dry_kwargs.pkl', pickler(obj_def.kwargs),
+            ENTRY_DEFINITION)
 
         # Save mutability from object def
-        with self.z_file.open('dry_mut.pkl', mode='w') as mut_file:
-            mut_file.write(pickler(obj_def.dry_mut))
+        self.compression.write(
+            archive, 'dry_mut.pkl', pickler(obj_def.dry_mut),
+            ENTRY_DEFINITION)
 
-    def load_definition_v1(self, update: bool = True, reload: bool = False):
+    def load_definition_v1(self, update: bool = True, reload: bool = False,
+                           archive=None):
         "Load object def"
+        if archive is None:
+            archive = self.z_file
 
         # Load obj def
-        cls = self.load_class_def_v1(update=update, reload=reload)
+        cls = self.load_class_def_v1(
+            update=update, reload=reload, archive=archive)
 
         # Load args
-        with self.z_file.open('dry_args.pkl', mode='r') as args_file:
+        with archive.open('dry_args.pkl', mode='r') as args_file:
             args = unpickler(args_file.read())
 
         # Load kwargs
-        with self.z_file.open('dry_kwargs.pkl', mode='r') as kwargs_file:
+        with archive.open('dry_kwargs.pkl', mode='r') as kwargs_file:
             kwargs = unpickler(kwargs_file.read())
 
         # Load mutability
-        with self.z_file.open('dry_mut.pkl', mode='r') as mut_file:
+        with archive.open('dry_mut.pkl', mode='r') as mut_file:
             mut = unpickler(mut_file.read())
 
         return ObjectDef(cls, *args, dry_mut=mut, **kwargs)
@@ -253,6 +421,10 @@ class ObjectFile(object):
         meta_data = self.load_meta_data()
         if meta_data['version'] == 1:
             return self.load_definition_v1(update=update, reload=reload)
+        elif meta_data['version'] == 2:
+            return self.load_definition_v1(
+                update=update, reload=reload,
+                archive=self.object_archive(meta_data['root']))
         else:
             raise RuntimeError(
                 f"File version {meta_data['version']} not supported!")
@@ -275,6 +447,83 @@ class ObjectFile(object):
         # Build object instance
         return obj
 
+    def load_object_v2(self, update: bool = True,
+                       reload: bool = False,
+                       as_cls: Optional[Type] = None,
+                       lazy: bool = False) -> Object:
+        root_id = self.load_meta_data()['root']
+        root_archive = self.object_archive(root_id)
+        obj_def = self.load_definition_v1(
+            update=update, reload=reload, archive=root_archive)
+        if as_cls is not None:
+            obj_def.cls = as_cls
+
+        # Lazy objects load from the archive after this file is closed,
+        # which only mapped files allow.
+        if lazy and self.mapped:
+            self._lazy_objects = {}
+            return self._lazy_object(root_id, obj_def)
+
+        # Subordinate objects are loaded through load_contained_object
+        obj = obj_def.build(load_zip=self)
+
+        if not self._load_content(obj, root_archive):
+            raise RuntimeError("Error loading object!")
+
+        return obj
+
+    def _lazy_object(self, dry_id, obj_def: ObjectDef) -> Object:
+        "Get the lazy object standing in for an object of this file"
+        obj = self._lazy_objects.get(dry_id)
+        if obj is None:
+            obj = lazy_object(
+                obj_def, functools.partial(self._materialize, obj_def))
+            self._lazy_objects[dry_id] = obj
+        return obj
+
+    def _materialize(self, obj_def: ObjectDef, obj: Object):
+        "Build and load an object of this file into its lazy object"
+        with BuildSession():
+            args = def_to_obj(obj_def.args, load_zip=self)
+            kwargs = def_to_obj(obj_def.kwargs, load_zip=self)
+        obj_def.cls.__init__(obj, *args, **kwargs)
+        if not self._load_content(obj, self.object_archive(obj_def.dry_id)):
+            raise RuntimeError(f"Error loading object {obj_def.dry_id}!")
+
+    def _load_content(self, obj: Object, archive: ArchiveView) -> bool:
+        "Load an object's content from a version 2 file"
+        if not obj.load_object(archive):
+            return False
+        obj._record_content_state()
+        if self.file_key is not None:
+            obj.__dry_sync__ = FileSync(
+                self.file_key, obj.definition(), True)
+        return True
+
+    def load_contained_object(self, dry_id) -> Optional[Object]:
+        """
+        Load a subordinate object stored in a version 2 file. Returns None
+        if the file doesn't hold it.
+        """
+        if dry_id == self.load_meta_data()['root'] or \
+                dry_id not in self.contained_object_ids():
+            return None
+        lazy = self._lazy_objects is not None
+        if lazy and dry_id in self._lazy_objects:
+            return self._lazy_objects[dry_id]
+        blob_path = self.blob_path(dry_id)
+        if blob_path is not None:
+            return load_object(
+                blob_path, exact_path=True, lazy=lazy, mmap=self.mapped)
+        archive = self.object_archive(dry_id)
+        obj_def = self.load_definition_v1(update=False, archive=archive)
+        if lazy:
+            return self._lazy_object(dry_id, obj_def)
+        obj = obj_def.build(load_zip=self)
+        if not self._load_content(obj, archive):
+            raise RuntimeError(f"Error loading object {dry_id}!")
+        return obj
+
     def load_object_content(self, obj: Object) -> bool:
         file_def = self.definition()
         obj_def = obj.definition()
@@ -283,18 +532,71 @@ class ObjectFile(object):
                 f"File {self.z_file} doesn't store data for object "
                 f"{obj.dry_id} at the top level.")
 
+        if self.version == 2:
+            return self._load_content(obj, self.object_archive(obj.dry_id))
         if not obj.load_object(self.z_file):
             return False
         return True
 
+    def load_object_content_v2(self, obj: Object) -> bool:
+        "Load the content of an object and its subordinates in place"
+        file_def = self.definition()
+        obj_def = obj.definition()
+        if file_def != obj_def:
+            diff_recursive(file_def, obj_def)
+            raise ValueError(
+                f"File {self.z_file} doesn't store data for object "
+                f"{obj.dry_id} at the top level.\n"
+                f"file_def: {file_def}\n"
+                f"obj_def: {obj_def}")
+
+        file_contained_obj_ids = set(self.contained_object_ids())
+        loaded = set()
+        stack = [obj]
+        while len(stack) > 0:
+            cur_obj = stack.pop()
+            if cur_obj.dry_id in loaded:
+                continue
+            loaded.add(cur_obj.dry_id)
+            if cur_obj is not obj and \
+                    cur_obj.dry_id not in file_contained_obj_ids:
+                raise ValueError(
+                    f"File {self.z_file} doesn't contain subordinate object "
+                    f"data for subordinate object {cur_obj.dry_id}! file "
+                    f"contains: {sorted(file_contained_obj_ids)}")
+            blob_path = self.blob_path(cur_obj.dry_id)
+            if blob_path is not None:
+                # The blob holds its subordinate objects too
+                if not load_object_content(
+                        cur_obj, blob_path, mmap=self.mapped):
+                    return False
+                continue
+            stack.extend(cur_obj.__dry_obj_container_list__)
+            if not self._load_content(
+                    cur_obj, self.object_archive(cur_obj.dry_id)):
+                print(f"Error loading object: {cur_obj.dry_id}")
+                return False
+        return True
+
     def load_object(self, update: bool = False,
                     reload: bool = False,
-                    as_cls: Optional[Type] = None) -> Object:
+                    as_cls: Optional[Type] = None,
+                    lazy: bool = False) -> Object:
+        """
+        Load the object stored in this file.
+
+        lazy: Return a stand in for the object and each of its
+            subordinate objects, which loads when first used. Only mapped
+            version 2 files load lazily, others load as usual.
+        """
         meta_data = self.load_meta_data()
         version = meta_data['version']
         if version == 1:
             return self.load_object_v1(
                 update=update, reload=reload, as_cls=as_cls)
+        elif version == 2:
+            return self.load_object_v2(
+                update=update, reload=reload, as_cls=as_cls, lazy=lazy)
         else:
             raise RuntimeError(f"DRY version {version} unknown")
 
@@ -304,13 +606,10 @@ class ObjectFile(object):
 
         # First, check the save cache.
         if save_cache is not None:
-            # WARNING, the id of an object is only unique for its lifetime.
-            # We must assume objects aren't going out of scope
-            # or being deleted for this to work.
-            if id(obj) in save_cache.obj_cache:
+            saved_int_file = save_cache.get_object_file(obj)
+            if saved_int_file is not None:
                 # We found the object, write the cached file to
                 # The passed binary.
-                saved_int_file = save_cache.obj_cache[id(obj)]
                 saved_int_file.write_to_file(self.binary_file)
                 return True
 
@@ -320,8 +619,12 @@ class ObjectFile(object):
             obj_id = sub_obj.dry_id
             save_path = f'dry_objects/{obj_id}.dry'
             if save_path not in self.z_file.namelist():
-                with self.z_file.open(save_path, 'w') as f:
-                    if not sub_obj.save_self(f, save_cache=save_cache):
+                zinfo = self.compression.zip_info(
+                    self.z_file, save_path, ENTRY_OBJECT)
+                with self.z_file.open(zinfo, 'w') as f:
+                    if not sub_obj.save_self(
+                            f, version=1, save_cache=save_cache,
+                            compression=self.compression):
                         return False
 
         # Save meta data
@@ -335,17 +638,328 @@ class ObjectFile(object):
         self.save_definition_v1(obj_def, update=update)
 
         # Save object content
-        ret_val = obj.save_object(self.z_file, save_cache=save_cache)
+        ret_val = obj.save_object(
+            self.z_file, save_cache=save_cache, compression=self.compression)
 
-        if save_cache is not None:
-            save_cache.obj_cache[id(obj)] = self.int_file_detach()
+        if save_cache is not None and hasattr(self, 'int_file'):
+            # Files written straight to disk aren't cached
+            save_cache.put_object_file(obj, self.int_file_detach())
 
         return ret_val
 
+    def save_object_v2(self, obj: Object, update: bool = False,
+                       as_cls: Optional[Type] = None,
+                       save_cache=None,
+                       blob_store: Optional[BlobStore] = None,
+                       blob_dir: Optional[str] = None,
+                       incremental: bool = False,
+                       max_workers: Optional[int] = None) -> bool:
+        """
+        Save an object and all its subordinate objects into one flat
+        archive, each object's entries under its own prefix.
+
+        With a blob store, subordinate objects are saved to the store
+        instead and referred to by digest. blob_dir is the path of the
+        store relative to this file's directory, worked out from the
+        file's path if not given.
+
+        A save cache with max_bytes set keeps the entries of each object
+        it saves, and later saves with it copy them while the object is
+        unchanged.
+
+        An incremental save over a version 2 file copies the entries of
+        objects unchanged since they were saved to or loaded from it,
+        without encoding them again. Objects whose attributes were assigned
+        since are saved again; content changed in place outside of
+        compute mode must be marked with Object.mark_dirty.
+
+        max_workers > 1 serializes objects on a thread pool, each into a
+        buffer of its own. The buffers are copied into the archive in
+        the order a sequential save writes, so the archive holds the
+        same entries.
+        """
+        prev_file = None
+        if incremental:
+            prev_file = self.previous_file()
+        executor = None
+        futures = []
+        if max_workers is not None and max_workers > 1:
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix='dryml_save')
+        try:
+            blobs = {}
+            if blob_store is not None:
+                if blob_dir is None:
+                    if not hasattr(self, 'filepath'):
+                        raise ValueError(
+                            "Saving with a blob store needs a file path or "
+                            "blob_dir")
+                    blob_dir = os.path.relpath(
+                        blob_store.directory,
+                        os.path.dirname(os.path.abspath(self.filepath)))
+                for sub_obj in obj.__dry_obj_container_list__:
+                    if executor is None:
+                        blobs[sub_obj.dry_id] = self.save_blob(
+                            sub_obj, blob_store, save_cache=save_cache)
+                    else:
+                        blobs[sub_obj.dry_id] = executor.submit(
+                            self.save_blob, sub_obj, blob_store,
+                            save_cache=save_cache)
+                        futures.append(blobs[sub_obj.dry_id])
+                if executor is not None:
+                    blobs = {
+                        dry_id: future.result()
+                        for dry_id, future in blobs.items()}
+
+            # Each object in the graph is saved once, however many
+            # objects refer to it.
+            saved = set(blobs)
+            plan = []
+            stack = [obj]
+            while len(stack) > 0:
+                cur_obj = stack.pop()
+                if cur_obj.dry_id in saved:
+                    continue
+                saved.add(cur_obj.dry_id)
+                stack.extend(reversed(cur_obj.__dry_obj_container_list__))
+
+                obj_def = cur_obj.definition()
+                if cur_obj is obj:
+                    if as_cls is not None:
+                        obj_def.cls = as_cls
+                    root_def = obj_def
+
+                # Find what's unchanged since the previous save
+                cur_obj._detect_changes()
+                sync = cur_obj.__dry_sync__
+                if prev_file is None or sync is None or \
+                        sync.file_key != prev_file.file_key:
+                    sync = None
+                prev_archive = None
+                if sync is not None:
+                    prev_archive = prev_file.object_archive(cur_obj.dry_id)
+                    if 'cls_str.txt' not in prev_archive.namelist():
+                        sync = None
+                plan.append((cur_obj, obj_def, sync, prev_archive))
+
+            # Objects the save cache serialized, unchanged since, are
+            # copied from it. Objects in compute mode can change at any
+            # time, so aren't kept.
+            cache_keys = {}
+            if save_cache is not None and save_cache.max_bytes > 0:
+                for cur_obj, obj_def, _, _ in plan:
+                    if not cur_obj.__dry_compute_mode__:
+                        cache_keys[cur_obj.dry_id] = \
+                            (obj_def, self.compression, update)
+
+            # Serialize objects with content to write in parallel.
+            # Unchanged objects are only copied.
+            buffers = {}
+            if executor is not None:
+                for cur_obj, obj_def, sync, prev_archive in plan:
+                    cache_key = cache_keys.get(cur_obj.dry_id)
+                    if cache_key is not None:
+                        if save_cache.has_serialized(cur_obj, cache_key):
+                            continue
+                    elif sync is not None and sync.content_clean and \
+                            not cur_obj.__dry_compute_mode__:
+                        continue
+                    buffers[cur_obj.dry_id] = executor.submit(
+                        self._save_graph_object_buffer, cur_obj,
+                        obj_def, sync, prev_archive, update, save_cache)
+                    futures.append(buffers[cur_obj.dry_id])
+
+            for cur_obj, obj_def, sync, prev_archive in plan:
+                cache_key = cache_keys.get(cur_obj.dry_id)
+                if cache_key is not None and \
+                        self._copy_serialized(cur_obj, cache_key, save_cache):
+                    pass
+                elif cur_obj.dry_id in buffers or cache_key is not None:
+                    if cur_obj.dry_id in buffers:
+                        buffer = buffers[cur_obj.dry_id].result()
+                    else:
+                        buffer = self._save_graph_object_buffer(
+                            cur_obj, obj_def, sync, prev_archive,
+                            update=update, save_cache=save_cache)
+                    if buffer is None:
+                        return False
+                    self._copy_buffer(buffer)
+                    if cache_key is None or not save_cache.put_serialized(
+                            cur_obj, cache_key, buffer):
+                        buffer.close()
+                elif not self._save_graph_object(
+                        ArchiveView(
+                            self.z_file, object_prefix(cur_obj.dry_id)),
+                        cur_obj, obj_def, sync, prev_archive,
+                        update=update, save_cache=save_cache):
+                    return False
+
+                # Content of objects in compute mode can change at any time
+                self._written.append(
+                    (cur_obj, obj_def, not cur_obj.__dry_compute_mode__))
+        finally:
+            if executor is not None:
+                # Pending saves aren't needed after an error.
+                # Executor.shutdown only cancels them from python 3.9.
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=True)
+            if prev_file is not None:
+                prev_file.close()
+
+        self.save_manifest(root_def)
+
+        if blob_store is None:
+            self.save_meta_data(version=2, root=obj.dry_id)
+        else:
+            self.save_meta_data(
+                version=2, root=obj.dry_id, blobs=blobs, blob_dir=blob_dir)
+
+        return True
+
+    def _save_graph_object(self, archive: ArchiveView, obj: Object,
+                           obj_def: ObjectDef, sync: Optional[FileSync],
+                           prev_archive: Optional[ArchiveView],
+                           update: bool = False, save_cache=None) -> bool:
+        """
+        Write the entries of one object of a graph, copying those
+        unchanged since the previous save given by sync and prev_archive.
+        """
+        if sync is not None and sync.definition == obj_def:
+            # Classes are shared, so they're written again
+            self.save_class_def_v1(obj_def, update=update, archive=archive)
+            for name in definition_entries:
+                if name not in class_entries and \
+                        name in prev_archive.namelist():
+                    copy_raw_entry(prev_archive, name, archive)
+        else:
+            self.save_definition_v1(obj_def, update=update, archive=archive)
+
+        if sync is not None and sync.content_clean and \
+                not obj.__dry_compute_mode__:
+            for name in prev_archive.namelist():
+                if name not in definition_entries:
+                    copy_raw_entry(prev_archive, name, archive)
+            prev_compute = prev_archive.sibling(compute_prefix(obj.dry_id))
+            compute = archive.sibling(compute_prefix(obj.dry_id))
+            for name in prev_compute.namelist():
+                copy_raw_entry(prev_compute, name, compute)
+            return True
+
+        return obj.save_object(
+            archive, save_cache=save_cache, compression=self.compression)
+
+    def _save_graph_object_buffer(self, obj: Object, obj_def: ObjectDef,
+                                  sync: Optional[FileSync],
+                                  prev_archive: Optional[ArchiveView],
+                                  update: bool = False, save_cache=None):
+        """
+        Write the entries of one object of a graph to an archive of its
+        own. Returns None if the object couldn't be saved.
+        """
+        buffer = FileIntermediary.spooled()
+        with zipfile.ZipFile(
+                buffer, mode='w',
+                **self.compression.zip_kwargs(ENTRY_DATA)) as zf:
+            saved = self._save_graph_object(
+                ArchiveView(zf, object_prefix(obj.dry_id)), obj, obj_def,
+                sync, prev_archive, update=update, save_cache=save_cache)
+        if not saved:
+            buffer.close()
+            return None
+        return buffer
+
+    def _copy_buffer(self, buffer):
+        "Copy the entries of an archive in a buffer into this file"
+        buffer.seek(0)
+        with zipfile.ZipFile(buffer, mode='r') as zf:
+            for info in zf.infolist():
+                # Classes are shared by objects
+                if info.filename.startswith('classes/') and \
+                        has_entry(self.z_file, info.filename):
+                    continue
+                copy_raw_entry(zf, info.filename, self.z_file)
+
+    def _copy_serialized(self, obj: Object, key, save_cache) -> bool:
+        "Copy the entries of an object held by a save cache, if it can"
+        with save_cache.lock:
+            buffer = save_cache.get_serialized(obj, key)
+            if buffer is None:
+                return False
+            self._copy_buffer(buffer)
+        return True
+
+    def previous_file(self) -> Optional['ObjectFile']:
+        "Open the version 2 file this one will replace, if there is one"
+        if self.mode != 'w' or not hasattr(self, 'filepath') or \
+                not os.path.exists(self.filepath):
+            return None
+        try:
+            prev_file = ObjectFile(self.filepath, exact_path=True)
+        except Exception:
+            # Whatever is there will be replaced
+            return None
+        if prev_file.version != 2:
+            prev_file.close()
+            return None
+        return prev_file
+
+    def save_blob(self, obj: Object, blob_store: BlobStore,
+                  save_cache=None) -> str:
+        "Save an object to a blob store, and return its digest"
+        if save_cache is not None:
+            digest = save_cache.get_blob(blob_store.directory, obj)
+            if digest is not None:
+                return digest
+
+        blob_file = FileIntermediary.spooled()
+        with ObjectFile(blob_file, mode='w',
+                        compression=self.compression) as dry_file:
+            if not dry_file.save_object_v2(
+                    obj, save_cache=save_cache, blob_store=blob_store,
+                    blob_dir=BlobStore.blob_dir):
+                raise RuntimeError(f"Error saving object {obj.dry_id}!")
+        digest = blob_store.put(blob_file)
+        blob_file.close()
+
+        if save_cache is not None:
+            save_cache.put_blob(blob_store.directory, obj, digest)
+        return digest
+
+    def blob_path(self, dry_id) -> Optional[str]:
+        "Path of the blob holding a subordinate object, if there is one"
+        meta_data = self.load_meta_data()
+        digest = meta_data.get('blobs', {}).get(dry_id)
+        if digest is None:
+            return None
+        if not hasattr(self, 'filepath'):
+            raise RuntimeError(
+                f"Subordinate object {dry_id} is stored in a blob store, "
+                "which can only be found for files opened from a path.")
+        blob_store = BlobStore(os.path.join(
+            os.path.dirname(self.filepath), meta_data['blob_dir']))
+        return blob_store.path(digest)
+
+    def object_archive(self, dry_id) -> ArchiveView:
+        "The entries of an object in a version 2 file"
+        if self.mode == 'r' and self._prefix_index is None:
+            self._prefix_index = build_prefix_index(self.z_file)
+        return ArchiveView(
+            self.z_file, object_prefix(dry_id), index=self._prefix_index)
+
     def contained_object_ids(self):
         """
         enumerates the ids of contained subordinate objects
         """
+        if self.version == 2:
+            meta_data = self.load_meta_data()
+            root_prefix = object_prefix(meta_data['root'])
+            if self._prefix_index is None:
+                self._prefix_index = build_prefix_index(self.z_file)
+            return [
+                prefix.split('/')[1] for prefix in self._prefix_index
+                if prefix.startswith('objects/') and prefix != root_prefix] \
+                + list(meta_data.get('blobs', {}))
 
         return list(map(
             lambda m: m.groups(1)[0],
@@ -354,39 +968,66 @@ class ObjectFile(object):
                        self.z_file.namelist()))))
 
     def get_contained_object_file(self, dry_id):
-        return self.z_file.open(f"dry_objects/{dry_id}.dry")
+        if self.version != 1:
+            raise RuntimeError(
+                "Only version 1 files nest subordinate object files.")
+        return open_entry(self.z_file, f"dry_objects/{dry_id}.dry")
 
 
-@static_var('load_repo', None)
 def load_object(file: FileType, update: bool = False,
                 exact_path: bool = False,
                 reload: bool = False,
                 as_cls: Optional[Type] = None,
-                repo=None) -> Object:
+                repo=None,
+                lazy: bool = False,
+                mmap: bool = False) -> Object:
     """
     A method for loading an object from disk.
+
+    lazy: Defer loading the object and its subordinate objects until
+        they're first used. Their definitions are available right away.
+        Lazy objects read their file when they're first used, so it's
+        memory mapped as with mmap.
+    mmap: Memory map the file, so stored compute data is used in place
+        rather than copied. The objects refer to the file until they're
+        gone, it mustn't be written over in place in the meantime.
+        Saves replace files, so saving to the same path is safe.
     """
-    reset_repo = False
+    # Use the active build session's repo, or start a session
+    # for the given repo.
+    session = BuildSession.current()
+    token = None
+    if repo is not None and (session is None or session.repo is not repo):
+        session = BuildSession(repo=repo)
+        token = session.activate()
+
+    try:
+        return _load_object(
+            file, session, update=update, exact_path=exact_path,
+            reload=reload, as_cls=as_cls, lazy=lazy, mmap=mmap)
+    finally:
+        if token is not None:
+            session.deactivate(token)
+
+
+def _load_object(file: FileType, session, update: bool = False,
+                 exact_path: bool = False,
+                 reload: bool = False,
+                 as_cls: Optional[Type] = None,
+                 lazy: bool = False,
+                 mmap: bool = False) -> Object:
     load_obj = True
-
-    # Handle repo management variables
-    if repo is not None:
-        if load_object.load_repo is not None:
-            raise RuntimeError(
-                "different repos not currently supported")
-        else:
-            # Set the call_repo
-            load_object.load_repo = repo
-            reset_repo = True
+    load_repo = session.repo if session is not None else None
 
     # We now need the object definition
-    with ObjectFile(file, exact_path=exact_path) as dry_file:
+    with ObjectFile(file, exact_path=exact_path,
+                    mmap=mmap or lazy) as dry_file:
         obj_def = dry_file.definition()
         # Check whether a repo was given in a prior call
-        if load_object.load_repo is not None:
+        if load_repo is not None:
             try:
                 # Load the object from the repo
-                obj = load_object.load_repo.get_obj(obj_def)
+                obj = load_repo.get_obj(obj_def)
                 if obj.definition() != obj_def:
                     raise RuntimeError("Found issue!")
                 load_obj = False
@@ -396,7 +1037,8 @@ def load_object(file: FileType, update: bool = False,
         if load_obj:
             obj = dry_file.load_object(update=update,
                                        reload=reload,
-                                       as_cls=as_cls)
+                                       as_cls=as_cls,
+                                       lazy=lazy)
             if as_cls is not None or reload:
                 if as_cls is not None:
                     cls = as_cls
@@ -414,23 +1056,73 @@ def load_object(file: FileType, update: bool = False,
                     f"Loaded object doesn't have expected definition!\n"
                     f"expected: {new_def}\ngot: {obj.definition()}")
 
-    # Reset the repo for this function
-    if reset_repo:
-        load_object.load_repo = None
-
     return obj
 
 
+def load_many(paths_or_defs, repo=None,
+              max_workers: Optional[int] = None,
+              update: bool = False,
+              exact_path: bool = False,
+              mmap: bool = False) -> dict:
+    """
+    Load many objects at once, from files or definitions, and return
+    them by dry_id. mmap memory maps the files, as for load_object.
+
+    Subordinate objects shared between them are loaded once, and shared
+    by all objects using them. Definitions are built from the repo if
+    given, like ObjectDef.build. With max_workers > 1 files are read and
+    objects built on that many threads.
+    """
+    session = BuildSession(repo=repo, max_workers=max_workers)
+
+    def load_one(item):
+        token = session.activate()
+        try:
+            if isinstance(item, ObjectDef):
+                return item.build(session=session)
+            # Files holding objects loaded already don't need reading
+            with ObjectFile(item, exact_path=exact_path) as dry_file:
+                manifest = dry_file.manifest()
+            if manifest is not None:
+                obj = session.build_cache.get(manifest.dry_id)
+                if obj is not None:
+                    return obj
+            return _load_object(
+                item, session, update=update, exact_path=exact_path,
+                mmap=mmap)
+        finally:
+            session.deactivate(token)
+
+    try:
+        if session.parallel:
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix='dryml_load') as executor:
+                objs = list(executor.map(load_one, paths_or_defs))
+        else:
+            objs = [load_one(item) for item in paths_or_defs]
+    finally:
+        session.close()
+
+    return {obj.dry_id: obj for obj in objs}
+
+
 @static_var('load_repo', None)
 def load_object_content(
         obj: Object,
-        file: FileType) -> bool:
+        file: FileType,
+        mmap: bool = False) -> bool:
     """
     A method for loading an object from disk.
+
+    mmap: Memory map the file, as for load_object.
     """
 
     # We now need the object definition
-    with ObjectFile(file) as dry_file:
+    with ObjectFile(file, mmap=mmap) as dry_file:
+        if dry_file.version == 2:
+            return dry_file.load_object_content_v2(obj)
+
         file_def = dry_file.definition()
         obj_def = obj.definition()
         if file_def != obj_def:
@@ -465,20 +1157,59 @@ def load_object_content(
     return True
 
 
-def save_object(obj: Object, file: FileType, version: int = 1,
+def save_object(obj: Object, file: FileType,
+                version: Optional[int] = None,
                 exact_path: bool = False, update: bool = False,
                 as_cls: Optional[Type] = None,
-                save_cache=None) -> bool:
+                save_cache=None,
+                compression: Optional[CompressionPolicy] = None,
+                blob_store: Optional[BlobStore] = None,
+                incremental: bool = False,
+                max_workers: Optional[int] = None) -> bool:
+    """
+    A method for saving an object to disk.
+
+    version: File version to write. Version 1 files, with an archive
+        nested for each subordinate object, load with any version of
+        dryml. Version 2 files are flat, so their compute data loads in
+        place, but need this version of dryml or later to load. Saves
+        write version 1 unless a blob store, an incremental save or
+        parallel workers are asked for, which need version 2.
+    save_cache: Cache of saved objects to share with other saves. One
+        kept between saves copies the objects unchanged since instead of
+        saving them again.
+    max_workers: Serialize the objects of the graph with this many
+        threads. The file holds the same entries as a sequential save.
+    """
+    if version is None:
+        needs_v2 = blob_store is not None or incremental or \
+            (max_workers is not None and max_workers > 1)
+        version = 2 if needs_v2 else 1
+    if blob_store is not None and version < 2:
+        raise ValueError(
+            f"File version {version} can't refer to a blob store.")
+    if incremental and version < 2:
+        raise ValueError(
+            f"File version {version} can't be saved incrementally.")
+    if max_workers is not None and max_workers > 1 and version < 2:
+        raise ValueError(
+            f"File version {version} can't be saved in parallel.")
     # Initialize a save cache by default.
     close_save_cache = False
     if save_cache is None:
         close_save_cache = True
         save_cache = SaveCache()
-    with ObjectFile(file, exact_path=exact_path, mode='w',
-                    must_exist=False) as dry_file:
+    with save_cache.operation(), \
+            ObjectFile(file, exact_path=exact_path, mode='w',
+                       must_exist=False, compression=compression) as dry_file:
         if version == 1:
             ret_val = dry_file.save_object_v1(
                 obj, update=update, as_cls=as_cls, save_cache=save_cache)
+        elif version == 2:
+            ret_val = dry_file.save_object_v2(
+                obj, update=update, as_cls=as_cls, save_cache=save_cache,
+                blob_store=blob_store, incremental=incremental,
+                max_workers=max_workers)
         else:
             raise ValueError(f"File version {version} unknown. Can't save!")
 
@@ -490,24 +1221,165 @@ def save_object(obj: Object, file: FileType, version: int = 1,
 
 
 def change_object_cls(obj: Object, cls: Type, update: bool = False,
-                      reload: bool = False) -> Object:
+                      reload: bool = False, in_place: bool = False,
+                      refresh_compute: bool = False) -> Object:
+    """
+    Get an object of another class, with the same definition and
+    content, by saving the object and loading it as cls.
+
+    in_place: Change the class of the object itself, and with update
+        those of its subordinate objects to their current classes,
+        when each new class is a version of the old one which collects
+        the same arguments. The object is returned. Otherwise it's
+        saved and loaded.
+    refresh_compute: When changing classes in place, save and clean up
+        the compute state of objects in compute mode with their old
+        class, then prepare and load it with the new one.
+    """
+    if in_place and migrate_object_cls(
+            obj, cls, update=update, reload=reload,
+            refresh_compute=refresh_compute):
+        return obj
     buffer = io.BytesIO()
-    if not save_object(obj, buffer):
+    # With update, the object's class may be out of date
+    if not save_object(obj, buffer, update=update):
         raise RuntimeError("Error saving object!")
     return load_object(buffer, update=update, reload=reload,
                        as_cls=cls)
 
 
+def same_layout(old_cls: Type, new_cls: Type) -> bool:
+    """
+    Whether objects of one class can take another in place. The new
+    class is a version of the same classes, whose inits collect the same
+    arguments.
+    """
+    old_mro = [base for base in old_cls.__mro__ if isinstance(base, Meta)]
+    new_mro = [base for base in new_cls.__mro__ if isinstance(base, Meta)]
+    if len(old_mro) != len(new_mro):
+        return False
+    for old_base, new_base in zip(old_mro, new_mro):
+        if get_fully_qualified_name(old_base) != \
+                get_fully_qualified_name(new_base):
+            return False
+        try:
+            if old_base.__dict__.get('__dry_init_plan__') != \
+                    new_base.__dict__.get('__dry_init_plan__'):
+                return False
+        except Exception:
+            # Defaults which can't be compared
+            return False
+    return True
+
+
+def migrate_object_cls(obj: Object, cls: Type, update: bool = False,
+                       reload: bool = False,
+                       refresh_compute: bool = False) -> bool:
+    """
+    Change the class of an object in place, keeping its content and
+    compute state. With update, its subordinate objects change to their
+    current classes too. reload reloads the modules of those classes,
+    each once.
+
+    Classes may define migrate_imp(self, old_cls), called after the
+    swap to carry state over, which returns False if the object can't
+    be migrated. Returns whether the objects were migrated, if not they
+    are left as they were.
+    """
+    obj = materialize(obj)
+    # The class given for the object is current already
+    reloaded = {cls.__module__}
+
+    def current_cls(old_cls):
+        module = old_cls.__module__
+        new_cls = get_current_cls(
+            old_cls, reload=reload and module not in reloaded)
+        reloaded.add(module)
+        return new_cls
+
+    # Find the new class of each object in the graph
+    plan = []
+    seen = set()
+    stack = [(obj, cls)]
+    while len(stack) > 0:
+        cur_obj, new_cls = stack.pop()
+        if id(cur_obj) in seen:
+            continue
+        seen.add(id(cur_obj))
+        cur_obj = materialize(cur_obj)
+        if not same_layout(type(cur_obj), new_cls):
+            return False
+        plan.append((cur_obj, type(cur_obj), new_cls))
+        if update:
+            for sub_obj in cur_obj.__dry_obj_container_list__:
+                stack.append((sub_obj, current_cls(type(sub_obj))))
+
+    # Compute state is saved with the old classes and loaded with the
+    # new ones
+    refreshed = []
+    if refresh_compute:
+        for cur_obj, old_cls, new_cls in plan:
+            if new_cls is not old_cls and cur_obj.__dry_compute_mode__:
+                if not cur_obj.save_compute():
+                    raise RuntimeError(
+                        f"Error saving compute of {cur_obj.dry_id}!")
+                cur_obj.compute_cleanup()
+                refreshed.append(cur_obj)
+
+    migrated = _swap_classes(plan)
+    for cur_obj in refreshed:
+        cur_obj.compute_prepare()
+        if not cur_obj.load_compute():
+            raise RuntimeError(
+                f"Error loading compute of {cur_obj.dry_id}!")
+    if not migrated:
+        return False
+
+    for cur_obj, old_cls, new_cls in plan:
+        # Definitions hold the classes of subordinate objects too
+        cur_obj._definition = None
+        if new_cls is not old_cls:
+            cur_obj.mark_dirty()
+    return True
+
+
+def _swap_classes(plan) -> bool:
+    "Swap the classes of objects, undoing it if one can't be migrated"
+    swapped = []
+    try:
+        for cur_obj, old_cls, new_cls in plan:
+            if new_cls is old_cls:
+                continue
+            cur_obj.__class__ = new_cls
+            swapped.append((cur_obj, old_cls))
+            if hasattr(new_cls, 'migrate_imp'):
+                retval = cur_obj.migrate_imp(old_cls)
+                if type(retval) is not bool:
+                    raise TypeError("migrate_imp must return a bool.")
+                if not retval:
+                    break
+        else:
+            return True
+    except BaseException:
+        for cur_obj, old_cls in swapped:
+            cur_obj.__class__ = old_cls
+        raise
+    for cur_obj, old_cls in swapped:
+        cur_obj.__class__ = old_cls
+    return False
+
+
 def obj_to_def(val):
-    if is_supported_scalar_type(val):
+    kind = get_val_kind(val)
+    if kind == VAL_SCALAR:
         return val
-    if isinstance(val, Object):
+    if isinstance(type(val), Meta):
         definition = val.definition()
         return definition
-    elif is_supported_listlike(val):
-        return map_listlike(obj_to_def, val)
-    elif is_supported_dictlike(val):
-        return map_dictlike(obj_to_def, val)
+    elif kind == VAL_LIST:
+        return map_listlike_nonscalar(obj_to_def, val)
+    elif kind == VAL_DICT:
+        return map_dictlike_nonscalar(obj_to_def, val)
     else:
         raise TypeError(
             f"Unsupported value {val} of type "
@@ -549,15 +1421,57 @@ class Object(metaclass=Meta):
         new_kwargs = obj_to_def(self.dry_kwargs)
 
         self._definition = ObjectDef(
-            type(self),
+            object_class(self),
             *new_args,
             **new_kwargs)
 
         return self._definition
 
-    def save_self(self, file: FileType, version: int = 1, **kwargs) -> bool:
+    def save_self(self, file: FileType, version: Optional[int] = None,
+                  **kwargs) -> bool:
         return save_object(self, file, version=version, **kwargs)
 
+    def mark_dirty(self):
+        """
+        Note that this object's content changed since it was last saved
+        or loaded, so an incremental save or a save cache writes it
+        again.
+
+        Saves notice attributes assigned or deleted since on their own.
+        Content changed in place, such as an array written into or a
+        list appended to, must be marked with this method, otherwise
+        saves copy the content as it was.
+        """
+        self.__dry_state_version__ += 1
+        if self.__dry_sync__ is not None:
+            self.__dry_sync__ = self.__dry_sync__._replace(
+                content_clean=False)
+
+    def _record_content_state(self):
+        "Remember the attributes this object's content is saved from"
+        self.__dry_content_state__ = content_state(self)
+
+    def _detect_changes(self) -> bool:
+        """
+        Mark this object dirty if attributes were assigned or deleted
+        since its content state was last recorded, and record it again.
+        Returns whether they were.
+        """
+        state = content_state(self)
+        recorded = getattr(self, '__dry_content_state__', None)
+        if recorded is not None and same_content_state(recorded, state):
+            return False
+        self.__dry_content_state__ = state
+        self.mark_dirty()
+        return True
+
+    def is_dirty(self) -> bool:
+        "Whether this object's content may differ from its last save"
+        self._detect_changes()
+        return self.__dry_sync__ is None or \
+            not self.__dry_sync__.content_clean or \
+            self.__dry_compute_mode__
+
     def __str__(self):
         return str(self.definition())
 
@@ -579,6 +1493,26 @@ class Object(metaclass=Meta):
     def __hash__(self):
         return hash(self.dry_id)
 
+    def __reduce_ex__(self, protocol):
+        """
+        With protocol 5, pickle the object as its class, its arguments
+        and the buffers of its content and compute data, which can be
+        passed out of band so they aren't copied into the pickle. Objects
+        among its arguments are pickled the same way, once each. Compute
+        data is pickled as last saved, objects in compute mode aren't
+        saved first.
+
+        Older protocols, which copy and deepcopy use, pickle the object
+        as any other.
+        """
+        if protocol < 5:
+            return super().__reduce_ex__(protocol)
+        content, compute = object_buffers(self)
+        content = {k: pickle.PickleBuffer(v) for k, v in content.items()}
+        compute = {k: pickle.PickleBuffer(v) for k, v in compute.items()}
+        return (restore_object, (
+            type(self), self.dry_args, self.dry_kwargs, content, compute))
+
     def dry_context_requirements(self):
         context_reqs = {self.__dry_compute_context__: [{}]}
         for obj in self.__dry_obj_container_list__:
@@ -666,6 +1600,18 @@ class ObjectFactory(object):
             callback(obj)
         return obj
 
+    def build_many(self, num: int, repo=None, return_stats: bool = False):
+        "Create num objects sharing one build session"
+        objs, stats = build_many(
+            [self.obj_def]*num, repo=repo, share_defs=False,
+            return_stats=True)
+        for obj in objs:
+            for callback in self.callbacks:
+                callback(obj)
+        if return_stats:
+            return objs, stats
+        return objs
+
 
 class Wrapper(Object):
     """
@@ -707,6 +1653,48 @@ def get_contained_objects(obj: Object) -> [Object]:
     return contained_objs
 
 
+def object_buffers(obj: Object) -> (dict, dict):
+    """
+    Save an object's content and compute data, not including its
+    subordinate objects, as buffers by entry name. Entries are stored,
+    so they're views of one archive in memory rather than copies. The
+    compute data is the one last saved, objects in compute mode aren't
+    saved first.
+    """
+    content_prefix = object_prefix(obj.dry_id)
+    data_prefix = compute_prefix(obj.dry_id)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, mode='w') as zf:
+        if not obj.save_object(
+                ArchiveView(zf, content_prefix),
+                compression=CompressionPolicy.stored(),
+                refresh_compute=False):
+            raise RuntimeError(f"Failed to save object {obj.definition()}")
+
+    content = {}
+    compute = {}
+    with zipfile.ZipFile(MappedFile(buffer.getbuffer()), mode='r') as zf:
+        for name in zf.namelist():
+            if name.startswith(content_prefix):
+                entries, entry_name = content, name[len(content_prefix):]
+            elif name.startswith(data_prefix):
+                entries, entry_name = compute, name[len(data_prefix):]
+            else:
+                continue
+            entries[entry_name] = read_buffer(zf, name)
+    return content, compute
+
+
+def restore_object(cls: Type, args, kwargs, content, compute) -> Object:
+    "Rebuild a pickled object from its arguments and buffers"
+    obj = cls(*args, **kwargs)
+    if not obj.load_object(BufferArchive(content)):
+        raise RuntimeError(f"Failed to load object {obj.definition()}")
+    if len(compute) > 0:
+        obj.__dry_compute_data__ = BufferArchive(compute)
+    return obj
+
+
 class DryObjectPlaceholder(object):
     def __init__(self, ID, obj_def):
         self.ID = ID
@@ -729,22 +1717,23 @@ def create_placeholder(obj: Object) -> (DryObjectPlaceholder,
     ID = generate_unique_id()
     obj_def = obj.definition()
     ph_def = DryObjectPlaceholder(ID, obj_def)
-    temp_buf = io.BytesIO()
-    if not obj.save_self(temp_buf):
-        raise RuntimeError(
-            "Couldn't save object {obj.definition()} to temp buffer!")
-
-    temp_buf.seek(0)
-    ph_data = DryObjectPlaceholderData(ID, temp_buf.read())
+    # Send the compute state of objects in compute mode along
+    for cur_obj in [obj, *get_contained_objects(obj)]:
+        if cur_obj.__dry_compute_mode__ and not cur_obj.save_compute():
+            raise RuntimeError(
+                f"Couldn't save compute data of {cur_obj.definition()}")
+    # Pickled with the newest protocol, objects pickle their content
+    # and compute data rather than their attributes.
+    ph_data = DryObjectPlaceholderData(
+        ID, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
     return (ph_def, ph_data)
 
 
 def rebuild_object(ph_def, ph_data, verbose=False) -> Object:
     if verbose:
         print(f"Rebuilding object {ph_def} with data {ph_data}")
-    obj = ph_def.obj_def.build()
-    buf = io.BytesIO(ph_data.data)
-    if not load_object_content(obj, buf):
+    obj = pickle.loads(ph_data.data)
+    if not isinstance(obj, Object):
         raise RuntimeError(f"Failed to rebuild object {ph_def.obj_def}")
     return obj
 
@@ -5,6 +5,7 @@ from dryml.models import TrainSpec
 from dryml.models import Trainable
 from dryml.data import Dataset
 from dryml import Repo
+from dryml.save_cache import SaveCache
 import pickle
 import uuid
 
@@ -17,7 +18,8 @@ class Tune2ObjectSaver(object):
             test_ds: Dataset = None,
             ctx_reqs=None,
             tmp_checkpoint_dir='/tmp',
-            metrics={}):
+            metrics={},
+            save_cache_bytes: int = 0):
         if model is None:
             raise ValueError("Must pass a model.")
         self.model = model
@@ -41,6 +43,10 @@ class Tune2ObjectSaver(object):
         self.metrics = metrics
         self.tmp_checkpoint_dir = tmp_checkpoint_dir
 
+        # Kept between checkpoints, so parts of the model unchanged
+        # since the last one are copied rather than saved again
+        self.save_cache = SaveCache(max_bytes=save_cache_bytes)
+
     def __call__(self):
         from ray.air import session
         from ray.air.checkpoint import Checkpoint
@@ -63,7 +69,8 @@ class Tune2ObjectSaver(object):
         #       pathlib.Path(checkpoint_dir).mkdir(parents=True, exist_ok=True)
 
         # Save model to checkpoint
-        self.model.save_self(f"{temp_checkpoint_dir}/model.dry")
+        self.model.save_self(
+            f"{temp_checkpoint_dir}/model.dry", save_cache=self.save_cache)
         self.train_state.save(f"{temp_checkpoint_dir}/train_state.pkl")
         with open(f"{temp_checkpoint_dir}/ctx_reqs.pkl", 'wb') as f:
             f.write(pickle.dumps(self.ctx_reqs))
@@ -3,9 +3,13 @@ import traceback
 from dryml.object import Object, ObjectFactory, ObjectFile, \
     ObjectDef, change_object_cls, load_object, get_contained_objects
 from dryml.config import MissingIdError
+from dryml.compression import CompressionPolicy
+from dryml.blob_store import BlobStore
+from dryml.save_cache import SaveCache
 from dryml.selector import Selector
+from dryml.manifest import Manifest, IncompleteManifestError
 from dryml.utils import get_current_cls
-from typing import Optional, Callable, Union, Mapping
+from typing import Optional, Callable, Union, Mapping, List
 import tqdm
 from pprint import pprint
 
@@ -37,6 +41,10 @@ class RepoContainer(object):
         self._directory = directory
         self._filename = None
         self._obj = None
+        # Interned definition read from the file
+        self._definition = None
+        # Manifest read from the file, False if it has none
+        self._manifest = None
 
     def __str__(self):
         if self._obj is None:
@@ -107,7 +115,8 @@ class RepoContainer(object):
 
     def save(self, directory: Optional[str] = None,
              fail_without_directory: bool = True,
-             save_cache=None):
+             save_cache=None, compression=None, blob_store=None,
+             incremental=False, version=None):
         if self._obj is not None:
             # Get object filepath
             filepath = self.filepath
@@ -127,7 +136,11 @@ class RepoContainer(object):
 
             # Build final filepath
             filepath = os.path.join(new_dir, filename)
-            self._obj.save_self(filepath)
+            self._obj.save_self(
+                filepath, save_cache=save_cache, compression=compression,
+                blob_store=blob_store, incremental=incremental,
+                version=version)
+            self._definition = None
 
     def unload(self):
         if self._obj is not None:
@@ -141,9 +154,13 @@ class RepoContainer(object):
 
     def set_directory(self, directory):
         self._directory = directory
+        self._definition = None
+        self._manifest = None
 
     def set_filename(self, filename):
         self._filename = filename
+        self._definition = None
+        self._manifest = None
 
     def get_contained_objects(self):
         if self._obj is None:
@@ -153,22 +170,100 @@ class RepoContainer(object):
 
     def definition(self):
         if self._obj is None:
-            # We need to load the file from disk
-            with ObjectFile(self.filepath) as f:
-                return f.definition()
+            if self._definition is None:
+                # We need to load the file from disk. Identical
+                # sub-definitions are shared between containers.
+                with ObjectFile(self.filepath) as f:
+                    self._definition = f.definition().intern()
+            return self._definition
         else:
             return self._obj.definition()
 
+    def manifest(self) -> Optional[Manifest]:
+        "The manifest of the object's file, None if it has none"
+        if self._manifest is None:
+            with ObjectFile(self.filepath) as f:
+                manifest = f.manifest()
+            self._manifest = manifest if manifest is not None else False
+        if self._manifest is False:
+            return None
+        return self._manifest
+
+    def _summary(self):
+        "The definition if it's at hand, otherwise the manifest if any"
+        if self._obj is not None:
+            return self._obj.definition()
+        if self._definition is None and self._manifest is None:
+            # Read the definition at once from files without a manifest
+            with ObjectFile(self.filepath) as f:
+                manifest = f.manifest()
+                if manifest is None:
+                    self._definition = f.definition().intern()
+            self._manifest = manifest if manifest is not None else False
+        if self._definition is None and self._manifest is not False:
+            return self._manifest
+        return self.definition()
+
+    @property
+    def dry_id(self) -> str:
+        return self._summary().dry_id
+
+    def full_category_id(self) -> str:
+        summary = self._summary()
+        if isinstance(summary, Manifest):
+            return summary.full_category_id
+        return summary.get_full_category_id()
+
+    def matches(self, selector: Callable, *args, **kwargs) -> bool:
+        """
+        Check whether the object satisfies a selector. Selectors are
+        checked against the file's manifest when they can be, so the
+        object's class isn't imported.
+        """
+        summary = self._summary()
+        if isinstance(summary, Manifest) and \
+                isinstance(selector, Selector):
+            try:
+                return selector(summary, *args, **kwargs)
+            except IncompleteManifestError:
+                pass
+        return selector(self.definition(), *args, **kwargs)
+
 
 # This type will act as a fascade for the various Object* types.
 class Repo(object):
     def __init__(self, directory: Optional[str] = None, create: bool = False,
-                 load_objects: bool = True, **kwargs):
+                 load_objects: bool = True,
+                 compression: Optional[CompressionPolicy] = None,
+                 dedup: bool = False, save_cache_bytes: int = 0,
+                 version: Optional[int] = None,
+                 **kwargs):
         super().__init__(**kwargs)
 
+        # Compression policy for saved objects, None for the default
+        self.compression = compression
+
+        # File version of saved objects, None for save_object's default
+        self.version = version
+
+        # Whether saved objects keep their subordinate objects in a
+        # blob store shared by the repo's files, rather than each
+        # holding its own copies.
+        self.dedup = dedup
+
+        # Objects serialized by earlier saves, so saves copy those
+        # unchanged since rather than saving them again.
+        self.save_cache = SaveCache(max_bytes=save_cache_bytes)
+
         # A dictionary of objects
         self.obj_dict = {}
 
+        # Category index. category id -> {dry_id: None}, kept in order
+        # of addition, plus the reverse mapping and category definitions.
+        self._cat_index = {}
+        self._obj_cat_ids = {}
+        self._cat_defs = {}
+
         self._save_objs_on_deletion = False
 
         if directory is not None:
@@ -206,12 +301,88 @@ class Repo(object):
     def __len__(self):
         return len(self.obj_dict)
 
+    def get_blob_store(self, directory: Optional[str] = None) \
+            -> Optional[BlobStore]:
+        "Get the blob store objects saved to a directory should use"
+        if not self.dedup:
+            return None
+        if directory is None:
+            directory = self.directory
+        if directory is None:
+            return None
+        return BlobStore.for_repo(directory)
+
+    def collect_blobs(self, directory: Optional[str] = None) -> List[str]:
+        """
+        Remove the blobs of a directory's blob store which none of the
+        .dry files in the directory refer to, and return their digests.
+
+        Saves and deletes leave blobs of replaced and deleted objects
+        behind, call this to remove them. It reads every file in the
+        directory, and mustn't run while other processes save to it.
+        """
+        blob_store = self.get_blob_store(directory)
+        repo_dir = None
+        if blob_store is not None:
+            repo_dir = os.path.dirname(blob_store.directory)
+        if repo_dir is None or not os.path.isdir(repo_dir):
+            return []
+        roots = [
+            os.path.join(repo_dir, filename)
+            for filename in sorted(os.listdir(repo_dir))
+            if os.path.splitext(filename)[1] == '.dry' and
+            os.path.isfile(os.path.join(repo_dir, filename))]
+        return blob_store.collect(roots)
+
     def add_obj_cont(self, cont: RepoContainer):
-        obj_id = cont.definition().dry_id
+        obj_id = cont.dry_id
         if obj_id in self.obj_dict:
             raise ValueError(
                 f"Object {obj_id} already exists in the repo!")
         self.obj_dict[obj_id] = cont
+        self._index_cont(obj_id, cont)
+
+    def _index_cont(self, obj_id: str, cont: RepoContainer):
+        cat_id = cont.full_category_id()
+        self._obj_cat_ids[obj_id] = cat_id
+        cat_ids = self._cat_index.get(cat_id)
+        if cat_ids is None:
+            cat_ids = {}
+            self._cat_index[cat_id] = cat_ids
+        cat_ids[obj_id] = None
+
+    def _unindex_cont(self, obj_id: str):
+        cat_id = self._obj_cat_ids.pop(obj_id)
+        cat_ids = self._cat_index[cat_id]
+        del cat_ids[obj_id]
+        if len(cat_ids) == 0:
+            del self._cat_index[cat_id]
+            self._cat_defs.pop(cat_id, None)
+
+    def category_index(self) -> Mapping[str, list]:
+        "Get the ids of the objects in each category, by category id"
+        return {
+            cat_id: list(cat_ids)
+            for cat_id, cat_ids in self._cat_index.items()}
+
+    def has_category(self, cat_id: str) -> bool:
+        "Check whether the repo has an object of a category"
+        return cat_id in self._cat_index
+
+    def get_category_id(self, obj_id: str) -> str:
+        "Get the category id of an object in the repo"
+        return self._obj_cat_ids[obj_id]
+
+    def get_category_def(self, cat_id: str) -> ObjectDef:
+        "Get the (immutable) definition of a category in the repo"
+        cat_def = self._cat_defs.get(cat_id)
+        if cat_def is None:
+            # Read from the definition of any object in the category
+            obj_id = next(iter(self._cat_index[cat_id]))
+            cat_def = self.obj_dict[obj_id].definition().get_cat_def(
+                shared=True)
+            self._cat_defs[cat_id] = cat_def
+        return cat_def
 
     def load_objects_from_directory(self, directory: Optional[str] = None,
                                     selector: Optional[Callable] = None,
@@ -228,6 +399,9 @@ class Repo(object):
 
         num_loaded = 0
         for filename in files:
+            if os.path.isdir(os.path.join(directory, filename)):
+                # Such as the blob store
+                continue
             try:
                 # Load container object
                 obj_cont = RepoContainer.from_filepath(
@@ -235,9 +409,9 @@ class Repo(object):
                 )
                 # Run selector
                 if selector is not None:
-                    if not selector(obj_cont.definition()):
+                    if not obj_cont.matches(selector):
                         continue
-                if obj_cont.definition().dry_id not in self.obj_dict:
+                if obj_cont.dry_id not in self.obj_dict:
                     # Add the object
                     self.add_obj_cont(obj_cont)
                     num_loaded += 1
@@ -276,6 +450,14 @@ class Repo(object):
 
     def add_objects(self, obj_factory: ObjectFactory, num=1):
         # Create numerous objects from a factory function
+        if isinstance(obj_factory, ObjectFactory):
+            # Share sub-objects between the new objects
+            objs, stats = obj_factory.build_many(
+                num, repo=self, return_stats=True)
+            for obj in objs:
+                self.add_object(obj)
+            return stats
+
         for i in range(num):
             obj = obj_factory(repo=self)
             self.add_object(obj)
@@ -323,7 +505,7 @@ class Repo(object):
                     return False
 
             if selector is not None:
-                if selector(obj_cont.definition(), *sel_args, **sel_kwargs):
+                if obj_cont.matches(selector, *sel_args, **sel_kwargs):
                     return True
                 else:
                     return False
@@ -561,8 +743,13 @@ class Repo(object):
                 cls = type(obj)
             new_cls = get_current_cls(cls, reload=reload)
 
-            # Set object
-            obj_cont.set_obj(change_object_cls(obj, new_cls, update=True))
+            # Set object. The class is changed in place when the new
+            # one is compatible.
+            obj_cont.set_obj(change_object_cls(
+                obj, new_cls, update=True, in_place=True))
+            obj_id = obj.dry_id
+            self._unindex_cont(obj_id)
+            self._index_cont(obj_id, obj_cont)
 
             # Remove old object
             del obj
@@ -577,7 +764,10 @@ class Repo(object):
              sel_args=None, sel_kwargs=None,
              directory: Optional[str] = None,
              recursive=True,
-             error_on_none=False):
+             error_on_none=False,
+             compression: Optional[CompressionPolicy] = None,
+             incremental: bool = False,
+             save_cache: Optional[SaveCache] = None):
 
         """
         Saves the object or objects matching the input selector to disk.
@@ -586,15 +776,28 @@ class Repo(object):
 
         error_on_none: Whether to throw the KeyError, when no object is in
             the repo matching the key.
+        compression: Compression policy to save with, instead of the
+            repo's.
+        incremental: Whether to copy the entries of objects unchanged
+            since their last save from the files being replaced.
+        save_cache: Save cache to use, instead of the repo's.
         """
 
-        save_cache = set()
+        if compression is None:
+            compression = self.compression
+        blob_store = self.get_blob_store(directory)
+
+        saved = set()
+        # Shared between saves, so subordinate objects in the blob
+        # store are only written once
+        if save_cache is None:
+            save_cache = self.save_cache
 
         def save_func(obj_or_cont):
             if type(obj_or_cont) is Object:
                 # we have a plain dry object
 
-                if obj_or_cont in save_cache:
+                if obj_or_cont in saved:
                     # don't need to save, it's already done.
                     return
 
@@ -605,15 +808,19 @@ class Repo(object):
                         if obj in self:
                             sub_obj_cont = self.get(obj, open_container=False)
                             save_func(sub_obj_cont)
-                        else:
+                        elif blob_store is None:
+                            # Otherwise it's kept in the blob store
                             save_func(obj)
 
                 # Save
                 save_path = os.path.join(
                     directory, f"{obj_or_cont.dry_id}.dry")
-                obj_or_cont.save_self(save_path)
+                obj_or_cont.save_self(
+                    save_path, save_cache=save_cache,
+                    compression=compression, blob_store=blob_store,
+                    incremental=incremental, version=self.version)
 
-                save_cache.add(obj_or_cont)
+                saved.add(obj_or_cont)
 
             else:
                 # We have an object container.
@@ -621,7 +828,7 @@ class Repo(object):
                     raise RuntimeError(
                         "Can only save currently loaded Object")
 
-                if obj_or_cont.obj in save_cache:
+                if obj_or_cont.obj in saved:
                     # don't need to save, it's already done.
                     return
 
@@ -633,13 +840,23 @@ class Repo(object):
                         if obj in self:
                             sub_obj_cont = self.get(obj, open_container=False)
                             save_func(sub_obj_cont)
-                        else:
+                        elif blob_store is None:
+                            # Otherwise it's kept in the blob store
                             obj.save_self(os.path.join(
-                                directory, f"{obj.dry_id}.dry"))
+                                directory, f"{obj.dry_id}.dry"),
+                                save_cache=save_cache,
+                                compression=compression,
+                                blob_store=blob_store,
+                                incremental=incremental,
+                                version=self.version)
 
                 # Save object
-                obj_or_cont.save(directory=directory, save_cache=save_cache)
-                save_cache.add(obj_or_cont.obj)
+                obj_or_cont.save(directory=directory, save_cache=save_cache,
+                                 compression=compression,
+                                 blob_store=blob_store,
+                                 incremental=incremental,
+                                 version=self.version)
+                saved.add(obj_or_cont.obj)
 
         # If we haven't added the object to the repo yet, add it now.
         if issubclass(type(selector), Object):
@@ -647,10 +864,12 @@ class Repo(object):
                 self.add_object(selector)
 
         try:
-            self.apply(
-                save_func,
-                selector=selector, sel_args=sel_args, sel_kwargs=sel_kwargs,
-                open_container=False, only_loaded=True, load_objects=False)
+            with save_cache.operation():
+                self.apply(
+                    save_func, selector=selector,
+                    sel_args=sel_args, sel_kwargs=sel_kwargs,
+                    open_container=False, only_loaded=True,
+                    load_objects=False)
         except KeyError as e:
             if error_on_none:
                 raise e
@@ -659,7 +878,9 @@ class Repo(object):
                    obj_id, directory: Optional[str] = None):
         if directory is None:
             directory = self.directory
-        self.obj_dict[obj_id].save(directory=directory)
+        self.obj_dict[obj_id].save(
+            directory=directory, compression=self.compression,
+            blob_store=self.get_blob_store(directory), version=self.version)
 
     def save_and_cache(
             self,
@@ -672,7 +893,9 @@ class Repo(object):
                 raise RuntimeError("Can only save currently loaded Object")
 
             # Save object
-            obj_cont.save()
+            obj_cont.save(
+                compression=self.compression,
+                blob_store=self.get_blob_store(), version=self.version)
             obj_cont.unload()
 
         self.apply(
@@ -694,7 +917,10 @@ class Repo(object):
             self.add_object(obj)
         else:
             # Set the object for existing container.
-            self.obj_dict[obj_id].set_obj(obj)
+            obj_cont = self.obj_dict[obj_id]
+            obj_cont.set_obj(obj)
+            self._unindex_cont(obj_id)
+            self._index_cont(obj_id, obj_cont)
 
         # Save object to disk.
         self.save_by_id(obj_id)
@@ -726,8 +952,9 @@ class Repo(object):
 
         def del_cont(obj_cont):
             # Delete object from repo object tracker
-            obj_id = obj_cont.definition().dry_id
+            obj_id = obj_cont.dry_id
             del self.obj_dict[obj_id]
+            self._unindex_cont(obj_id)
 
             # Delete object from disk
             obj_cont.delete()
@@ -747,13 +974,20 @@ class Repo(object):
             sel_args=None, sel_kwargs=None,
             only_loaded=False):
         "List unique object definitions yielded by a selector"
-        obj_containers = self.get(
-            selector=selector, sel_args=sel_args, sel_kwargs=sel_kwargs,
-            open_container=False, load_objects=False)
+        if selector is None:
+            # Use the category index
+            obj_containers = [
+                self.obj_dict[obj_id]
+                for cat_ids in self._cat_index.values()
+                for obj_id in cat_ids]
+        else:
+            obj_containers = self.get(
+                selector=selector, sel_args=sel_args, sel_kwargs=sel_kwargs,
+                open_container=False, load_objects=False)
 
-        from dryml.utils import count
-        if count(obj_containers) == 1:
-            obj_containers = [obj_containers]
+            from dryml.utils import count
+            if count(obj_containers) == 1:
+                obj_containers = [obj_containers]
 
         results = {}
 
@@ -762,9 +996,9 @@ class Repo(object):
                 # Skip unloaded objects
                 if not obj_cont.is_loaded():
                     continue
-            obj_def = obj_cont.definition()
-            obj_cat_def = obj_def.get_cat_def()
-            cat_id = obj_cat_def.get_category_id()
+            obj_id = obj_cont.dry_id
+            cat_id = self._obj_cat_ids[obj_id]
+            obj_cat_def = self.get_category_def(cat_id)
 
             if only_loaded:
                 entry = results.get(
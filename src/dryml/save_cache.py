@@ -1,7 +1,36 @@
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
 class SaveCache(object):
-    def __init__(self):
+    """
+    Results of saving objects, so shared objects are saved once.
+
+    Most results only hold for one save operation, and are dropped when
+    the next one starts. Serialized objects are kept across operations,
+    up to max_bytes of them, and copied by later saves for as long as
+    the object's state version is unchanged. The least recently used
+    are dropped first. Objects are tracked by weak reference, so entries
+    go when their object does.
+    """
+    def __init__(self, max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self._init_caches()
+
+    def _init_caches(self):
         self.save_object_cache = {}
         self.save_compute_cache = set()
+        # Digests of objects saved to blob stores, by store directory
+        # and object id
+        self.blob_digest_cache = {}
+        # Serialized objects by object id, least recently used first
+        self.serialized_cache = OrderedDict()
+        self.serialized_bytes = 0
+        self.lock = threading.RLock()
+        self._refs = {}
+        self._depth = 0
 
     @property
     def obj_cache(self):
@@ -11,11 +40,178 @@ class SaveCache(object):
     def compute_cache(self):
         return self.save_compute_cache
 
+    @property
+    def blob_cache(self):
+        return self.blob_digest_cache
+
+    @property
+    def bytes_in_memory(self):
+        "Bytes of cached object files held in memory"
+        return sum(
+            int_file.size() for int_file in self._files()
+            if int_file.in_memory)
+
+    @property
+    def bytes_on_disk(self):
+        "Bytes of cached object files spilled to temporary files"
+        return sum(
+            int_file.size() for int_file in self._files()
+            if not int_file.in_memory)
+
+    def _files(self):
+        yield from self.save_object_cache.values()
+        for _, _, buffer in self.serialized_cache.values():
+            yield buffer
+
+    def _track(self, obj):
+        "Forget an object's entries once it's collected"
+        obj_id = id(obj)
+        if obj_id in self._refs:
+            return
+        cache_ref = weakref.ref(self)
+
+        def forget(_):
+            cache = cache_ref()
+            if cache is not None:
+                cache._forget(obj_id)
+        self._refs[obj_id] = weakref.ref(obj, forget)
+
+    def _forget(self, obj_id):
+        with self.lock:
+            self._refs.pop(obj_id, None)
+            int_file = self.save_object_cache.pop(obj_id, None)
+            if int_file is not None:
+                int_file.close()
+            self.save_compute_cache.discard(obj_id)
+            for key in [key for key in self.blob_digest_cache
+                        if key[1] == obj_id]:
+                del self.blob_digest_cache[key]
+            self._drop_serialized(obj_id)
+
+    @contextmanager
+    def operation(self):
+        """
+        Scope of one save operation. Results which only hold for one
+        operation are dropped when the next outermost one starts.
+        """
+        with self.lock:
+            if self._depth == 0:
+                self._start_operation()
+            self._depth += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self._depth -= 1
+
+    def in_operation(self) -> bool:
+        return self._depth > 0
+
+    def _start_operation(self):
+        for int_file in self.save_object_cache.values():
+            int_file.close()
+        self.save_object_cache.clear()
+        self.save_compute_cache.clear()
+        self.blob_digest_cache.clear()
+        for obj_id in list(self._refs):
+            if obj_id not in self.serialized_cache:
+                del self._refs[obj_id]
+
+    def get_object_file(self, obj):
+        "The version 1 file of an object saved in this operation"
+        return self.save_object_cache.get(id(obj))
+
+    def put_object_file(self, obj, int_file):
+        with self.lock:
+            self._track(obj)
+            self.save_object_cache[id(obj)] = int_file
+
+    def has_compute(self, obj) -> bool:
+        "Whether an object's compute data was saved in this operation"
+        return id(obj) in self.save_compute_cache
+
+    def add_compute(self, obj):
+        with self.lock:
+            self._track(obj)
+            self.save_compute_cache.add(id(obj))
+
+    def get_blob(self, directory: str, obj):
+        "Digest of an object saved to a blob store in this operation"
+        return self.blob_digest_cache.get((directory, id(obj)))
+
+    def put_blob(self, directory: str, obj, digest: str):
+        with self.lock:
+            self._track(obj)
+            self.blob_digest_cache[(directory, id(obj))] = digest
+
+    def get_serialized(self, obj, key):
+        """
+        Get the archive of an object's entries serialized with key, if
+        the object hasn't changed since. Hold the lock while reading it.
+        """
+        with self.lock:
+            entry = self.serialized_cache.get(id(obj))
+            if entry is None:
+                return None
+            version, entry_key, buffer = entry
+            if version != obj.__dry_state_version__ or entry_key != key:
+                self._drop_serialized(id(obj))
+                return None
+            self.serialized_cache.move_to_end(id(obj))
+            return buffer
+
+    def has_serialized(self, obj, key) -> bool:
+        return self.get_serialized(obj, key) is not None
+
+    def put_serialized(self, obj, key, buffer) -> bool:
+        """
+        Keep the archive of an object's entries serialized with key.
+        Returns whether it was kept, if not the caller still owns it.
+        """
+        size = buffer.size()
+        if size > self.max_bytes:
+            return False
+        with self.lock:
+            self._drop_serialized(id(obj))
+            while self.serialized_bytes + size > self.max_bytes:
+                obj_id = next(iter(self.serialized_cache))
+                self._drop_serialized(obj_id)
+            self._track(obj)
+            self.serialized_cache[id(obj)] = (
+                obj.__dry_state_version__, key, buffer)
+            self.serialized_bytes += size
+        return True
+
+    def _drop_serialized(self, obj_id):
+        entry = self.serialized_cache.pop(obj_id, None)
+        if entry is not None:
+            buffer = entry[2]
+            self.serialized_bytes -= buffer.size()
+            buffer.close()
+
+    def clear(self):
+        "Drop everything held"
+        with self.lock:
+            self._start_operation()
+            for obj_id in list(self.serialized_cache):
+                self._drop_serialized(obj_id)
+            self._refs.clear()
+
+    def __getstate__(self):
+        # Cached results don't hold in other processes
+        return {'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.max_bytes = state['max_bytes']
+        self._init_caches()
+
     def __del__(self):
         # Close int_files in save_cache
-        for key in self.save_object_cache:
-            self.save_object_cache[key].close()
+        for int_file in self._files():
+            int_file.close()
 
     def __repr__(self):
         return f"object_cache: {self.save_object_cache} " \
-           f"compute_cache: {self.save_compute_cache}"
+           f"compute_cache: {self.save_compute_cache} " \
+           f"serialized: {len(self.serialized_cache)} objects, " \
+           f"{self.serialized_bytes} bytes"
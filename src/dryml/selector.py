@@ -1,7 +1,10 @@
 from dryml.object import Object, ObjectFile, ObjectDef
+from dryml.manifest import DefManifest, ManifestValue, \
+    IncompleteManifestError
 from dryml.utils import is_nonstring_iterable, is_dictlike, get_class_str, \
-    is_supported_scalar_type, is_supported_dictlike, is_supported_listlike, \
-    map_dictlike, map_listlike, is_equivalent_subclass
+    get_val_kind, map_dictlike_nonscalar, map_listlike_nonscalar, \
+    is_equivalent_subclass, get_fully_qualified_name, \
+    VAL_SCALAR, VAL_LIST, VAL_DICT
 from typing import Union, Callable, Type, Mapping
 
 
@@ -9,16 +12,17 @@ from typing import Union, Callable, Type, Mapping
 def def_to_sel(val, cache=None):
     def applier(val):
         return def_to_sel(val, cache=cache)
-    if is_supported_scalar_type(val):
+    kind = get_val_kind(val)
+    if kind == VAL_SCALAR:
         return val
     elif isinstance(val, Object):
         return Selector.from_def(val.definition(), cache=cache)
     elif isinstance(val, ObjectDef):
         return Selector.from_def(val, cache=cache)
-    elif is_supported_listlike(val):
-        return map_listlike(applier, val)
-    elif is_supported_dictlike(val):
-        return map_dictlike(applier, val)
+    elif kind == VAL_LIST:
+        return map_listlike_nonscalar(applier, val)
+    elif kind == VAL_DICT:
+        return map_dictlike_nonscalar(applier, val)
     else:
         raise RuntimeError(
             f"Encountered unsupported value {val} of type {type(val)}")
@@ -96,6 +100,12 @@ class Selector(object):
     @staticmethod
     def match_objects(
             key_object, value_object, verbosity=0, cls_str_compare=True):
+        if isinstance(value_object, ManifestValue) or (
+                isinstance(value_object, DefManifest) and
+                not isinstance(key_object, Selector)):
+            # Only the full definition has the value to compare
+            raise IncompleteManifestError(
+                f"Can't match {key_object} against {value_object}")
         if issubclass(type(key_object), type):
             # We have a type object. They match if the value object
             # is a subclass of the key object
@@ -171,7 +181,16 @@ class Selector(object):
 
     def cls_compare(self, matcher, cls, verbosity=0, cls_str_compare=True):
         matched = True
-        if isinstance(matcher, type):
+        if isinstance(cls, DefManifest):
+            # Compare with the class names the manifest holds
+            if isinstance(matcher, type):
+                matched = cls.is_subclass(get_fully_qualified_name(matcher))
+            elif isinstance(matcher, str):
+                matched = matcher == cls.cls_str
+            else:
+                raise IncompleteManifestError(
+                    f"Can't match class {cls.cls_str} with {matcher}")
+        elif isinstance(matcher, type):
             if not issubclass(cls, matcher):
                 matched = False
         elif isinstance(matcher, Callable):
@@ -216,7 +235,7 @@ class Selector(object):
 
     def __call__(
             self,
-            obj: Union[Object, ObjectFile, ObjectDef, Mapping],
+            obj: Union[Object, ObjectFile, ObjectDef, DefManifest, Mapping],
             verbosity=0,
             cls_str_compare=True):
         if verbosity > 0:
@@ -226,6 +245,9 @@ class Selector(object):
         # Get definition
         if isinstance(obj, ObjectDef):
             obj_def = obj
+        elif isinstance(obj, DefManifest):
+            # Matched using the class names the manifest holds
+            obj_def = obj
         elif isinstance(obj, Object) or isinstance(obj, ObjectFile):
             obj_def = obj.definition()
         elif isinstance(obj, Mapping):
@@ -240,13 +262,14 @@ class Selector(object):
         if self.cls is not None:
             if not self.cls_compare(
                     self.cls,
-                    obj_def.cls,
+                    obj if isinstance(obj, DefManifest) else obj_def.cls,
                     verbosity=verbosity,
                     cls_str_compare=cls_str_compare):
                 if verbosity > 0:
                     print("Class didn't match")
                 if verbosity > 1:
-                    print(f"Expected class {self.cls} got {obj_def.cls}")
+                    print(f"Expected class {self.cls} got "
+                          f"{getattr(obj_def, 'cls', obj_def)}")
                 return False
 
         # Check object args
@@ -0,0 +1,263 @@
+import itertools
+import numpy as np
+from typing import Union, Mapping, Sequence, Callable, Optional, Iterator
+from dryml.config import ObjectDef, validate_val_def, _dont_collect_kwargs
+from dryml.utils import is_dictlike, get_val_kind, map_listlike_nonscalar, \
+    map_dictlike_nonscalar, VAL_LIST, VAL_DICT
+
+
+SweepPath = Union[str, tuple]
+
+
+def _parse_path(path: SweepPath) -> tuple:
+    "Split a dotted path like 'optimizer.lr' or 'layers.0' into its keys"
+    if type(path) is tuple:
+        return path
+    if type(path) is not str:
+        raise TypeError(f"Unsupported sweep path {path}")
+    keys = []
+    for key in path.split('.'):
+        keys.append(int(key) if key.isdigit() else key)
+    return tuple(keys)
+
+
+def _get_item(val, key):
+    if isinstance(val, ObjectDef):
+        if type(key) is int:
+            return val.args[key]
+        return val.kwargs[key]
+    return val[key]
+
+
+def _replace_items(val, replacements: Mapping):
+    "Copy val with some items replaced. Other items are shared."
+    if isinstance(val, ObjectDef):
+        args = val.args
+        kwargs = dict(val.kwargs)
+        if any(type(key) is int for key in replacements):
+            args = list(args)
+        for key, new_val in replacements.items():
+            if type(key) is int:
+                args[key] = new_val
+            else:
+                kwargs[key] = new_val
+        return ObjectDef._from_parts(
+            val.cls, val.dry_mut, tuple(args), kwargs)
+    elif is_dictlike(val):
+        new_val = dict(val)
+        new_val.update(replacements)
+        return new_val
+    else:
+        new_val = list(val)
+        for key, el in replacements.items():
+            new_val[key] = el
+        return type(val)(new_val)
+
+
+def _fill_defaults(val, memo=None):
+    """
+    Add the declared keyword argument defaults of each class to
+    definitions, as constructing the object would. Points then have the
+    same category as the objects built from them.
+    """
+    if memo is None:
+        memo = {}
+    if isinstance(val, ObjectDef):
+        val_id = id(val)
+        if val_id in memo:
+            return memo[val_id]
+        args = _fill_defaults(val.args, memo=memo)
+        given = dict(val.kwargs)
+        kwargs = dict(given)
+        for klass in val.cls.__mro__:
+            plan = vars(klass).get('__dry_init_plan__')
+            if plan is None:
+                continue
+            for k, default in plan.kwarg_defaults:
+                if k not in _dont_collect_kwargs:
+                    kwargs[k] = given.get(k, default)
+            # Parent classes don't see arguments consumed by children
+            for k in plan.kwarg_names:
+                given.pop(k, None)
+        for k, sub_val in kwargs.items():
+            kwargs[k] = _fill_defaults(sub_val, memo=memo)
+        new_def = ObjectDef._from_parts(
+            val.cls, val.dry_mut, tuple(args), kwargs)
+        memo[val_id] = new_def
+        return new_def
+    kind = get_val_kind(val)
+    if kind == VAL_LIST:
+        return map_listlike_nonscalar(
+            lambda el: _fill_defaults(el, memo=memo), val)
+    elif kind == VAL_DICT:
+        return map_dictlike_nonscalar(
+            lambda el: _fill_defaults(el, memo=memo), val)
+    return val
+
+
+# Most rendered values a node keeps for reuse by later points
+max_node_cache = 4096
+
+
+class _SweepNode(object):
+    "A value in the template containing one or more swept values"
+    def __init__(self, val, use_cache: bool = True):
+        self.val = val
+        self.use_cache = use_cache
+        # key -> _SweepNode
+        self.children = {}
+        # key -> axis index
+        self.axes = {}
+        # Indices of all axes below this node
+        self.axis_ids = []
+        # Value indices of the axes below -> rendered value
+        self.cache = {}
+
+    def render(self, indices: tuple, vals: tuple):
+        if self.use_cache:
+            key = tuple(indices[i] for i in self.axis_ids)
+            new_val = self.cache.get(key)
+            if new_val is not None:
+                return new_val
+        replacements = {k: vals[i] for k, i in self.axes.items()}
+        for k, child in self.children.items():
+            replacements[k] = child.render(indices, vals)
+        new_val = _replace_items(self.val, replacements)
+        if self.use_cache:
+            if len(self.cache) >= max_node_cache:
+                # Keep memory constant for very large spaces
+                self.cache.clear()
+            self.cache[key] = new_val
+        return new_val
+
+
+class Sweep(object):
+    """
+    Lazily expand a template definition over hyperparameter axes
+
+    axes maps a path into the template to the values it takes. Paths are
+    dotted strings or tuples of keys, where strings select keyword
+    arguments or dict keys and integers select positional arguments or
+    list elements. For random sampling, an axis may instead be a
+    callable taking a numpy random Generator.
+
+    Sub-definitions not touched by an axis are shared between points, as
+    are swept sub-definitions rendered with the same values. Build points
+    separately, or with build_many without share_defs, to get independent
+    objects.
+    """
+    def __init__(self, template: ObjectDef,
+                 axes: Mapping[SweepPath, Union[Sequence, Callable]]):
+        if not isinstance(template, ObjectDef):
+            raise TypeError("A sweep template must be an ObjectDef")
+        self.template = _fill_defaults(template)
+        self.paths = [_parse_path(path) for path in axes]
+        self.values = []
+        for vals in axes.values():
+            if not callable(vals):
+                vals = list(vals)
+                for val in vals:
+                    validate_val_def(val)
+                vals = [_fill_defaults(val) for val in vals]
+            self.values.append(vals)
+        self.root = self._build_tree()
+
+    def _build_tree(self):
+        # Every point renders a new root
+        root = _SweepNode(self.template, use_cache=False)
+        for axis_id, path in enumerate(self.paths):
+            if len(path) == 0:
+                raise ValueError("Can't sweep the whole template")
+            node = root
+            for depth, key in enumerate(path):
+                if isinstance(node.val, ObjectDef) and \
+                        'dry_id' in node.val.kwargs:
+                    raise ValueError(
+                        f"Sweep path {path} passes through a definition "
+                        "with a dry_id. Sweep points can't share an id.")
+                last = depth == len(path)-1
+                try:
+                    sub_val = _get_item(node.val, key)
+                except KeyError:
+                    # Swept keyword arguments may be missing
+                    if not last:
+                        raise KeyError(
+                            f"Sweep path {path} not found in the template")
+                except (IndexError, TypeError):
+                    raise KeyError(
+                        f"Sweep path {path} not found in the template")
+                node.axis_ids.append(axis_id)
+                if last:
+                    if key in node.children or key in node.axes:
+                        raise ValueError(f"Sweep path {path} overlaps another")
+                    node.axes[key] = axis_id
+                else:
+                    if key in node.axes:
+                        raise ValueError(f"Sweep path {path} overlaps another")
+                    child = node.children.get(key)
+                    if child is None:
+                        child = _SweepNode(sub_val)
+                        node.children[key] = child
+                    node = child
+        return root
+
+    def __len__(self):
+        "Number of points in the grid"
+        size = 1
+        for vals in self.values:
+            if callable(vals):
+                raise TypeError("Sampled axes don't have a grid size")
+            size *= len(vals)
+        return size
+
+    def _filter(self, points: Iterator[tuple], repo):
+        for indices, vals in points:
+            obj_def = self.root.render(indices, vals)
+            if repo is not None and \
+                    repo.has_category(obj_def.get_full_category_id()):
+                continue
+            yield obj_def
+
+    def grid(self, repo=None) -> Iterator[ObjectDef]:
+        """
+        Yield a definition for every combination of axis values, skipping
+        categories which already exist in repo
+        """
+        if any(callable(vals) for vals in self.values):
+            raise TypeError("Sampled axes can only be used with random")
+
+        def points():
+            ranges = [range(len(vals)) for vals in self.values]
+            for indices in itertools.product(*ranges):
+                yield indices, tuple(
+                    vals[i] for vals, i in zip(self.values, indices))
+
+        return self._filter(points(), repo)
+
+    def random(self, num: int, seed: Optional[int] = None,
+               repo=None) -> Iterator[ObjectDef]:
+        """
+        Yield num randomly sampled definitions, skipping categories which
+        already exist in repo
+        """
+        rng = np.random.default_rng(seed)
+
+        def sample():
+            for n in range(num):
+                indices = []
+                point = []
+                for vals in self.values:
+                    if callable(vals):
+                        val = vals(rng)
+                        validate_val_def(val)
+                        val = _fill_defaults(val)
+                        # Sampled values are never reused
+                        indices.append(-1-n)
+                    else:
+                        i = int(rng.integers(len(vals)))
+                        val = vals[i]
+                        indices.append(i)
+                    point.append(val)
+                yield tuple(indices), tuple(point)
+
+        return self._filter(sample(), repo)
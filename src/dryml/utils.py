@@ -26,18 +26,56 @@ supported_scalar_types = (
     np.number, np.bool_)
 
 
-def is_supported_scalar_type(val):
-    if val is None:
-        return True
-    return is_in_typelist(val, supported_scalar_types)
-
-
 supported_listlike_types = (
     tuple, list)
 
 
+supported_dictlike_types = (
+    dict,)
+
+
+# Kinds of supported values. The kind of a value only depends on its
+# exact type, so it is computed once per type.
+VAL_OTHER = 0
+VAL_SCALAR = 1
+VAL_LIST = 2
+VAL_DICT = 3
+
+_val_kinds = {type(None): VAL_SCALAR}
+
+
+def _classify_val_type(val_type: type) -> int:
+    if issubclass(val_type, supported_scalar_types):
+        return VAL_SCALAR
+    if issubclass(val_type, supported_listlike_types):
+        return VAL_LIST
+    if issubclass(val_type, supported_dictlike_types):
+        return VAL_DICT
+    return VAL_OTHER
+
+
+def get_val_kind(val) -> int:
+    "Get whether a value is a supported scalar, list-like or dict-like"
+    val_type = type(val)
+    kind = _val_kinds.get(val_type)
+    if kind is None:
+        kind = _classify_val_type(val_type)
+        _val_kinds[val_type] = kind
+    return kind
+
+
+def nonscalar_elements(val) -> list:
+    "Get the elements of an iterable which may not be supported scalars"
+    kinds = _val_kinds
+    return [el for el in val if kinds.get(type(el)) != VAL_SCALAR]
+
+
+def is_supported_scalar_type(val):
+    return get_val_kind(val) == VAL_SCALAR
+
+
 def is_supported_listlike(val):
-    return is_in_typelist(val, supported_listlike_types)
+    return get_val_kind(val) == VAL_LIST
 
 
 def map_listlike(func, val):
@@ -45,12 +83,16 @@ def map_listlike(func, val):
     return the_type(map(func, val))
 
 
-supported_dictlike_types = (
-    dict,)
+def map_listlike_nonscalar(func, val):
+    "Like map_listlike, but passes supported scalars through unchanged"
+    kinds = _val_kinds
+    return type(val)(
+        el if kinds.get(type(el)) == VAL_SCALAR else func(el)
+        for el in val)
 
 
 def is_supported_dictlike(val):
-    return is_in_typelist(val, supported_dictlike_types)
+    return get_val_kind(val) == VAL_DICT
 
 
 def map_dictlike(func, val):
@@ -59,6 +101,14 @@ def map_dictlike(func, val):
         k: func(val[k]) for k in val})
 
 
+def map_dictlike_nonscalar(func, val):
+    "Like map_dictlike, but passes supported scalars through unchanged"
+    kinds = _val_kinds
+    return type(val)({
+        k: v if kinds.get(type(v)) == VAL_SCALAR else func(v)
+        for k, v in val.items()})
+
+
 def equal_listlike(equal_func, list_a, list_b):
     if len(list_a) != len(list_b):
         return False
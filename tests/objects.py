@@ -1,6 +1,8 @@
 import dryml
 import zipfile
 import pickle
+import numpy as np
+from dryml.mapped_file import write_buffer, read_buffer
 
 
 class HelloObject(dryml.Object):
@@ -134,6 +136,15 @@ class TestClassC2(dryml.Object):
         return True
 
 
+class TestClassC3(dryml.Object):
+    def __init__(self, A):
+        self.A = A
+        self.getters = [self.get_A]
+
+    def get_A(self):
+        return self.A
+
+
 class TestClassD1(dryml.Object):
     pass
 
@@ -168,6 +179,21 @@ class TestClassE(dryml.Object):
         return True
 
 
+class TestClassH(dryml.Object):
+    def __init__(self, dtype='f8'):
+        self.dtype = dtype
+        self.data = None
+
+    def save_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        write_buffer(file, 'data.bin', self.data)
+        return True
+
+    def load_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        self.data = np.frombuffer(
+            read_buffer(file, 'data.bin'), dtype=self.dtype)
+        return True
+
+
 class TestClassF1(dryml.Object):
     def __init__(self):
         self.val = None
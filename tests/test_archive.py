@@ -0,0 +1,497 @@
+import dryml
+import objects
+import functools
+import io
+import os
+import threading
+import weakref
+import zipfile
+import numpy as np
+import pytest
+from dryml.file_intermediary import FileIntermediary
+from dryml.mapped_file import BufferArchive
+from dryml.lazy import is_lazy, lazy_object
+from dryml.object import ObjectFile, load_object_content
+from dryml.save_cache import SaveCache
+
+
+def make_obj():
+    inner = objects.TestClassH()
+    inner.data = np.arange(1000, dtype='f8')
+    assert inner.save_compute()
+    return objects.TestClassC(inner, B=objects.TestNest(inner)), inner
+
+
+@pytest.mark.usefixtures("create_name")
+def test_archive_1(create_name):
+    """
+    Version 2 files are flat, and hold shared objects once
+    """
+    obj, inner = make_obj()
+    assert obj.save_self(create_name, version=2)
+
+    with zipfile.ZipFile(f"{create_name}.dry") as z_file:
+        names = z_file.namelist()
+        assert not any(name.endswith('.dry') for name in names)
+        assert names.count(f"objects/{inner.dry_id}/cls_str.txt") == 1
+        assert f"compute/{inner.dry_id}/data.bin" in names
+
+    with ObjectFile(create_name) as dry_file:
+        assert dry_file.version == 2
+        assert set(dry_file.contained_object_ids()) == \
+            {inner.dry_id, obj.B.dry_id}
+
+    obj2 = dryml.load_object(create_name, mmap=True)
+    assert obj2.definition() == obj.definition()
+    assert obj2.A is obj2.B.A
+    assert obj2.A.load_compute()
+    assert np.all(obj2.A.data == inner.data)
+    assert obj2.A.data.ctypes.data % 64 == 0
+
+
+@pytest.mark.usefixtures("create_name")
+def test_archive_2(create_name):
+    """
+    Version 1 files still load, and objects move between versions
+    """
+    obj, inner = make_obj()
+    assert obj.save_self(create_name, version=1)
+    with ObjectFile(create_name) as dry_file:
+        assert dry_file.version == 1
+
+    obj2 = dryml.load_object(create_name)
+    assert obj2.A is obj2.B.A
+    assert obj2.save_self(create_name, version=2)
+
+    obj3 = dryml.load_object(create_name, mmap=True)
+    assert isinstance(obj3.A.__dry_compute_data__, BufferArchive)
+    assert obj3.save_self(create_name, version=1)
+
+    obj4 = dryml.load_object(create_name)
+    assert obj4.definition() == obj.definition()
+    assert obj4.A.load_compute()
+    assert np.all(obj4.A.data == inner.data)
+
+
+def test_archive_3():
+    """
+    Compute data of files which aren't mapped is copied out
+    """
+    obj, inner = make_obj()
+    buf = io.BytesIO()
+    assert obj.save_self(buf, version=2)
+
+    buf.seek(0)
+    obj2 = dryml.load_object(buf)
+    assert isinstance(obj2.A.__dry_compute_data__, FileIntermediary)
+    assert obj2.A.load_compute()
+    assert np.all(obj2.A.data == inner.data)
+
+
+def test_archive_4():
+    """
+    Content of objects and their subordinates loads in place
+    """
+    obj, inner = make_obj()
+    buf = io.BytesIO()
+    assert obj.save_self(buf, version=2)
+
+    obj2 = obj.definition().build()
+    assert obj2.A.__dry_compute_data__ is None
+    buf.seek(0)
+    assert load_object_content(obj2, buf)
+    assert obj2.A.load_compute()
+    assert np.all(obj2.A.data == inner.data)
+
+    buf.seek(0)
+    with pytest.raises(ValueError):
+        load_object_content(objects.TestNest(5), buf)
+
+
+@pytest.mark.usefixtures("create_name")
+def test_archive_5(create_name):
+    """
+    Objects track whether they changed since they were saved or loaded
+    """
+    obj, inner = make_obj()
+    assert obj.is_dirty()
+    assert obj.save_self(create_name, version=2)
+    assert not obj.is_dirty()
+    assert not inner.is_dirty()
+
+    assert inner.save_compute()
+    assert inner.is_dirty()
+    assert not obj.is_dirty()
+
+    obj2 = dryml.load_object(create_name)
+    assert not obj2.A.is_dirty()
+    obj2.A.mark_dirty()
+    assert obj2.A.is_dirty()
+
+    # Objects loaded from streams aren't synced with a file
+    buf = io.BytesIO()
+    assert obj.save_self(buf, version=2)
+    buf.seek(0)
+    assert dryml.load_object(buf).is_dirty()
+
+
+@pytest.mark.usefixtures("create_name", "create_temp_dir")
+def test_archive_6(create_name, create_temp_dir, monkeypatch):
+    """
+    Incremental saves copy unchanged objects from the previous file
+    """
+    obj, inner = make_obj()
+    assert obj.save_self(create_name, version=2)
+
+    copied = []
+    orig_copy_raw_entry = dryml.object.copy_raw_entry
+
+    def copy_raw_entry(src, name, dst):
+        copied.append(f"{dst.prefix}{name}")
+        return orig_copy_raw_entry(src, name, dst)
+
+    monkeypatch.setattr(dryml.object, 'copy_raw_entry', copy_raw_entry)
+
+    obj2 = dryml.load_object(create_name)
+    assert obj2.A.load_compute()
+    obj2.A.data = obj2.A.data*2
+    assert obj2.A.save_compute()
+    assert obj2.save_self(create_name, version=2, incremental=True)
+
+    # Only the changed compute data is written again
+    assert f"objects/{obj.dry_id}/dry_kwargs.pkl" in copied
+    assert f"objects/{inner.dry_id}/dry_args.pkl" in copied
+    assert not any(
+        name.startswith(f"compute/{inner.dry_id}/") for name in copied)
+
+    with zipfile.ZipFile(f"{create_name}.dry") as z_file:
+        assert z_file.testzip() is None
+
+    obj3 = dryml.load_object(create_name)
+    assert obj3.definition() == obj.definition()
+    assert obj3.A.load_compute()
+    assert np.all(obj3.A.data == inner.data*2)
+
+    # Without a previous save to the file, everything is written
+    copied.clear()
+    assert obj3.save_self(
+        os.path.join(create_temp_dir, 'obj.dry'), version=2,
+        incremental=True)
+    assert copied == []
+
+
+@pytest.mark.usefixtures("create_name")
+def test_archive_7(create_name):
+    """
+    Lazily loaded objects load when first used
+    """
+    obj, inner = make_obj()
+    assert obj.save_self(create_name, version=2)
+
+    obj2 = dryml.load_object(create_name, lazy=True)
+    assert is_lazy(obj2)
+    assert isinstance(obj2, objects.TestClassC)
+    assert obj2.dry_id == obj.dry_id
+    assert obj2.definition() == obj.definition()
+    assert obj2.dry_metadata == obj.dry_metadata
+    assert is_lazy(obj2)
+
+    inner2 = obj2.A
+    assert not is_lazy(obj2)
+    assert is_lazy(inner2)
+    assert inner2 is obj2.B.A
+    assert inner2.load_compute()
+    assert not is_lazy(inner2)
+    assert np.all(inner2.data == inner.data)
+
+    # Streams can't be read after loading, so they load right away
+    buf = io.BytesIO()
+    assert obj.save_self(buf, version=2)
+    buf.seek(0)
+    assert not is_lazy(dryml.load_object(buf, lazy=True))
+
+
+@pytest.mark.usefixtures("create_temp_dir")
+def test_archive_8(create_temp_dir):
+    """
+    Parallel saves write the same entries as sequential ones
+    """
+    obj, inner = make_obj()
+    obj = objects.TestClassC(obj, B=objects.TestNest(inner))
+    policy = dryml.CompressionPolicy(data=zipfile.ZIP_DEFLATED)
+
+    paths = []
+    for max_workers in (None, 4):
+        path = os.path.join(create_temp_dir, f"obj_{max_workers}.dry")
+        assert dryml.save_object(
+            obj, path, version=2, exact_path=True,
+            compression=policy, max_workers=max_workers)
+        paths.append(path)
+
+    with zipfile.ZipFile(paths[0]) as seq, zipfile.ZipFile(paths[1]) as par:
+        assert seq.namelist() == par.namelist()
+        for seq_info, par_info in zip(seq.infolist(), par.infolist()):
+            assert seq_info.header_offset == par_info.header_offset
+            assert seq_info.compress_type == par_info.compress_type
+            assert seq.read(seq_info) == par.read(par_info)
+
+    obj2 = dryml.load_object(paths[1], exact_path=True)
+    assert obj2.definition() == obj.definition()
+    assert obj2.A.A.load_compute()
+    assert np.all(obj2.A.A.data == inner.data)
+
+
+@pytest.mark.usefixtures("create_name")
+def test_archive_9(create_name, monkeypatch):
+    """
+    Objects of one class share its pickled class, which is loaded once
+    """
+    from dryml import class_cache
+
+    obj = objects.TestNest(5)
+    for _ in range(10):
+        obj = objects.TestNest(obj)
+    assert obj.save_self(create_name, version=2)
+
+    with zipfile.ZipFile(f"{create_name}.dry") as z_file:
+        names = z_file.namelist()
+        assert len([
+            name for name in names if name.startswith('classes/')]) == 1
+        assert not any(
+            name.startswith('objects/') and name.endswith('cls_def.dill')
+            for name in names)
+
+    loads = []
+    orig_loads = class_cache.dill.loads
+
+    def counting_loads(data):
+        loads.append(data)
+        return orig_loads(data)
+
+    class_cache.clear()
+    monkeypatch.setattr(class_cache.dill, 'loads', counting_loads)
+    for _ in range(3):
+        obj2 = dryml.load_object(create_name)
+        assert obj2.definition() == obj.definition()
+    cls_def = class_cache.class_payload(objects.TestNest).data
+    assert loads.count(cls_def) == 1
+
+
+def test_archive_10(monkeypatch):
+    """
+    Errors saving objects in parallel are raised as they are
+    """
+    def save_object_imp(self, file):
+        raise ValueError("Can't save")
+
+    monkeypatch.setattr(objects.TestClassC2, 'save_object_imp',
+                        save_object_imp)
+    obj = objects.TestClassC(
+        objects.TestClassC2(1), B=objects.TestClassC2(2))
+    with pytest.raises(ValueError, match="Can't save"):
+        dryml.save_object(obj, io.BytesIO(), max_workers=4)
+
+
+@pytest.mark.usefixtures("create_name")
+def test_archive_11(create_name, monkeypatch):
+    """
+    Entries are copied through zipfile's public interface where raw
+    copies aren't supported
+    """
+    import dryml.archive
+
+    obj, inner = make_obj()
+    policy = dryml.CompressionPolicy.archival(level=1)
+    assert obj.save_self(create_name, version=2, compression=policy)
+    with zipfile.ZipFile(f"{create_name}.dry") as z_file:
+        infos = {info.filename: info for info in z_file.infolist()}
+
+    monkeypatch.setattr(dryml.archive, '_raw_copy_supported', False)
+    obj2 = dryml.load_object(create_name)
+    assert obj2.save_self(
+        create_name, version=2, incremental=True, compression=policy)
+    assert obj2.save_self(
+        io.BytesIO(), version=2, compression=policy, max_workers=4)
+
+    with zipfile.ZipFile(f"{create_name}.dry") as z_file:
+        assert z_file.testzip() is None
+        for info in z_file.infolist():
+            assert info.compress_type == \
+                infos[info.filename].compress_type
+
+    obj3 = dryml.load_object(create_name, mmap=True)
+    assert obj3.definition() == obj.definition()
+    assert obj3.A.load_compute()
+    assert np.all(obj3.A.data == inner.data)
+    assert obj3.A.data.ctypes.data % 64 == 0
+
+
+@pytest.mark.usefixtures("create_name")
+def test_archive_12(create_name):
+    """
+    Assigned attributes mark objects changed, content changed in place
+    must be marked
+    """
+    obj = objects.TestClassC(objects.TestClassC2([1]))
+    assert obj.save_self(create_name, version=2)
+
+    obj2 = dryml.load_object(create_name)
+    assert not obj2.A.is_dirty()
+    obj2.A.set_val([2])
+    assert obj2.A.is_dirty()
+    assert obj2.save_self(create_name, version=2, incremental=True)
+    obj3 = dryml.load_object(create_name)
+    assert obj3.A.data == [2]
+
+    # Changes in place without mark_dirty aren't saved again
+    obj3.A.data.append(3)
+    assert not obj3.A.is_dirty()
+    assert obj3.save_self(create_name, version=2, incremental=True)
+    assert dryml.load_object(create_name).A.data == [2]
+
+    obj3.A.mark_dirty()
+    assert obj3.save_self(create_name, version=2, incremental=True)
+    assert dryml.load_object(create_name).A.data == [2, 3]
+
+    # Save caches notice assigned attributes too
+    save_cache = SaveCache(max_bytes=2**20)
+    buf = io.BytesIO()
+    assert obj3.save_self(buf, version=2, save_cache=save_cache)
+    obj3.A.set_val([4])
+    buf = io.BytesIO()
+    assert obj3.save_self(buf, version=2, save_cache=save_cache)
+    buf.seek(0)
+    assert dryml.load_object(buf).A.data == [4]
+
+
+@pytest.mark.usefixtures("create_name", "create_temp_dir")
+def test_archive_13(create_name, create_temp_dir):
+    """
+    Saves write version 1 files unless version 2 is asked for, or needed
+    """
+    from dryml.object import ObjectFile
+    from dryml.blob_store import BlobStore
+
+    obj, _ = make_obj()
+    assert obj.save_self(create_name)
+    with ObjectFile(create_name) as dry_file:
+        assert dry_file.version == 1
+
+    assert obj.save_self(create_name, max_workers=2)
+    with ObjectFile(create_name) as dry_file:
+        assert dry_file.version == 2
+
+    blob_store = BlobStore(os.path.join(create_temp_dir, 'blobs'))
+    assert obj.save_self(create_name, blob_store=blob_store)
+    with ObjectFile(create_name) as dry_file:
+        assert dry_file.version == 2
+
+    with pytest.raises(ValueError):
+        obj.save_self(io.BytesIO(), version=1, incremental=True)
+
+
+def test_archive_14():
+    """
+    Lazy subclasses don't keep their classes alive
+    """
+    import gc
+    from dryml.lazy import lazy_class, _lazy_classes
+
+    class Temp(dryml.Object):
+        pass
+
+    lazy_cls = lazy_class(Temp)
+    assert lazy_class(Temp) is lazy_cls
+    assert issubclass(lazy_cls, Temp)
+    assert Temp in _lazy_classes
+
+    temp_ref = weakref.ref(Temp)
+    del Temp, lazy_cls
+    gc.collect()
+    assert temp_ref() is None
+
+
+@pytest.mark.usefixtures("create_name")
+def test_archive_15(create_name):
+    """
+    Lazy objects load in place, and load independently of each other
+    """
+    obj = objects.TestClassC3(objects.TestClassC(1))
+    assert obj.save_self(create_name, version=2)
+
+    # References the object makes to itself are to the lazy object
+    obj2 = dryml.load_object(create_name, lazy=True)
+    assert obj2.getters[0].__self__ is obj2
+    assert not is_lazy(obj2)
+    assert obj2.definition() == obj.definition()
+    assert type(obj2) is objects.TestClassC3
+
+    def init(obj, obj_def):
+        obj_def.cls.__init__(obj, *obj_def.args, **obj_def.kwargs)
+
+    def_a = objects.TestClassC(1).definition()
+    def_b = objects.TestClassC(2).definition()
+    b = lazy_object(def_b, functools.partial(init, obj_def=def_b))
+    results = []
+
+    def load_a(a):
+        # Another object loads while this one is loading, while users
+        # of this one wait for it.
+        b_thread = threading.Thread(target=lambda: b.A)
+        a_thread = threading.Thread(target=lambda: results.append(a.A))
+        b_thread.start()
+        a_thread.start()
+        b_thread.join(10)
+        assert not is_lazy(b)
+        assert not results
+        init(a, def_a)
+        return a_thread
+
+    threads = []
+    a = lazy_object(def_a, lambda a: threads.append(load_a(a)))
+    assert a.A == 1
+    threads[0].join(10)
+    assert results == [1]
+    assert b.A == 2
+
+
+def test_archive_16(monkeypatch):
+    """
+    Classes changed in place are pickled and loaded again, and only so
+    many classes are cached
+    """
+    import gc
+    from dryml import class_cache
+
+    class Temp(dryml.Object):
+        def value(self):
+            return 1
+
+    payload = class_cache.class_payload(Temp)
+    assert class_cache.class_payload(Temp) is payload
+    Temp.value = lambda self: 2
+    payload_2 = class_cache.class_payload(Temp)
+    assert payload_2.digest != payload.digest
+    assert class_cache.class_payload(Temp) is payload_2
+
+    cls = class_cache.load_class(
+        payload_2.digest, lambda: payload_2.data, update=False)
+    assert cls().value() == 2
+    assert class_cache.load_class(
+        payload_2.digest, lambda: payload_2.data, update=False) is cls
+    cls.value = lambda self: 3
+    cls_2 = class_cache.load_class(
+        payload_2.digest, lambda: payload_2.data, update=False)
+    assert cls_2 is not cls
+    assert cls_2().value() == 2
+
+    monkeypatch.setattr(class_cache, 'max_classes', 2)
+    temp_ref = weakref.ref(Temp)
+    for _ in range(2):
+        class Other(dryml.Object):
+            pass
+        class_cache.class_payload(Other)
+    assert len(class_cache._payloads) == 2
+    del Temp, Other, cls, cls_2
+    gc.collect()
+    assert temp_ref() is None
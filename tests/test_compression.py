@@ -0,0 +1,140 @@
+import dryml
+import objects
+import io
+import os
+import zipfile
+import pytest
+from dryml.mapped_file import MappedFile
+from dryml.compression import ENTRY_DATA
+
+
+def compress_types(z_file):
+    return {info.filename: info.compress_type for info in z_file.infolist()}
+
+
+def nested_zip(z_file, name):
+    return zipfile.ZipFile(io.BytesIO(z_file.read(name)))
+
+
+def make_obj(compression=None):
+    inner = objects.TestClassE()
+    inner.set_val(list(range(1000)))
+    assert inner.save_compute(compression=compression)
+    return objects.TestNest(inner)
+
+
+@pytest.mark.usefixtures("create_name")
+def test_compression_1(create_name):
+    """
+    By default definitions are deflated while nested archives are stored
+    """
+    obj = make_obj()
+    assert obj.save_self(create_name, version=1)
+
+    with zipfile.ZipFile(f"{create_name}.dry") as z_file:
+        types = compress_types(z_file)
+        assert types['dry_args.pkl'] == zipfile.ZIP_DEFLATED
+        # Small entries aren't worth compressing
+        assert types['dry_kwargs.pkl'] == zipfile.ZIP_STORED
+        inner_name = f"dry_objects/{obj.A.dry_id}.dry"
+        assert types[inner_name] == zipfile.ZIP_STORED
+        inner_zip = nested_zip(z_file, inner_name)
+        assert compress_types(inner_zip)['compute_data.zip'] == \
+            zipfile.ZIP_STORED
+        compute_zip = nested_zip(inner_zip, 'compute_data.zip')
+        assert compress_types(compute_zip)['data.pkl'] == zipfile.ZIP_STORED
+
+    obj2 = dryml.load_object(create_name, mmap=True)
+    assert isinstance(obj2.A.__dry_compute_data__, MappedFile)
+    assert obj2.A.load_compute()
+    assert obj2.A.data == obj.A.data
+
+
+@pytest.mark.usefixtures("create_name")
+def test_compression_2(create_name):
+    """
+    An archival policy compresses data inside nested archives
+    """
+    policy = dryml.CompressionPolicy.archival()
+    obj = make_obj(compression=policy)
+    assert obj.save_self(create_name, version=2, compression=policy)
+
+    with zipfile.ZipFile(f"{create_name}.dry") as z_file:
+        types = compress_types(z_file)
+        assert types[f"compute/{obj.A.dry_id}/data.pkl"] == \
+            zipfile.ZIP_DEFLATED
+
+    obj2 = dryml.load_object(create_name)
+    assert obj2.A.load_compute()
+    assert obj2.A.data == obj.A.data
+
+
+@pytest.mark.usefixtures("create_temp_dir")
+def test_compression_3(create_temp_dir):
+    """
+    Repos save with their policy, unless one is given to save
+    """
+    stored = dryml.CompressionPolicy.stored()
+    repo = dryml.Repo(
+        directory=create_temp_dir, compression=stored, version=2)
+    obj = objects.TestNest(objects.TestNest2(A=5))
+    repo.add_object(obj)
+    repo.save()
+
+    path = os.path.join(create_temp_dir, f"{obj.dry_id}.dry")
+    with zipfile.ZipFile(path) as z_file:
+        assert set(compress_types(z_file).values()) == {zipfile.ZIP_STORED}
+
+    repo.save(compression=dryml.CompressionPolicy(
+        zipfile.ZIP_DEFLATED, min_size=0))
+    with zipfile.ZipFile(path) as z_file:
+        kwargs_name = f"objects/{obj.dry_id}/dry_kwargs.pkl"
+        assert compress_types(z_file)[kwargs_name] == \
+            zipfile.ZIP_DEFLATED
+
+    repo2 = dryml.Repo(directory=create_temp_dir)
+    assert repo2.get(obj.definition()).definition() == obj.definition()
+
+
+def test_compression_errors_1():
+    with pytest.raises(ValueError):
+        dryml.CompressionPolicy(tensors=zipfile.ZIP_DEFLATED)
+    with pytest.raises(TypeError):
+        dryml.save_object(objects.TestNest(5), io.BytesIO(), compression=5)
+
+
+def test_compression_4():
+    """
+    Streamed entries are compressed with the level of their kind
+    """
+    data = b''.join(
+        str(i*7919 % 10007).encode() for i in range(20000))
+    sizes = {}
+    for level in (1, 9):
+        policy = dryml.CompressionPolicy(
+            data=(zipfile.ZIP_DEFLATED, level))
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, mode='w') as z_file:
+            zinfo = policy.zip_info(z_file, 'data.bin', ENTRY_DATA)
+            with z_file.open(zinfo, 'w') as f:
+                f.write(data)
+        with zipfile.ZipFile(buf) as z_file:
+            assert z_file.read('data.bin') == data
+            sizes[level] = z_file.getinfo('data.bin').compress_size
+    assert sizes[9] < sizes[1]
+
+
+def test_compression_5():
+    """
+    Equal policies hash equally, so they can be used as keys
+    """
+    policies = {
+        dryml.CompressionPolicy.default(): 'default',
+        dryml.CompressionPolicy.archival(): 'archival',
+    }
+    assert policies[dryml.CompressionPolicy.default()] == 'default'
+    assert policies[dryml.CompressionPolicy.archival(9)] == 'archival'
+    assert dryml.CompressionPolicy.archival(1) not in policies
+    assert len({
+        dryml.CompressionPolicy(), dryml.CompressionPolicy.stored(),
+        dryml.CompressionPolicy(min_size=0)}) == 2
@@ -191,3 +191,190 @@ def test_def_8():
     assert trainable_obj_built['train_fn']['optimizer'][0] == opt_obj[0]
     assert trainable_obj_built['train_fn']['epochs'] == train_fn_obj['epochs']
     assert trainable_obj_built['train_fn']['loss'].A == loss_obj.A
+
+
+def test_def_digest_1():
+    """
+    Definition digests are cached, and invalidated by mutation
+    """
+    import pickle
+
+    obj = objects.TestNest(objects.TestNest2(A=5))
+    obj_def = obj.definition()
+    sub_def = obj_def['dry_args'][0]
+
+    ind_id = obj_def.get_individual_id()
+    cat_id = obj_def.get_category_id()
+    assert obj_def._digest_cache is not None
+    assert sub_def._digest_cache is not None
+    assert obj_def.get_individual_id() == ind_id
+
+    # Mutating a nested definition invalidates its parents
+    sub_def['dry_kwargs'] = {**sub_def['dry_kwargs'], 'A': 6}
+    assert obj_def._digest_cache is None
+    assert obj_def.get_individual_id() != ind_id
+    assert obj_def.get_category_id() != cat_id
+
+    # Copies and pickles don't carry over the cache
+    cpy = copy.copy(obj_def)
+    assert cpy._digest_cache is None
+    assert cpy.get_individual_id() == obj_def.get_individual_id()
+    loaded = pickle.loads(pickle.dumps(obj_def))
+    assert loaded.get_individual_id() == obj_def.get_individual_id()
+
+
+def test_def_digest_2():
+    """
+    Digests don't depend on keyword argument order
+    """
+
+    def_1 = dryml.ObjectDef(objects.TestClassC, 1, B={'x': 1, 'y': [2.0]})
+    def_2 = dryml.ObjectDef(objects.TestClassC, 1, B={'y': [2.0], 'x': 1})
+    assert def_1 == def_2
+    assert def_1.get_category_id() == def_2.get_category_id()
+
+    def_3 = dryml.ObjectDef(objects.TestClassC, 1, B={'x': 1, 'y': (2.0,)})
+    assert def_1.get_category_id() != def_3.get_category_id()
+
+
+def test_def_digest_3():
+    """
+    Digests follow values changed in place inside arguments, and
+    interned definitions keep their own copies of them
+    """
+    def_1 = dryml.ObjectDef(
+        objects.TestClassC, {'x': [1, 2]}, dry_id='a')
+    sub_def = dryml.ObjectDef(objects.TestNest, def_1, dry_id='b')
+    ind_id = def_1.get_individual_id()
+    cat_id = def_1.get_category_id()
+    sub_cat_id = sub_def.get_full_category_id()
+    int_1 = def_1.intern()
+
+    def_1['dry_args'][0]['x'].append(3)
+    assert def_1.get_individual_id() != ind_id
+    assert def_1.get_category_id() != cat_id
+    assert sub_def.get_full_category_id() != sub_cat_id
+    assert int_1.get_individual_id() == ind_id
+    assert def_1.intern() is not int_1
+
+    def_1['dry_args'][0]['x'].pop()
+    assert def_1.get_individual_id() == ind_id
+    assert def_1.intern() is int_1
+
+
+def test_def_intern_1():
+    """
+    Identical concrete definitions intern to one immutable instance
+    """
+    import pickle
+    import pytest
+
+    obj = objects.TestNest(objects.TestNest2(A=5))
+    obj_def = obj.definition()
+    def_1 = pickle.loads(pickle.dumps(obj_def))
+    def_2 = pickle.loads(pickle.dumps(obj_def))
+    assert def_1 is not def_2
+    assert def_1.tracking_id != def_2.tracking_id
+
+    int_1 = def_1.intern()
+    int_2 = def_2.intern()
+    assert int_1 is int_2
+    assert int_1.interned
+    assert int_1 == obj_def
+    assert int_1['dry_args'][0] is obj_def['dry_args'][0].intern()
+
+    with pytest.raises(TypeError):
+        int_1['dry_mut'] = True
+
+    # Copies can be modified again
+    cpy = copy.copy(int_1)
+    cpy['dry_mut'] = True
+    assert cpy != int_1
+
+    # Non-concrete definitions keep their own identity
+    open_def = dryml.ObjectDef(objects.TestNest, def_1['dry_args'][0])
+    open_int = open_def.intern()
+    assert not open_int.interned
+    assert open_int['dry_args'][0] is int_1['dry_args'][0]
+
+
+def test_def_equality_1():
+    """
+    Equality compares digests, with optional recursive verification
+    """
+    import pickle
+
+    obj = objects.TestNest(objects.TestClassC(1, B=[1, 2]))
+    obj_def = obj.definition()
+    other_def = pickle.loads(pickle.dumps(obj_def))
+    assert obj_def == other_def
+    assert obj_def != dryml.ObjectDef(objects.TestNest, 5)
+    assert obj_def != dict(obj_def)
+
+    # Changing nested keyword arguments is noticed
+    sub_def = other_def['dry_args'][0]
+    sub_def['dry_kwargs']['B'] = [1, 3]
+    assert obj_def != other_def
+    sub_def['dry_kwargs']['B'] = [1, 2]
+    assert obj_def == other_def
+
+    # So are changes deeper inside values
+    sub_def['dry_kwargs']['B'].append(3)
+    assert obj_def != other_def
+    dryml.ObjectDef.verify_equality = True
+    try:
+        assert obj_def != other_def
+        sub_def['dry_kwargs']['B'].pop()
+        assert obj_def == other_def
+    finally:
+        dryml.ObjectDef.verify_equality = False
+
+
+def test_def_equality_2():
+    """
+    Equality follows arguments edited in place, as a recursive comparison
+    does
+    """
+    def_1 = dryml.ObjectDef(objects.TestClassC, {'x': 1})
+    def_2 = dryml.ObjectDef(objects.TestClassC, {'x': 1})
+    assert def_1 == def_2
+    def_2['dry_args'][0]['x'] = 5
+    assert def_1 != def_2
+    assert not dryml.utils.equal_recursive(def_1, def_2)
+
+    def_1 = dryml.ObjectDef(objects.TestClassC, [1, 2])
+    def_2 = dryml.ObjectDef(objects.TestClassC, [1, 3])
+    assert def_1 != def_2
+    def_2['dry_args'][0][1] = 2
+    assert def_1 == def_2
+    assert dryml.utils.equal_recursive(def_1, def_2)
+
+
+def test_def_category_1():
+    """
+    Category definitions and ids are memoized per definition
+    """
+    import pytest
+
+    def make():
+        return objects.TestNest(objects.TestClassC(
+            objects.TestClassC2(1), B=[1, objects.TestNest2(A=3)]))
+
+    obj_def = make().definition()
+    assert obj_def.get_full_category_id() == \
+        obj_def.get_cat_def().get_category_id()
+    assert obj_def.get_full_category_id() == \
+        make().definition().get_full_category_id()
+
+    cat_def = obj_def.get_cat_def(shared=True)
+    assert cat_def is obj_def.get_cat_def(shared=True)
+    assert cat_def == obj_def.get_cat_def()
+    assert obj_def.get_cat_def() is not obj_def.get_cat_def()
+    with pytest.raises(TypeError):
+        cat_def['dry_args'][0]['dry_kwargs']['B'] = 5
+
+    # Changing a sub-definition drops the memoized values
+    cat_id = obj_def.get_full_category_id()
+    obj_def['dry_args'][0]['dry_kwargs']['B'] = 5
+    assert obj_def.get_cat_def(shared=True) is not cat_def
+    assert obj_def.get_full_category_id() != cat_id
@@ -178,3 +178,49 @@ def test_file_intermediary_6(create_name):
             assert f2.read().decode('utf-8') == test_text
 
     int_file.close()
+
+
+@pytest.mark.usefixtures("create_name")
+def test_file_intermediary_7(create_name):
+    """
+    Intermediaries are copied out in chunks
+    """
+    import dryml.file_intermediary
+
+    old_chunk_size = dryml.file_intermediary.copy_chunk_size
+    dryml.file_intermediary.copy_chunk_size = 7
+    try:
+        int_file = FileIntermediary()
+        data = bytes(range(256))*10
+        int_file.write(data)
+        int_file.write_to_file(create_name)
+        assert int_file.tell() == len(data)
+        int_file.close()
+    finally:
+        dryml.file_intermediary.copy_chunk_size = old_chunk_size
+
+    with open(create_name, 'rb') as f:
+        assert f.read() == data
+
+
+def test_file_intermediary_8():
+    """
+    Spooled intermediaries move to disk once they grow past their size
+    """
+    int_file = FileIntermediary.spooled(spool_size=100)
+    assert int_file.in_memory
+
+    z_file = zipfile.ZipFile(int_file, mode='w')
+    with z_file.open('small.txt', 'w') as f:
+        f.write(b'a')
+    assert int_file.in_memory
+    with z_file.open('large.txt', 'w') as f:
+        f.write(b'b'*200)
+    assert not int_file.in_memory
+    z_file.close()
+
+    int_file.seek(0)
+    with zipfile.ZipFile(int_file, mode='r') as z_file:
+        assert z_file.read('small.txt') == b'a'
+        assert z_file.read('large.txt') == b'b'*200
+    int_file.close()
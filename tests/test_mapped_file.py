@@ -0,0 +1,150 @@
+import dryml
+import gc
+import mmap
+import objects
+import weakref
+import zipfile
+import numpy as np
+import pytest
+from dryml.file_intermediary import FileIntermediary
+from dryml.mapped_file import MappedFile, BufferArchive, write_buffer, \
+    read_buffer, open_entry
+
+
+@pytest.mark.usefixtures("create_name")
+def test_mapped_file_1(create_name):
+    """
+    Buffers are written aligned, and read back without copying
+    """
+    data = np.arange(100, dtype='f4')
+
+    int_file = FileIntermediary()
+    with zipfile.ZipFile(int_file, mode='w') as zf:
+        with zf.open('small.txt', 'w') as f:
+            f.write(b'abc')
+        write_buffer(zf, 'data.bin', data)
+        with pytest.raises(ValueError):
+            write_buffer(zf, 'bad.bin', np.zeros((4, 4))[:, 0])
+    int_file.write_to_file(create_name)
+    int_file.close()
+
+    # Plain files are read normally
+    with zipfile.ZipFile(create_name, mode='r') as zf:
+        assert np.all(np.frombuffer(
+            read_buffer(zf, 'data.bin'), dtype='f4') == data)
+
+    mapped = MappedFile.open(create_name)
+    with zipfile.ZipFile(mapped, mode='r') as zf:
+        view = read_buffer(zf, 'data.bin')
+        assert view.readonly
+        assert view.obj is mapped.getbuffer().obj
+        arr = np.frombuffer(view, dtype='f4')
+        assert np.all(arr == data)
+        assert arr.ctypes.data % 64 == 0
+        with open_entry(zf, 'small.txt') as f:
+            assert f.read() == b'abc'
+    mapped.close()
+
+    # Views outlive the file they came from
+    assert np.all(arr == data)
+
+
+@pytest.mark.usefixtures("create_name")
+def test_mapped_file_2(create_name):
+    """
+    Compute data of loaded objects is used in place
+    """
+    obj = objects.TestClassH()
+    obj.data = np.arange(1000, dtype='f8')
+    assert obj.save_compute()
+    assert obj.save_self(create_name, version=2)
+
+    loaded = dryml.load_object(create_name, mmap=True)
+    compute_data = loaded.__dry_compute_data__
+    assert isinstance(compute_data, BufferArchive)
+    assert isinstance(compute_data.entry_view('data.bin').obj, mmap.mmap)
+    assert loaded.load_compute()
+    assert np.all(loaded.data == obj.data)
+    assert not loaded.data.flags.writeable
+    assert loaded.data.ctypes.data % 64 == 0
+
+    # The file can be saved over while it's mapped
+    assert loaded.save_self(create_name, version=2)
+    assert np.all(loaded.data == obj.data)
+    reloaded = dryml.load_object(create_name)
+    assert reloaded.load_compute()
+    assert np.all(reloaded.data == obj.data)
+
+
+@pytest.mark.usefixtures("create_name")
+def test_mapped_file_3(create_name):
+    """
+    Compute data of nested objects is mapped and aligned too
+    """
+    obj = objects.TestClassH()
+    obj.data = np.arange(1000, dtype='f8')
+    assert obj.save_compute()
+    outer = objects.TestNest(objects.TestNest(obj))
+    assert outer.save_self(create_name, version=1)
+
+    loaded = dryml.load_object(create_name, mmap=True).A.A
+    assert isinstance(loaded.__dry_compute_data__, MappedFile)
+    assert loaded.load_compute()
+    assert np.all(loaded.data == obj.data)
+    assert loaded.data.ctypes.data % 64 == 0
+
+
+@pytest.mark.usefixtures("create_name")
+def test_mapped_file_4(create_name):
+    """
+    Files are unmapped once loading is done, unless views of them are
+    still in use
+    """
+    from dryml.object import ObjectFile
+
+    obj = objects.TestClassH()
+    obj.data = np.arange(1000, dtype='f8')
+    assert obj.save_compute()
+    assert obj.save_self(create_name)
+
+    with ObjectFile(create_name, mmap=True) as dry_file:
+        dry_file.definition()
+        mapping = dry_file.binary_file._mmap
+    assert mapping.closed
+
+    loaded = dryml.load_object(create_name, mmap=True)
+    assert loaded.load_compute()
+    mapping = loaded.data.base.obj
+    assert isinstance(mapping, mmap.mmap)
+    assert not mapping.closed
+    mapping = weakref.ref(mapping)
+    del loaded
+    gc.collect()
+    assert mapping() is None
+
+
+@pytest.mark.usefixtures("create_name")
+def test_mapped_file_5(create_name):
+    """
+    Loaded objects don't refer to their files unless they're mapped, so
+    the files can be written over
+    """
+    for version in (1, 2):
+        obj = objects.TestClassH()
+        obj.data = np.arange(100000, dtype='f8')
+        assert obj.save_compute()
+        assert obj.save_self(create_name, version=version)
+
+        loaded = dryml.load_object(create_name)
+        assert dryml.save_object(loaded, create_name, version=version)
+        with open(f"{create_name}.dry", 'wb') as f:
+            f.write(b'not an archive')
+        assert loaded.load_compute()
+        assert np.all(loaded.data == obj.data)
+
+        # Saves replace mapped files rather than writing over them
+        assert obj.save_self(create_name, version=version)
+        mapped = dryml.load_object(create_name, mmap=True)
+        assert dryml.save_object(mapped, create_name, version=version)
+        assert mapped.load_compute()
+        assert np.all(mapped.data == obj.data)
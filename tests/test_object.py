@@ -42,6 +42,24 @@ def test_object_collect_kwargs_1():
     assert 'dry_id' not in obj2.mdl_kwargs
 
 
+def test_object_init_plan_1():
+    import objects
+    plan = objects.TestClassD3.__dry_init_plan__
+    assert plan.num_args == 1
+    assert plan.collect_kwargs
+    assert not plan.collect_args
+
+    plan = dryml.Wrapper.__dry_init_plan__
+    assert plan.collect_args
+    assert plan.collect_kwargs
+
+    # Objects nested in containers are still tracked
+    inner = objects.TestNest(1)
+    obj = objects.TestNest3([inner], B={'a': (inner,)})
+    assert obj.__dry_obj_container_list__ == [inner, inner]
+    assert obj.dry_kwargs['B'] == {'a': (inner,)}
+
+
 def test_save_object_1():
     """
     Test Saving objects through an io buffer
@@ -208,6 +226,135 @@ def test_save_object_6(create_temp_named_file):
     assert desc_str == obj2.dry_metadata['description']
 
 
+@pytest.mark.usefixtures("create_name")
+def test_save_object_7(create_name):
+    """
+    Saving to a path writes the archive straight to the file, while
+    subordinate objects go through cached intermediaries
+    """
+    import numpy as np
+    import objects
+    from dryml.object import ObjectFile
+    from dryml.save_cache import SaveCache
+
+    inner = objects.TestClassH()
+    inner.data = np.arange(100, dtype='f8')
+    assert inner.save_compute()
+    obj = objects.TestClassC(inner, B=objects.TestNest(inner))
+
+    save_cache = SaveCache()
+    with ObjectFile(create_name, mode='w', must_exist=False) as dry_file:
+        assert dry_file.save_object_v1(obj, save_cache=save_cache)
+        assert not hasattr(dry_file, 'int_file')
+    assert id(obj) not in save_cache.obj_cache
+    assert id(inner) in save_cache.obj_cache
+
+    obj2 = dryml.load_object(create_name)
+    assert obj2.definition() == obj.definition()
+    assert obj2.A is obj2.B.A
+    assert obj2.A.load_compute()
+    assert np.all(obj2.A.data == inner.data)
+
+
+def test_save_object_8():
+    """
+    Small cached object files are kept in memory
+    """
+    import objects
+    from dryml.save_cache import SaveCache
+
+    obj = objects.TestNest(objects.TestNest2(A=objects.TestNest(5)))
+    save_cache = SaveCache()
+    buf = io.BytesIO()
+    assert obj.save_self(buf, version=1, save_cache=save_cache)
+    assert len(save_cache.obj_cache) == 3
+    assert save_cache.bytes_in_memory > 0
+    assert save_cache.bytes_on_disk == 0
+
+    buf.seek(0)
+    obj2 = dryml.load_object(buf)
+    assert obj2.definition() == obj.definition()
+
+
+def test_save_object_9():
+    """
+    A save cache kept between saves copies objects unchanged since,
+    and drops objects which are gone
+    """
+    import gc
+    import numpy as np
+    import objects
+    from dryml.save_cache import SaveCache
+
+    inner = objects.TestClassH()
+    inner.data = np.arange(1000, dtype='f8')
+    assert inner.save_compute()
+    obj = objects.TestNest(inner)
+
+    save_cache = SaveCache(max_bytes=2**20)
+    buf_1 = io.BytesIO()
+    assert obj.save_self(buf_1, version=2, save_cache=save_cache)
+    cached = save_cache.serialized_cache[id(inner)][2]
+
+    buf_2 = io.BytesIO()
+    assert obj.save_self(buf_2, version=2, save_cache=save_cache)
+    assert buf_1.getvalue() == buf_2.getvalue()
+    assert save_cache.serialized_cache[id(inner)][2] is cached
+
+    # Changed objects are saved again
+    inner.mark_dirty()
+    buf_3 = io.BytesIO()
+    assert obj.save_self(buf_3, version=2, save_cache=save_cache)
+    assert save_cache.serialized_cache[id(inner)][2] is not cached
+    buf_3.seek(0)
+    obj2 = dryml.load_object(buf_3)
+    assert obj2.A.load_compute()
+    assert np.all(obj2.A.data == inner.data)
+
+    # Only what fits is kept, least recently used dropped first
+    save_cache.max_bytes = save_cache.serialized_cache[id(obj)][2].size()
+    other = objects.TestNest(inner)
+    assert other.save_self(io.BytesIO(), version=2, save_cache=save_cache)
+    assert list(save_cache.serialized_cache) == [id(other)]
+
+    inner_id = id(inner)
+    del obj, other, inner, obj2
+    gc.collect()
+    assert inner_id not in save_cache.serialized_cache
+    assert len(save_cache.serialized_cache) == 0
+    assert save_cache.serialized_bytes == 0
+
+
+@pytest.mark.usefixtures("create_name")
+def test_save_object_10(create_name, monkeypatch):
+    """
+    Saves which fail part way through leave the file as it was
+    """
+    import os
+    import objects
+
+    obj = objects.TestClassC2(1)
+    assert obj.save_self(create_name)
+    filepath = f"{create_name}.dry"
+    with open(filepath, 'rb') as f:
+        orig_data = f.read()
+    directory = os.path.dirname(os.path.abspath(filepath))
+    orig_names = os.listdir(directory)
+
+    def save_object_imp(self, file):
+        raise ValueError("Can't save")
+
+    monkeypatch.setattr(objects.TestClassC2, 'save_object_imp',
+                        save_object_imp)
+    for version in (1, 2):
+        with pytest.raises(ValueError, match="Can't save"):
+            obj.save_self(create_name, version=version)
+        with open(filepath, 'rb') as f:
+            assert f.read() == orig_data
+        assert os.listdir(directory) == orig_names
+    assert dryml.load_object(create_name).definition() == obj.definition()
+
+
 def test_basic_object_def_update_1():
     def build_and_save_obj_1():
         time.sleep(1.1)
@@ -554,6 +701,45 @@ def test_change_obj_cls_1():
     assert obj1.dry_kwargs['item'] == obj2.dry_kwargs['item']
 
 
+def test_change_obj_cls_2():
+    """
+    Objects take a reloaded version of their class in place, and are
+    saved and loaded when the new class is different
+    """
+    import numpy as np
+    import objects as objs
+    with open('./tests/test_objs.py', 'w') as f:
+        f.write(test_objs_text.format(version=1))
+
+    import test_objs
+    importlib.reload(test_objs)
+
+    obj = test_objs.SimpleObject(10)
+    obj.state = np.arange(10)
+    old_def = obj.definition()
+
+    time.sleep(1.1)
+    with open('./tests/test_objs.py', 'w') as f:
+        f.write(test_objs_text.format(version=2))
+    importlib.reload(test_objs)
+
+    obj2 = dryml.change_object_cls(
+        obj, test_objs.SimpleObject, update=True, in_place=True)
+    assert obj2 is obj
+    assert type(obj) is test_objs.SimpleObject
+    assert obj.version() == 2
+    assert np.all(obj.state == np.arange(10))
+    assert obj.definition().cls is test_objs.SimpleObject
+    assert obj.definition().get_individual_id() == \
+        old_def.get_individual_id()
+
+    obj3 = objs.TestClassA(item=[5])
+    obj4 = dryml.change_object_cls(obj3, objs.TestClassA2, in_place=True)
+    assert obj4 is not obj3
+    assert type(obj3) is objs.TestClassA
+    assert type(obj4) is objs.TestClassA2
+
+
 def test_object_def_1():
     import objects
     obj_def = dryml.ObjectDef(objects.HelloInt, msg=10)
@@ -764,6 +950,91 @@ def test_object_save_restore_5():
     assert recon_trainable_obj['train_fn']['optimizer'][0] == 20
 
 
+def test_object_pickle_1():
+    """
+    Objects pickle with their content and compute data, passing buffers
+    out of band with protocol 5
+    """
+    import pickle
+    import numpy as np
+    import objects
+
+    inner = objects.TestClassH()
+    inner.data = np.arange(1000, dtype='f8')
+    assert inner.save_compute()
+    data_obj = objects.TestClassC2('test')
+    data_obj.set_val(10)
+    obj = objects.TestClassC(inner, B=objects.TestNest3(inner, data_obj))
+
+    buffers = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    assert sum(len(b.raw()) for b in buffers) >= inner.data.nbytes
+    assert len(data) < inner.data.nbytes
+
+    for obj2 in (pickle.loads(data, buffers=buffers),
+                 pickle.loads(pickle.dumps(obj))):
+        assert obj2.definition() == obj.definition()
+        assert obj2.A is obj2.B[0]
+        assert obj2.B[1].data == 10
+        assert obj2.A.load_compute()
+        assert np.all(obj2.A.data == inner.data)
+
+        # Unpickled objects save like any other
+        buf = io.BytesIO()
+        assert obj2.save_self(buf)
+        obj3 = dryml.load_object(buf)
+        assert obj3.A.load_compute()
+        assert np.all(obj3.A.data == inner.data)
+
+
+def test_object_pickle_2(monkeypatch):
+    """
+    Copies and older pickle protocols copy attributes, and pickling
+    doesn't save objects in compute mode
+    """
+    import copy
+    import pickle
+    import numpy as np
+    import objects
+
+    obj = objects.TestClassH()
+    obj.data = np.arange(1000, dtype='f8')
+    assert obj.save_compute()
+    saved = obj.__dry_compute_data__
+
+    def save_compute(self, *args, **kwargs):
+        raise AssertionError("Compute data saved")
+
+    def object_buffers(obj):
+        raise AssertionError("Buffers saved")
+
+    with dryml.context.ContextManager(
+            resource_requests={'default': {'num_cpus': 1}}):
+        obj.compute_activate()
+        obj.data = obj.data*2
+
+        with monkeypatch.context() as m:
+            m.setattr(objects.TestClassH, 'save_compute', save_compute)
+            for copier in (
+                    copy.copy, copy.deepcopy,
+                    lambda o: pickle.loads(pickle.dumps(o, protocol=4))):
+                with monkeypatch.context() as m_2:
+                    m_2.setattr(
+                        dryml.object, 'object_buffers', object_buffers)
+                    obj2 = copier(obj)
+                assert obj2.dry_id == obj.dry_id
+                assert np.all(obj2.data == obj.data)
+
+            obj2 = pickle.loads(pickle.dumps(obj, protocol=5))
+        assert obj.__dry_compute_mode__
+        assert obj.__dry_compute_data__ is saved
+
+    # The compute data last saved is pickled
+    assert not obj2.__dry_compute_mode__
+    assert obj2.load_compute()
+    assert np.all(obj2.data == np.arange(1000, dtype='f8'))
+
+
 def test_nested_def_build_1():
     """
     Test nested definitions build appropriately.
@@ -805,7 +1076,7 @@ def test_build_crash_1():
         # This definition will throw a TypeError.
         pass
 
-    print(dryml.config.build_cache)
+    assert dryml.BuildSession.current() is None
 
     # Second corrected definition
     test_def_2 = dryml.ObjectDef(objects.TestClassG1, 1)
@@ -814,3 +1085,202 @@ def test_build_crash_1():
     obj2 = test_def_2.build()
 
     assert obj1.dry_id != obj2.dry_id
+
+
+def test_build_session_1():
+    """
+    A build session can be reused to share built objects between builds
+    """
+    import objects
+
+    inner_def = objects.TestNest(1).definition()
+    outer_def_1 = dryml.ObjectDef(objects.TestNest, inner_def)
+    outer_def_2 = dryml.ObjectDef(objects.TestNest2, A=inner_def)
+
+    with dryml.BuildSession() as session:
+        assert dryml.BuildSession.current() is session
+        obj1 = outer_def_1.build()
+    obj2 = outer_def_2.build(session=session)
+    assert dryml.BuildSession.current() is None
+
+    assert obj1.A is obj2.A
+    assert inner_def.dry_id in session.build_cache
+
+    # Without a session, builds don't share objects
+    obj3 = outer_def_1.build()
+    obj4 = outer_def_2.build()
+    assert obj3.A is not obj4.A
+
+
+def test_build_session_2():
+    """
+    Builds in separate threads use separate sessions
+    """
+    import objects
+    import threading
+
+    inner_def = objects.TestNest(1).definition()
+    outer_def = dryml.ObjectDef(objects.TestNest, inner_def)
+
+    results = {}
+    barrier = threading.Barrier(2)
+
+    def build(name):
+        with dryml.BuildSession() as session:
+            barrier.wait()
+            results[name] = (outer_def.build(), session)
+
+    threads = [threading.Thread(target=build, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    (obj1, session1), (obj2, session2) = results[0], results[1]
+    assert session1 is not session2
+    assert obj1.A is not obj2.A
+    assert obj1.A.dry_id == obj2.A.dry_id
+
+
+def test_build_parallel_1():
+    """
+    Parallel builds keep one object per dry_id
+    """
+    import objects
+
+    shared = objects.TestClassC2(0)
+    children = [objects.TestClassC(shared, B=objects.TestNest(i))
+                for i in range(8)]
+    obj = objects.TestNest3(*children, extra=shared)
+    obj_def = obj.definition()
+
+    obj2 = obj_def.build(max_workers=4)
+    assert obj2.definition() == obj_def
+    assert obj2.kwargs['extra'] is not shared
+    for i in range(8):
+        assert obj2[i].A is obj2.kwargs['extra']
+        assert obj2[i].B.A == i
+
+    # Non concrete definitions shared by several siblings are built once
+    sub_def = dryml.ObjectDef(objects.TestNest, 5)
+    obj_def = dryml.ObjectDef(
+        objects.TestNest3, sub_def, sub_def, dryml.ObjectDef(
+            objects.TestNest, 5))
+    obj3 = obj_def.build(max_workers=4)
+    assert obj3[0] is obj3[1]
+    assert obj3[0] is not obj3[2]
+
+
+def test_build_parallel_2():
+    """
+    Loading nested objects with a parallel session
+    """
+    import objects
+
+    shared = objects.TestClassC2(0)
+    shared.set_val(7)
+    children = [objects.TestClassC(shared, B=objects.TestNest(i))
+                for i in range(8)]
+    obj = objects.TestNest3(*children)
+
+    buf = io.BytesIO()
+    assert obj.save_self(buf)
+
+    session = dryml.BuildSession(max_workers=4)
+    with session:
+        with session:
+            obj2 = dryml.load_object(buf)
+        assert session._executor is not None
+    # The pool is released once the session is no longer active
+    assert session._executor is None
+
+    assert obj2.definition() == obj.definition()
+    for i in range(8):
+        assert obj2[i].A is obj2[0].A
+        assert obj2[i].A.data == 7
+
+
+def test_build_many_1():
+    """
+    build_many shares concrete sub-objects across a batch
+    """
+    import objects
+
+    shared_def = objects.TestClassC2(0).definition()
+    defs = [dryml.ObjectDef(
+        objects.TestClassC, shared_def, B=dryml.ObjectDef(objects.TestNest, i))
+        for i in range(5)]
+
+    for max_workers in [None, 4]:
+        objs, stats = dryml.build_many(
+            defs, max_workers=max_workers, return_stats=True)
+        assert [obj.B.A for obj in objs] == list(range(5))
+        for obj in objs:
+            assert obj.A is objs[0].A
+        # One shared object, five nested objects, five top level objects
+        assert stats.constructed == 11
+        assert stats.cached == 4
+        assert stats.loaded_repo == 0
+
+        # Equal definitions without ids build distinct objects
+        nest_def = dryml.ObjectDef(
+            objects.TestClassC, shared_def,
+            B=dryml.ObjectDef(objects.TestNest, 1))
+        obj_1, obj_2 = dryml.build_many(
+            [nest_def, nest_def], max_workers=max_workers)
+        assert obj_1 is not obj_2
+        assert obj_1.B is not obj_2.B
+        assert obj_1.A is obj_2.A
+        obj_1, obj_2 = dryml.build_many(
+            [nest_def, nest_def], max_workers=max_workers, share_defs=True)
+        assert obj_1 is obj_2
+
+
+def test_build_many_2():
+    """
+    Factories built in bulk still create distinct objects
+    """
+    import objects
+
+    shared_def = objects.TestClassC2(0).definition()
+    factory = dryml.ObjectFactory(dryml.ObjectDef(
+        objects.TestClassC, shared_def,
+        B=dryml.ObjectDef(objects.TestNest, 1)))
+
+    objs, stats = factory.build_many(3, return_stats=True)
+    assert len(set(obj.dry_id for obj in objs)) == 3
+    assert len(set(obj.B.dry_id for obj in objs)) == 3
+    assert objs[1].A is objs[0].A
+    assert stats.constructed == 7
+
+
+@pytest.mark.usefixtures("create_temp_dir")
+def test_load_many_1(create_temp_dir):
+    """
+    load_many loads subordinate objects shared between files once
+    """
+    import objects
+    import numpy as np
+
+    shared = objects.TestClassH()
+    shared.data = np.arange(100, dtype='f8')
+    assert shared.save_compute()
+    objs = [objects.TestClassC(shared, B=i) for i in range(5)]
+    paths = []
+    for obj in objs + [shared]:
+        path = os.path.join(create_temp_dir, f"{obj.dry_id}.dry")
+        assert obj.save_self(path)
+        paths.append(path)
+
+    for max_workers in [None, 4]:
+        loaded = dryml.load_many(paths, max_workers=max_workers)
+        assert set(loaded) == {obj.dry_id for obj in objs + [shared]}
+        for obj in objs:
+            assert loaded[obj.dry_id].definition() == obj.definition()
+            assert loaded[obj.dry_id].A is loaded[shared.dry_id]
+        assert loaded[shared.dry_id].load_compute()
+        assert np.all(loaded[shared.dry_id].data == shared.data)
+
+    # Definitions are built
+    loaded = dryml.load_many([objs[0].definition()])
+    assert loaded[objs[0].dry_id].B == 0
@@ -2,6 +2,7 @@ import pytest
 import dryml
 import os
 import tempfile
+import io
 
 import objects
 
@@ -316,6 +317,24 @@ def test_reload_1(create_temp_dir):
     assert objs[2].dry_kwargs['item'] == obj.dry_kwargs['item']
 
 
+@pytest.mark.usefixtures("create_temp_dir")
+def test_reload_2(create_temp_dir):
+    """
+    Objects whose class is unchanged in layout keep their identity and
+    content when reloaded
+    """
+    repo = dryml.Repo(create_temp_dir, create=True)
+
+    obj = objects.TestClassA(item=[10])
+    obj.state = [1, 2, 3]
+    repo.add_object(obj)
+
+    repo.reload_objs(selector=dryml.Selector(cls=objects.TestClassA))
+
+    assert repo.get(obj.dry_id) is obj
+    assert obj.state == [1, 2, 3]
+
+
 @pytest.mark.usefixtures("create_temp_dir")
 def test_save_1(create_temp_dir):
     repo = dryml.Repo(create_temp_dir, create=True)
@@ -560,7 +579,7 @@ def test_object_save_restore_with_repo_1(create_temp_dir):
     # Load the object from the file
     obj2 = obj.definition().build(repo=repo)
 
-    assert dryml.config.build_repo is None
+    assert dryml.BuildSession.current() is None
 
     assert obj.definition() == obj2.definition()
     assert obj.A is obj.B
@@ -663,3 +682,259 @@ def test_object_save_restore_with_repo_3(create_temp_dir):
     repo.load_objects_from_directory()
 
     repo.get(model_def, sel_kwargs={'verbosity': 2})
+
+
+def test_build_from_two_repos_1():
+    """
+    Builds from different repos can be nested
+    """
+    import objects
+
+    repo1 = dryml.Repo()
+    repo2 = dryml.Repo()
+
+    obj1 = objects.TestNest(1)
+    obj2 = objects.TestNest(2)
+    repo1.add_object(obj1)
+    repo2.add_object(obj2)
+
+    with dryml.BuildSession(repo=repo1):
+        assert obj1.definition().build() is obj1
+        assert obj2.definition().build(repo=repo2) is obj2
+        assert dryml.BuildSession.current().repo is repo1
+
+
+def test_build_many_with_repo_1():
+    """
+    Shared objects are loaded from the repo once per batch
+    """
+    shared = objects.TestClassC2(0)
+    repo = dryml.Repo()
+    repo.add_object(shared)
+
+    factory = dryml.ObjectFactory(dryml.ObjectDef(
+        objects.TestClassC, shared.definition(),
+        B=dryml.ObjectDef(objects.TestNest, 1)))
+    stats = repo.add_objects(factory, num=4)
+    assert stats.loaded_repo == 1
+    assert stats.cached == 3
+    assert stats.constructed == 8
+    assert len(repo) == 9
+    for obj in repo.get(factory.obj_def):
+        assert obj.A is shared
+
+
+@pytest.mark.usefixtures("create_temp_dir")
+def test_container_definitions_interned_1(create_temp_dir):
+    """
+    Unloaded containers share identical sub-definitions
+    """
+    shared = objects.TestClassC2(0)
+    repo = dryml.Repo(directory=create_temp_dir)
+    for i in range(3):
+        repo.add_object(objects.TestClassC(shared, B=i))
+    repo.save()
+
+    repo2 = dryml.Repo(directory=create_temp_dir)
+    sub_defs = [
+        cont.definition()['dry_args'][0] for cont in repo2.obj_dict.values()
+        if cont.definition().cls is objects.TestClassC]
+    assert len(sub_defs) == 3
+    for sub_def in sub_defs:
+        assert sub_def is sub_defs[0]
+
+
+def test_category_index_1():
+    """
+    The repo groups objects by category as they're added and removed
+    """
+    repo = dryml.Repo()
+    objs = [objects.TestClassC(objects.TestClassC2(i % 2), B=[1, 2])
+            for i in range(4)]
+    for obj in objs:
+        repo.add_object(obj)
+
+    index = repo.category_index()
+    # Two categories of TestClassC, two of TestClassC2
+    assert len(index) == 4
+    cat_id = repo.get_category_id(objs[0].dry_id)
+    assert cat_id == objs[0].definition().get_cat_def().get_category_id()
+    assert index[cat_id] == [objs[0].dry_id, objs[2].dry_id]
+    assert repo.get_category_def(cat_id) == objs[0].definition().get_cat_def()
+
+    repo.delete(objs[0], only_loaded=False)
+    assert repo.category_index()[cat_id] == [objs[2].dry_id]
+    repo.delete(objs[2], only_loaded=False)
+    assert cat_id not in repo.category_index()
+
+    repo.list_unique_objs()
+
+
+@pytest.mark.usefixtures("create_temp_dir")
+def test_repo_dedup_1(create_temp_dir):
+    """
+    Subordinate objects shared by saved objects are stored once
+    """
+    import numpy as np
+    from dryml.blob_store import BlobStore
+
+    shared = objects.TestClassH()
+    shared.data = np.arange(10000, dtype='f8')
+    assert shared.save_compute()
+
+    repo = dryml.Repo(directory=create_temp_dir, dedup=True)
+    objs = [objects.TestClassC(shared, B=i) for i in range(5)]
+    for obj in objs:
+        repo.add_object(obj, add_nested=False)
+    repo.save()
+
+    blob_store = BlobStore.for_repo(create_temp_dir)
+    assert len(list(blob_store.digests())) == 1
+    for obj in objs:
+        path = os.path.join(create_temp_dir, f"{obj.dry_id}.dry")
+        assert os.path.getsize(path) < shared.data.nbytes
+
+    repo2 = dryml.Repo(directory=create_temp_dir)
+    assert len(repo2) == 5
+    obj2 = repo2.get(objs[0].definition())
+    assert obj2.definition() == objs[0].definition()
+    assert obj2.A.load_compute()
+    assert np.all(obj2.A.data == shared.data)
+
+
+@pytest.mark.usefixtures("create_temp_dir")
+def test_repo_dedup_2(create_temp_dir):
+    """
+    Saving new objects reusing stored subordinates adds no blobs
+    """
+    from dryml.blob_store import BlobStore
+
+    shared = objects.TestClassC2(objects.TestNest(3))
+    repo = dryml.Repo(directory=create_temp_dir, dedup=True)
+    repo.add_object(objects.TestClassC(shared, B=0), add_nested=False)
+    repo.save()
+
+    blob_store = BlobStore.for_repo(create_temp_dir)
+    digests = set(blob_store.digests())
+    # The shared object and its own subordinate
+    assert len(digests) == 2
+    mtimes = {d: os.path.getmtime(blob_store.path(d)) for d in digests}
+
+    new_obj = objects.TestClassC(shared, B=1)
+    repo.add_object(new_obj, add_nested=False)
+    repo.save(new_obj)
+    assert set(blob_store.digests()) == digests
+    for digest in digests:
+        assert os.path.getmtime(blob_store.path(digest)) == mtimes[digest]
+
+    obj2 = dryml.load_object(
+        os.path.join(create_temp_dir, f"{new_obj.dry_id}.dry"))
+    assert obj2.definition() == new_obj.definition()
+    assert obj2.A.C.A == 3
+
+    with pytest.raises(ValueError):
+        dryml.save_object(new_obj, io.BytesIO(), blob_store=blob_store)
+
+
+@pytest.mark.usefixtures("create_temp_dir")
+def test_repo_dedup_3(create_temp_dir, monkeypatch):
+    """
+    Blobs no saved object refers to any more are removed when asked
+    """
+    from dryml.blob_store import BlobStore
+
+    repo = dryml.Repo(directory=create_temp_dir, dedup=True)
+    shared = objects.TestClassC2(objects.TestNest(3))
+    objs = [objects.TestClassC(shared, B=i) for i in range(2)]
+    other = objects.TestClassC(objects.TestNest(4), B=2)
+    for obj in objs + [other]:
+        repo.add_object(obj, add_nested=False)
+    repo.save()
+
+    blob_store = BlobStore.for_repo(create_temp_dir)
+    digests = set(blob_store.digests())
+    assert len(digests) == 3
+    other_digests = blob_store.reachable([os.path.join(
+        create_temp_dir, f"{other.dry_id}.dry")])
+    assert len(other_digests) == 1
+
+    # Saves and deletes don't read other files to find unused blobs
+    def reachable(self, roots):
+        raise AssertionError("Blob store scanned")
+    with monkeypatch.context() as m:
+        m.setattr(BlobStore, 'reachable', reachable)
+        repo.delete(objs[0].dry_id)
+        repo.delete(other.dry_id)
+        shared.set_val(5)
+        repo.save()
+    assert digests < set(blob_store.digests())
+
+    # Blobs still used by other objects are kept
+    assert repo.collect_blobs() != []
+    new_digests = set(blob_store.digests())
+    assert len(new_digests) == 2
+    assert len(new_digests & digests) == 1
+    assert repo.collect_blobs() == []
+
+    obj2 = dryml.load_object(
+        os.path.join(create_temp_dir, f"{objs[1].dry_id}.dry"))
+    assert obj2.A.data == 5
+    assert obj2.A.C.A == 3
+
+    repo.delete(objs[1].dry_id)
+    repo.collect_blobs()
+    assert list(blob_store.digests()) == []
+
+
+@pytest.mark.usefixtures("create_temp_dir")
+def test_repo_manifest_1(create_temp_dir, monkeypatch):
+    """
+    Repos are scanned and filtered using file manifests
+    """
+    from dryml.object import ObjectFile
+
+    repo = dryml.Repo(directory=create_temp_dir, version=2)
+    inner = objects.TestClassA(item=[1, 2])
+    objs = [
+        objects.TestNest(inner),
+        objects.HelloInt(msg=10),
+        objects.HelloInt(msg=20),
+    ]
+    for obj in objs:
+        repo.add_object(obj)
+    repo.save()
+
+    with ObjectFile(os.path.join(
+            create_temp_dir, f"{objs[0].dry_id}.dry")) as f:
+        manifest = f.manifest()
+    assert manifest.dry_id == objs[0].dry_id
+    assert manifest.full_category_id == \
+        objs[0].definition().get_full_category_id()
+    assert manifest.args[0].kwargs['item'] == [1, 2]
+    assert manifest.is_subclass('dryml.object.Object')
+
+    # Definitions aren't read while scanning and filtering
+    def no_definition(self, *args, **kwargs):
+        raise AssertionError("Definition read")
+    monkeypatch.setattr(ObjectFile, 'definition', no_definition)
+
+    repo2 = dryml.Repo(directory=create_temp_dir)
+    assert len(repo2) == 4
+    assert repo2.category_index() == repo.category_index()
+    conts = repo2.get(
+        selector=dryml.Selector(cls=objects.HelloInt, kwargs={'msg': 10}),
+        open_container=False, load_objects=False)
+    assert conts.dry_id == objs[1].dry_id
+    conts = repo2.get(
+        selector=dryml.Selector(
+            cls=objects.TestNest,
+            args=(dryml.Selector(objects.TestBase),)),
+        open_container=False, load_objects=False)
+    assert conts.dry_id == objs[0].dry_id
+
+    # Selectors the manifest can't answer use the definition
+    monkeypatch.undo()
+    conts = repo2.get(
+        selector=dryml.Selector(cls=lambda cls: cls is objects.HelloInt),
+        open_container=False, load_objects=False)
+    assert len(conts) == 2
@@ -0,0 +1,93 @@
+import pytest
+import dryml
+import objects
+
+
+def make_template():
+    return dryml.ObjectDef(
+        objects.TestClassC,
+        dryml.ObjectDef(objects.TestClassC2, 0),
+        B=dryml.ObjectDef(objects.TestNest2, A=1))
+
+
+def test_sweep_grid_1():
+    """
+    Grid points cover every combination and share sub-definitions
+    """
+    template = make_template()
+    sweep = dryml.Sweep(template, {'0.0': [1, 2, 3], 'B.A': [10, 20]})
+    assert len(sweep) == 6
+
+    points = list(sweep.grid())
+    assert [(p.args[0].args[0], p.kwargs['B'].kwargs['A'])
+            for p in points] == \
+        [(1, 10), (1, 20), (2, 10), (2, 20), (3, 10), (3, 20)]
+    assert points[0].args[0] is points[1].args[0]
+    assert points[0].kwargs['B'] is points[2].kwargs['B']
+
+    # The template is untouched
+    assert template.args[0].args == (0,)
+    assert template.kwargs['B'].kwargs['A'] == 1
+
+    obj = points[-1].build()
+    assert obj.A.C == 3
+    assert obj.B.A == 20
+
+
+def test_sweep_grid_2():
+    """
+    Points whose category is already in a repo are skipped
+    """
+    sweep = dryml.Sweep(make_template(), {'0.0': [1, 2, 3], 'B.A': [10, 20]})
+    repo = dryml.Repo()
+    points = list(sweep.grid())
+    repo.add_object(points[0].build())
+    repo.add_object(points[3].build())
+
+    remaining = list(sweep.grid(repo=repo))
+    assert len(remaining) == 4
+    assert points[0] not in remaining
+    assert points[3] not in remaining
+
+    # Declared defaults are filled in, so templates leaving them out
+    # still match built objects
+    sweep = dryml.Sweep(
+        dryml.ObjectDef(objects.TestClassC, dryml.ObjectDef(
+            objects.TestClassC2, 0)),
+        {'0.0': [1, 2]})
+    repo.add_object(objects.TestClassC(objects.TestClassC2(1)))
+    remaining = list(sweep.grid(repo=repo))
+    assert len(remaining) == 1
+    assert remaining[0].kwargs['B'] is None
+    assert 'dry_id' not in remaining[0].kwargs
+
+
+def test_sweep_random_1():
+    """
+    Random sampling over choices and sampled values
+    """
+    sweep = dryml.Sweep(make_template(), {
+        '0.0': lambda rng: float(rng.random()),
+        'B.A': [10, 20],
+        'B.extra': ['a', 'b']})
+    points = list(sweep.random(5, seed=1))
+    assert len(points) == 5
+    for point in points:
+        assert 0. <= point.args[0].args[0] < 1.
+        assert point.kwargs['B'].kwargs['A'] in (10, 20)
+        assert point.kwargs['B'].kwargs['extra'] in ('a', 'b')
+    assert [p.args[0].args[0] for p in sweep.random(5, seed=1)] == \
+        [p.args[0].args[0] for p in points]
+
+    with pytest.raises(TypeError):
+        sweep.grid()
+
+
+def test_sweep_errors_1():
+    template = make_template()
+    with pytest.raises(KeyError):
+        dryml.Sweep(template, {'C.A': [1]})
+    with pytest.raises(ValueError):
+        dryml.Sweep(template, {'B': [1], 'B.A': [1]})
+    with pytest.raises(ValueError):
+        dryml.Sweep(objects.TestNest2(A=1).definition(), {'A': [1]})
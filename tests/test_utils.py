@@ -1,6 +1,8 @@
 from dryml.utils import get_class_str, get_class_from_str, \
-    apply_func
-from dryml import Selector
+    apply_func, get_val_kind, VAL_OTHER, VAL_SCALAR, VAL_LIST, VAL_DICT
+from dryml.config import is_concrete_val
+from dryml import Selector, ObjectDef
+import numpy as np
 import objects
 
 
@@ -51,3 +53,22 @@ def test_apply_func_2():
     assert obj1.B.B.val == 20
     assert not hasattr(obj1, 'val')
     assert not hasattr(obj1.B, 'val')
+
+
+def test_val_kind_1():
+    assert get_val_kind(None) == VAL_SCALAR
+    assert get_val_kind(1.5) == VAL_SCALAR
+    assert get_val_kind(np.float32(1.5)) == VAL_SCALAR
+    assert get_val_kind(objects.HelloInt) == VAL_SCALAR
+    assert get_val_kind((1,)) == VAL_LIST
+    assert get_val_kind({'a': 1}) == VAL_DICT
+    assert get_val_kind(objects.HelloInt(msg=5)) == VAL_OTHER
+    assert get_val_kind(ObjectDef(objects.HelloInt)) == VAL_OTHER
+
+
+def test_is_concrete_val_1():
+    open_def = ObjectDef(objects.HelloInt, msg=5)
+    assert is_concrete_val([1., 'a', {'b': (2, None)}])
+    assert not is_concrete_val([1., open_def])
+    assert not is_concrete_val({'a': [open_def]})
+    assert is_concrete_val({'a': [objects.HelloInt(msg=5)]})